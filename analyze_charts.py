@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 """
 Analyze Excel files to identify all charts/graphs in each sheet.
+
+--inventory lists charts only, reading the chart parts straight from the
+xlsx zip (chart_inventory.py) instead of loading every cell in openpyxl.
+Files run in a process pool and results are cached by content hash.
 """
 
+import argparse
 import json
 from pathlib import Path
 from openpyxl import load_workbook
@@ -11,6 +16,11 @@ from openpyxl.chart import (
     ScatterChart, RadarChart, BubbleChart, StockChart
 )
 
+import polars as pl
+
+import chart_inventory
+from build_dashboard import profile_frame
+
 
 def get_chart_type_name(chart):
     """Get human-readable chart type name."""
@@ -130,51 +140,86 @@ def analyze_excel_file(file_path):
 
 
 def analyze_data_structure(file_path):
-    """Analyze the data structure of an Excel file to understand potential chart data."""
+    """
+    Analyze the data structure of an Excel file to understand potential chart data.
+
+    Reads each sheet with Polars + calamine and profiles all columns in one
+    pass (build_dashboard.profile_frame) instead of walking cells in openpyxl.
+    """
     print(f"\n  Analyzing data structure...")
     
     try:
-        wb = load_workbook(file_path, data_only=True)
+        frames = pl.read_excel(file_path, sheet_id=0, engine='calamine', raise_if_empty=False)
     except Exception as e:
         print(f"  ERROR: {e}")
         return None
         
     data_info = {}
     
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        
-        # Get headers (first row)
-        headers = []
-        for col in range(1, min(ws.max_column + 1, 50)):  # Limit to first 50 columns
-            cell_value = ws.cell(row=1, column=col).value
-            if cell_value:
-                headers.append(str(cell_value))
+    for sheet_name, df in frames.items():
+        headers = df.columns[:50]  # Limit to first 50 columns
         
         # Sample first few rows
-        sample_data = []
-        for row in range(2, min(6, ws.max_row + 1)):
-            row_data = {}
-            for col, header in enumerate(headers, start=1):
-                cell_value = ws.cell(row=row, column=col).value
-                row_data[header] = str(cell_value) if cell_value else None
-            sample_data.append(row_data)
+        sample_data = [
+            {header: str(value) if value else None for header, value in row.items()}
+            for row in df.head(4).select(headers).iter_rows(named=True)
+        ]
         
         data_info[sheet_name] = {
             'headers': headers,
-            'row_count': ws.max_row,
-            'sample_data': sample_data
+            'row_count': len(df) + 1,  # including the header row, as before
+            'sample_data': sample_data,
+            'profile': profile_frame(df),
         }
         
         print(f"\n    Sheet '{sheet_name}':")
         print(f"      Headers: {headers[:10]}{'...' if len(headers) > 10 else ''}")
-        print(f"      Row count: {ws.max_row}")
+        print(f"      Row count: {len(df) + 1}")
     
-    wb.close()
     return data_info
 
 
-def main():
+def run_inventory(paths, output_path, workers=None):
+    """Chart-only inventory of paths (files or folders), cached in output_path."""
+    files = chart_inventory.expand_paths(paths)
+    cache = chart_inventory.load_inventory_cache(output_path)
+    cached = len(cache)
+    results = chart_inventory.inventory_files(files, cache, workers=workers)
+    chart_inventory.save_inventory_cache(output_path, cache, {'source_files': results})
+    
+    total_charts = 0
+    for file_info in results:
+        if file_info.get('error'):
+            print(f"\n{file_info['file_name']}: ERROR {file_info['error']}")
+            continue
+        file_charts = sum(len(sheet['charts']) for sheet in file_info['sheets'])
+        total_charts += file_charts
+        print(f"\n{file_info['file_name']}: {file_charts} chart(s)")
+        for sheet in file_info['sheets']:
+            for chart in sheet['charts']:
+                print(f"  {sheet['sheet_name']}: {chart['type']}: {chart['title'] or '(untitled)'} "
+                      f"({chart['series_count']} series)")
+    
+    print(f"\nTotal charts found: {total_charts} in {len(results)} file(s) "
+          f"({len(cache) - cached} newly parsed)")
+    print(f"Results saved to: {output_path}")
+    return results
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Analyze charts in Excel workbooks')
+    parser.add_argument('paths', nargs='*',
+                        help='Workbooks or folders of workbooks (default: the known report files)')
+    parser.add_argument('--inventory', action='store_true',
+                        help='List charts only, streaming chart XML from the xlsx zip (cached by file hash)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Process pool size for --inventory (default: CPU count)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     script_dir = Path(__file__).parent
     
     # Files to analyze
@@ -187,6 +232,13 @@ def main():
     
     input_file = script_dir / "input" / "YTD Indirect-G&A Cost.xlsx"
     
+    if args.inventory:
+        paths = args.paths or [f for f in excel_files + [input_file] if f.exists()]
+        return run_inventory(paths, script_dir / "chart_analysis_results.json", args.workers)
+    if args.paths:
+        excel_files = chart_inventory.expand_paths(args.paths)
+        input_file = None
+    
     all_results = {
         'source_files': [],
         'input_file': None
@@ -208,15 +260,19 @@ def main():
     print("INPUT FILE ANALYSIS")
     print('='*80)
     
-    if input_file.exists():
+    if input_file and input_file.exists():
         input_info = analyze_excel_file(input_file)
         if input_info:
             input_data = analyze_data_structure(input_file)
             input_info['data_structure'] = input_data
             all_results['input_file'] = input_info
     
-    # Save results to JSON
+    # Save results to JSON (keeping the --inventory cache section)
     output_path = script_dir / "chart_analysis_results.json"
+    all_results[chart_inventory.CACHE_KEY] = {
+        'version': chart_inventory.INVENTORY_VERSION,
+        'files': chart_inventory.load_inventory_cache(output_path),
+    }
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(all_results, f, indent=2, default=str)
     
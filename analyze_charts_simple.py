@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """
 Simple chart analysis - extract chart titles and types from Excel files.
+
+--inventory skips openpyxl and streams the chart parts from the xlsx zip
+(see chart_inventory.py), sharing the hash cache in chart_analysis_results.json.
 """
 
+import argparse
 import json
 from pathlib import Path
 from openpyxl import load_workbook
 
+import chart_inventory
+
 
 def extract_title_text(title_obj):
     """Extract text from a chart title object."""
@@ -141,7 +147,43 @@ def analyze_data_headers(file_path):
     return data_info
 
 
-def main():
+def inventory_charts(paths, cache_path, workers=None):
+    """Flat chart list (same shape as analyze_excel_charts) from the streaming inventory."""
+    cache = chart_inventory.load_inventory_cache(cache_path)
+    results = chart_inventory.inventory_files(chart_inventory.expand_paths(paths), cache, workers=workers)
+    chart_inventory.save_inventory_cache(cache_path, cache)
+    
+    all_charts = []
+    for file_info in results:
+        if file_info.get('error'):
+            print(f"  ERROR {file_info['file_name']}: {file_info['error']}")
+            continue
+        for sheet in file_info['sheets']:
+            for chart in sheet['charts']:
+                chart_type = chart['class']
+                if chart.get('bar_direction'):
+                    chart_type += f" ({chart['bar_direction']})"
+                if chart.get('grouping'):
+                    chart_type += f" [{chart['grouping']}]"
+                all_charts.append({
+                    'file': file_info['file_name'],
+                    'sheet': sheet['sheet_name'],
+                    'index': chart['index'],
+                    'type': chart_type,
+                    'title': chart['title'],
+                    'series_count': chart['series_count'],
+                    'series_names': [s['title'] for s in chart['series'] if s.get('title')]
+                })
+    return all_charts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize charts in Excel workbooks')
+    parser.add_argument('paths', nargs='*', help='Workbooks or folders (default: the known report files)')
+    parser.add_argument('--inventory', action='store_true',
+                        help='Chart list only, streamed from the xlsx zip with a process pool and hash cache')
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size for --inventory')
+    args = parser.parse_args(argv)
     script_dir = Path(__file__).parent
     
     # Files to analyze
@@ -154,6 +196,10 @@ def main():
     
     input_file = script_dir / "input" / "YTD Indirect-G&A Cost.xlsx"
     
+    if args.paths:
+        files = chart_inventory.expand_paths(args.paths)
+        input_file = None
+    
     all_charts = []
     all_data = {}
     
@@ -161,22 +207,27 @@ def main():
     print("CHART ANALYSIS REPORT")
     print("="*70)
     
-    # Analyze each file
-    for file_path in files:
-        if file_path.exists():
-            charts = analyze_excel_charts(file_path)
-            all_charts.extend(charts)
-            data = analyze_data_headers(file_path)
-            all_data[file_path.name] = data
-        else:
-            print(f"\nFile not found: {file_path.name}")
+    if args.inventory:
+        paths = args.paths or [f for f in files if f.exists()]
+        all_charts = inventory_charts(paths, script_dir / 'chart_analysis_results.json', args.workers)
+        input_file = None
+    else:
+        # Analyze each file
+        for file_path in files:
+            if file_path.exists():
+                charts = analyze_excel_charts(file_path)
+                all_charts.extend(charts)
+                data = analyze_data_headers(file_path)
+                all_data[file_path.name] = data
+            else:
+                print(f"\nFile not found: {file_path.name}")
     
     # Analyze input file
     print("\n" + "="*70)
     print("INPUT FILE STRUCTURE")
     print("="*70)
     
-    if input_file.exists():
+    if input_file and input_file.exists():
         input_data = analyze_data_headers(input_file)
         all_data['INPUT'] = input_data
     
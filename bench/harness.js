@@ -0,0 +1,339 @@
+// Benchmark harness for the dashboard's JS hot paths (Node).
+//
+// Run through `python build_dashboard.py bench`, which assembles the template
+// JS and passes its path:
+//
+//   node --expose-gc bench/harness.js <dashboard.js> [--rows 100000,1000000] [--min-time 1]
+//        [--payloads payloads.json]
+//
+// The dashboard JS runs unmodified against a stub DOM. For each row count a
+// synthetic columnar dataset is generated (seeded, so runs are comparable)
+// and every case runs until --min-time seconds have passed. --payloads lists
+// encrypted payloads written by the builder (one per row count and --embed
+// mode); for each, the ciphertext decode and the unlock path after PBKDF2
+// are timed. Results go to stdout as JSON; progress goes to stderr.
+
+'use strict';
+
+const fs = require('fs');
+const vm = require('vm');
+
+function parseArgs(argv) {
+    const args = { script: argv[0], rows: [100000, 1000000, 5000000], minTime: 1, seed: 42 };
+    for (let i = 1; i < argv.length; i++) {
+        if (argv[i] === '--rows') args.rows = argv[++i].split(',').map(Number);
+        else if (argv[i] === '--min-time') args.minTime = Number(argv[++i]);
+        else if (argv[i] === '--seed') args.seed = Number(argv[++i]);
+        else if (argv[i] === '--payloads') args.payloads = argv[++i];
+    }
+    return args;
+}
+
+// ── Stub DOM ──
+// Any property of a stub is another callable stub, so DOM and Chart.js calls
+// made outside the benchmarked functions are harmless no-ops.
+
+function stub() {
+    const target = function () {};
+    const props = {};
+    return new Proxy(target, {
+        get(_, key) {
+            if (key in props) return props[key];
+            if (key === Symbol.toPrimitive) return () => '';
+            if (key === Symbol.iterator) return [][Symbol.iterator];
+            if (key === 'then') return undefined;
+            if (key === 'length') return 0;
+            if (key === 'querySelectorAll') return () => [];
+            return (props[key] = stub());
+        },
+        set(_, key, value) { props[key] = value; return true; },
+        apply() { return stub(); },
+        construct() { return stub(); }
+    });
+}
+
+function installGlobals() {
+    Object.assign(globalThis, {
+        document: stub(),
+        window: globalThis,
+        localStorage: stub(),
+        Chart: stub(),
+        encryptedPayload: {},
+        requestAnimationFrame: cb => setTimeout(cb, 0),
+        cancelAnimationFrame: () => {},
+        requestIdleCallback: cb => setTimeout(cb, 0)
+    });
+}
+
+// ── Synthetic data ──
+
+function mulberry32(seed) {
+    return function () {
+        seed |= 0; seed = seed + 0x6D2B79F5 | 0;
+        let t = Math.imul(seed ^ seed >>> 15, 1 | seed);
+        t = t + Math.imul(t ^ t >>> 7, 61 | t) ^ t;
+        return ((t ^ t >>> 14) >>> 0) / 4294967296;
+    };
+}
+
+const range = (n, f) => Array.from({ length: n }, (_, i) => f(i));
+
+/** Column values shaped like the Cost Code Detail Report (see build_dashboard.py). */
+function syntheticColumns(api) {
+    const rules = api.rules;
+    const costTypes = [
+        ...range(40, i => `${611000 + i * 10} - Labor ${i}`),
+        ...range(30, i => `${621000 + i * 10} - Travel ${i}`),
+        ...range(30, i => `${641000 + i * 10} - Fleet ${i}`),
+        ...range(20, i => `${511000 + i * 10} - Hours ${i}`),
+        ...range(15, i => `${693000 + i * 10} - Allocation ${i}`),
+        ...range(25, i => `${731000 + i * 10} - GA ${i}`)
+    ];
+    return {
+        'Document Type': ['TE', 'PV', 'JA', 'T3', 'DP', 'P9', 'JE', 'T2', 'PT', 'PM', 'T4', 'RJ'],
+        'Document Company': ['100', '200', '300'],
+        'Batch Type': ['G', 'V', 'T', 'W'],
+        'Div #': range(12, i => String(10 + i)),
+        'Division Name': range(12, i => `Division ${i}`),
+        'Job': range(2000, i => String(10000 + i * 7)),
+        'Job Type': ['GA', 'IN'],
+        'Job Status': ['A', 'C', 'H'],
+        'Job Groupings': range(20, i => `Grp${i}`),
+        'Cost Code': range(200, i => String(i).padStart(3, '0')),
+        'Cost Type': costTypes,
+        'Description': costTypes.map(c => c.split(' - ')[1]),
+        'Unit Number': range(500, i => `U${i}`),
+        'Vendor Name': range(5000, i => `Vendor ${i}`),
+        'Category': rules.categories,
+        'Is_Allocation': ['false', 'true'],
+        'Department': rules.departments.filter(Boolean),
+        'Dept_Category': [...new Set(rules.deptCategories)]
+    };
+}
+
+function syntheticDataset(api, length, seed) {
+    const random = mulberry32(seed);
+    const ds = api.emptyDataset(length);
+    const columns = syntheticColumns(api);
+
+    ds.dates = new Int32Array(length);
+    for (let i = 0; i < length; i++) {
+        const month = (random() * 36) | 0;   // three years of history
+        ds.dates[i] = (2023 + ((month / 12) | 0)) * 10000 + (month % 12 + 1) * 100 + 1 + ((random() * 28) | 0);
+    }
+    ds.fields.push('G/L Date');
+
+    for (const field of ['Actual Amount', 'Actual Units']) {
+        const values = new Float64Array(length);
+        for (let i = 0; i < length; i++) values[i] = Math.round((random() * 20000 - 2000) * 100) / 100;
+        ds.numeric[field] = values;
+        ds.fields.push(field);
+    }
+
+    for (const field in columns) {
+        const values = ['', ...[...new Set(columns[field])].sort()];
+        const codes = values.length > 65536 ? new Uint32Array(length) : new Uint16Array(length);
+        const counts = new Array(values.length).fill(0);
+        for (let i = 0; i < length; i++) {
+            // Skewed towards low codes, like real reports
+            const c = 1 + ((random() * random() * (values.length - 1)) | 0);
+            codes[i] = c;
+            counts[c]++;
+        }
+        ds.dict[field] = { codes, values, counts };
+        ds.fields.push(field);
+    }
+    return ds;
+}
+
+// ── Measurement ──
+
+function gc() {
+    if (global.gc) global.gc();
+}
+
+function measure(name, fn, minTime) {
+    fn();   // warm-up: let the JIT compile before timing
+    gc();
+    const before = process.memoryUsage();
+    let iterations = 0, elapsed = 0, peakHeap = before.heapUsed;
+    const start = process.hrtime.bigint();
+    do {
+        fn();
+        iterations++;
+        elapsed = Number(process.hrtime.bigint() - start) / 1e9;
+        peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+    } while (elapsed < minTime);
+    const after = process.memoryUsage();
+    return {
+        name,
+        iterations,
+        ops_per_sec: iterations / elapsed,
+        mean_ms: elapsed * 1000 / iterations,
+        heap_peak_mb: peakHeap / 1048576,
+        heap_delta_mb: (peakHeap - before.heapUsed) / 1048576,
+        array_buffers_delta_mb: (after.arrayBuffers - before.arrayBuffers) / 1048576
+    };
+}
+
+async function measureAsync(name, fn, minTime) {
+    await fn();
+    gc();
+    const before = process.memoryUsage();
+    let iterations = 0, elapsed = 0, peakHeap = before.heapUsed;
+    const start = process.hrtime.bigint();
+    do {
+        await fn();
+        iterations++;
+        elapsed = Number(process.hrtime.bigint() - start) / 1e9;
+        peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+    } while (elapsed < minTime);
+    return {
+        name,
+        iterations,
+        ops_per_sec: iterations / elapsed,
+        mean_ms: elapsed * 1000 / iterations,
+        heap_peak_mb: peakHeap / 1048576,
+        heap_delta_mb: (peakHeap - before.heapUsed) / 1048576
+    };
+}
+
+// ── Cases ──
+
+function dashboardApi() {
+    // Script-scope bindings (let/const, function declarations) of the
+    // dashboard JS are reachable from code run in the same context
+    return vm.runInThisContext(`({
+        rules: DERIVATION_RULES,
+        emptyDataset,
+        load(ds) { rawData = ds; filteredData = datasetAllRows(ds); cachedMetrics = null; filterCache.entries.clear(); },
+        setFilters(next) {
+            filters = Object.assign({ startDate: null, endDate: null, jobType: 'all', deptCategories: [] },
+                Object.fromEntries(MULTISELECT_FILTERS.map(f => [f.key, []])), next);
+        },
+        clearFilterCache() { filterCache.entries.clear(); },
+        applyFilters,
+        computeAllMetrics: () => computeAllMetrics(filteredData),
+        explorer: () => { cachedMetrics = null; return aggregateExplorerData(filteredData, 'division', 'amount'); },
+        monthly: () => aggregateMonthlyData(filteredData, false),
+        drillSort(col, dir) {
+            drill.data = filteredData; drill.search = ''; drill.sortCol = col; drill.sortDir = dir;
+            applyDrillFilters();
+        },
+        silenceRendering() {
+            // Keep the measured work to the data paths
+            updateDashboard = () => {};
+            updateFilterPills = () => {};
+            renderDrillTable = () => {};
+            updateDrillPagination = () => {};
+        }
+    })`);
+}
+
+function runCases(api, ds, minTime) {
+    api.load(ds);
+    const divisions = ds.dict['Division Name'].values.slice(1, 4);
+    const narrowed = { startDate: '2024-01-01', endDate: '2025-06-30', divisions };
+    const results = [];
+
+    results.push(measure('computeAllMetrics (all rows)', api.computeAllMetrics, minTime));
+
+    results.push(measure('applyFilters (cold)', () => {
+        api.setFilters(narrowed);
+        api.clearFilterCache();
+        api.applyFilters();
+    }, minTime));
+    results.push(measure('applyFilters (narrowed from cached)', () => {
+        api.clearFilterCache();
+        api.setFilters({ startDate: '2024-01-01', endDate: '2025-06-30' });
+        api.applyFilters();
+        api.setFilters(narrowed);
+        api.applyFilters();
+    }, minTime));
+
+    // Remaining cases run over the unfiltered rows
+    api.load(ds);
+    results.push(measure('drill sort (Actual Amount)', () => api.drillSort('Actual Amount', 'desc'), minTime));
+    results.push(measure('drill sort (Department)', () => api.drillSort('Department', 'asc'), minTime));
+    results.push(measure('aggregateExplorerData', api.explorer, minTime));
+    results.push(measure('aggregateMonthlyData', api.monthly, minTime));
+    return results;
+}
+
+/**
+ * Decode and unlock cases for each builder-written payload. The key is given
+ * raw (PBKDF2 costs the same for every encoding), so 'unlock' is base64
+ * decode + AES-GCM decrypt + gunzip (v2) + columnar decode.
+ */
+async function runPayloadCases(manifestPath, minTime) {
+    const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+    const keyBytes = Buffer.from(manifest.key, 'hex');
+    const key = await crypto.subtle.importKey('raw', keyBytes, 'AES-GCM', false, ['decrypt']);
+    const api = vm.runInThisContext(`({
+        decode: p => p.segments ? decodeSegments(p) : base64ToArrayBuffer(p.ct),
+        async unlock(key, p) {
+            let buffer = await decryptWithKey(key, p);
+            if (p.compression === 'gzip') buffer = await gunzipBuffer(buffer);
+            return datasetFromBinary(buffer);
+        }
+    })`);
+    const decoder = typeof Uint8Array.prototype.setFromBase64 === 'function' ? 'setFromBase64' : 'atob';
+
+    const results = [];
+    for (const entry of manifest.payloads) {
+        process.stderr.write(`  payload ${entry.embed}, ${entry.rows.toLocaleString()} rows...\n`);
+        const text = fs.readFileSync(entry.path, 'utf8');
+        const payload = JSON.parse(text);
+        results.push(Object.assign({}, entry, {
+            path: undefined,
+            decoder: entry.embed === 'segments' || !Uint8Array.fromBase64 ? decoder : 'fromBase64',
+            results: [
+                measure('JSON.parse', () => JSON.parse(text), minTime),
+                await measureAsync('decode', () => api.decode(payload), minTime),
+                await measureAsync('unlock (after PBKDF2)', () => api.unlock(key, payload), minTime)
+            ]
+        }));
+    }
+    return results;
+}
+
+async function main() {
+    const args = parseArgs(process.argv.slice(2));
+    installGlobals();
+    vm.runInThisContext(fs.readFileSync(args.script, 'utf8'), { filename: 'dashboard.js' });
+    const api = dashboardApi();
+    api.silenceRendering();
+
+    const sizes = [];
+    for (const rows of args.rows) {
+        process.stderr.write(`  ${rows.toLocaleString()} rows...\n`);
+        gc();
+        const baseline = process.memoryUsage();
+        const ds = syntheticDataset(api, rows, args.seed);
+        gc();
+        const loaded = process.memoryUsage();
+        sizes.push({
+            rows,
+            dataset_mb: (loaded.heapUsed + loaded.arrayBuffers - baseline.heapUsed - baseline.arrayBuffers) / 1048576,
+            results: runCases(api, ds, args.minTime)
+        });
+    }
+
+    const payloads = args.payloads ? await runPayloadCases(args.payloads, args.minTime) : [];
+
+    process.stdout.write(JSON.stringify({
+        node: process.version,
+        gc_exposed: typeof global.gc === 'function',
+        min_time_s: args.minTime,
+        seed: args.seed,
+        sizes,
+        payloads
+    }, null, 2) + '\n');
+    // The dashboard's deferred timers (prior-period KPIs etc.) are not needed
+    process.exit(0);
+}
+
+main().catch(e => {
+    console.error(e);
+    process.exit(1);
+});
@@ -2,7 +2,8 @@
 """
 Indirect G&A Cost Dashboard Builder
 
-Processes Excel data, encrypts it, and builds a single-file HTML dashboard.
+Processes Excel data, encrypts it, and builds a single-file HTML dashboard
+(or, with --target split, a page plus content-hashed assets for static hosting).
 Assembles modular source files (CSS, HTML, JS) into the final output.
 
 OPTIMIZED VERSION:
@@ -12,19 +13,30 @@ OPTIMIZED VERSION:
 """
 
 import argparse
+import atexit
 import base64
+import gzip
 import hashlib
 import json
+import multiprocessing
 import os
 import pickle
+import re
 import secrets
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 import polars as pl
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.keywrap import InvalidUnwrap, aes_key_unwrap, aes_key_wrap
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 
@@ -32,7 +44,23 @@ from cryptography.hazmat.primitives import hashes
 INPUT_DIR = "input"
 TEMPLATE_DIR = "template"
 OUTPUT_FILE = "outputs/Indirect G&A Dashboard.html"
+SITE_DIR = "outputs/site"
+ASSETS_DIR = "assets"
 CACHE_DIR = ".build_cache"
+INPUT_SHEET = 'Cost Code Detail Report'
+# Past Excel's 1,048,576-row limit the report spills onto continuation sheets
+# ("Cost Code Detail Report (2)", ...); every sheet whose name matches and
+# whose header has REQUIRED_COLUMNS is read
+INPUT_SHEET_PATTERN = re.compile(rf'^{re.escape(INPUT_SHEET)}\b', re.IGNORECASE)
+REQUIRED_COLUMNS = ('Document Type', 'G/L Date', 'Job', 'Cost Type', 'Actual Amount')
+# Columns the dashboard uses (the import modal's REQUIRED_COLUMNS and
+# OPTIONAL_COLUMNS); read_input() projects the scan onto them, so Parquet,
+# Arrow and CSV readers skip every other column of the export
+INPUT_COLUMNS = (
+    'G/L Date', 'Division Name', 'Job', 'Job Type', 'Cost Type', 'Actual Amount', 'Document Type',
+    'Description', 'Vendor Name', 'Employee Name', 'Reference', 'Comments', 'Actual Units',
+    'Job Status', 'Job Groupings', 'Div #', 'Batch Type', 'Document Company', 'Cost Code', 'Unit Number',
+)
 DASHBOARD_PASSWORD = os.environ.get('DASHBOARD_PASSWORD', 'indirectga2026')
 
 # Encryption parameters
@@ -40,6 +68,84 @@ PBKDF2_ITERATIONS = 200_000
 SALT_LENGTH = 16
 IV_LENGTH = 12
 KEY_LENGTH = 32
+# Key slots: the data is encrypted once under a random data key, and that key
+# is wrapped (AES-KW, RFC 3394) under the PBKDF2 key of each password. All
+# slots share the payload's salt, so the browser runs PBKDF2 once per attempt
+# however many slots there are. Passwords come from --passwords (one per
+# line), else DASHBOARD_PASSWORD.
+KEY_WRAP = 'AES-KW'
+
+# How the embedded (unsharded) payload carries its ciphertext (--embed):
+#   base64    v1: one base64 string ('ct'), decoded with atob and a byte loop
+#   segments  v2: the data is gzip-compressed before encryption and the
+#             ciphertext split into EMBED_SEGMENT_BYTES base64 segments, which
+#             the browser decodes in place into one buffer (crypto.js)
+EMBED_MODES = ('base64', 'segments')
+EMBED_SEGMENT_BYTES = 3 << 18   # 768 KiB; a multiple of 3, so segments carry no padding
+
+# Columnar payload (decoded by template/js/dataset.js)
+COLUMNAR_FORMAT = 'ga-columnar'
+NUMERIC_COLUMNS = ('Actual Amount', 'Actual Units')
+DATE_COLUMN = 'G/L Date'
+CUBE_DIMENSIONS = ('Division Name', 'Dept_Category', 'Document Type')
+
+# Chunked conversion (--chunk-rows, Parquet/Arrow/CSV inputs): row ranges of
+# the input are read, derived and written as CSV parts by worker processes
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Sharded output (--shard, split target only): the page embeds a small
+# encrypted manifest and fetches one encrypted file per fiscal period when the
+# date filter reaches it
+SHARD_PERIODS = ('year', 'quarter')
+SHARDS_FORMAT = 'ga-shards'
+FISCAL_YEAR_START_MONTH = 1   # 1 = calendar years; 10 makes FY2025 Oct 2024 - Sep 2025
+UNDATED_SHARD = 'undated'
+
+# Data packs: encrypted, gzip-compressed columnar data the import modal loads directly
+PACK_FORMAT = 'ga-data-pack'
+PACK_SUFFIX = '.gapack'
+
+# How the payload is embedded in the page (single) or data asset (split); the
+# rekey subcommand finds it by the prefix, and a split site's data asset by name
+PAYLOAD_PREFIX = 'const encryptedPayload = '
+DATA_ASSET_PATTERN = re.compile(rf'{re.escape(ASSETS_DIR)}/(data\.[0-9a-f]+\.js)')
+
+# Column profiles (profile subcommand): per-column stats used to decide which
+# columns to dictionary-encode, project or drop before a report format ships
+PROFILE_SUFFIX = '.profile.json'
+PROFILE_TOP_VALUES = 5
+PROFILE_HIGH_CARDINALITY = 0.5   # distinct/rows above this gains little from a dictionary
+
+# KPI export (export subcommand): the dashboard's KPIs per filter/period spec
+EXPORT_PERIODS = ('all', 'month', 'quarter', 'year')
+EXPORT_SPEC_KEYS = ('name', 'from', 'to', 'jobType', 'filters', 'by', 'period')
+EXPORT_OUTPUT = 'outputs/kpis.csv'
+
+# JS benchmarks (bench subcommand): bench/harness.js runs the assembled
+# template JS in Node against synthetic datasets of these sizes
+BENCH_HARNESS = 'bench/harness.js'
+BENCH_ROWS = (100_000, 1_000_000, 5_000_000)
+BENCH_OUTPUT = 'outputs/js_bench.json'
+
+# Output targets: "single" inlines everything into one HTML file (SharePoint);
+# "split" writes content-hashed assets plus a small page (GitHub Pages)
+TARGETS = ("single", "split")
+
+# Cache headers for hosts that read a _headers file (Netlify, Cloudflare Pages).
+# Hashed assets never change under the same name; the page must revalidate.
+SITE_HEADERS = f"""/{ASSETS_DIR}/*
+  Cache-Control: public, max-age=31536000, immutable
+
+/index.html
+  Cache-Control: no-cache
+"""
+
+# Libraries: file in lib/ -> (label, CDN script tag in head.html)
+LIBRARIES = {
+    'chart.min.js': ('Chart.js', '<script src="https://cdn.jsdelivr.net/npm/chart.js"></script>'),
+    'papaparse.min.js': ('PapaParse', '<script src="https://cdnjs.cloudflare.com/ajax/libs/PapaParse/5.4.1/papaparse.min.js"></script>'),
+    'xlsx.full.min.js': ('SheetJS XLSX', '<script src="https://cdnjs.cloudflare.com/ajax/libs/xlsx/0.18.5/xlsx.full.min.js"></script>'),
+}
 
 # CSS files in load order
 CSS_ORDER = [
@@ -58,43 +164,37 @@ HTML_ORDER = [
 
 # JS files in load order
 JS_ORDER = [
-    'config', 'state', 'utils', 'crypto', 'filters', 'kpi',
-    'charts/monthly-trend', 'charts/explorer',
+    'config', 'dataset', 'state', 'utils', 'crypto', 'dataset-cache', 'shards', 'filters', 'kpi',
+    'charts/chart-manager', 'charts/monthly-trend', 'charts/explorer',
     'drillthrough', 'multiselect', 'comparison',
     'modal-base', 'modal-chart', 'modal-kpi', 'modal-import',
     'init'
 ]
 
-
-def categorize_cost_type(cost_type: str) -> str:
-    """Map cost type code to high-level category."""
-    if cost_type is None or not cost_type:
-        return 'Other'
-
-    # Extract numeric code from "611000 - Regular Time" format
-    code = str(cost_type).split(' - ')[0].strip()
-
-    if code.startswith('61'):
-        return 'Labor Costs'
-    elif code.startswith('62'):
-        return 'Travel & Per Diem'
-    elif code.startswith('64'):
-        return 'Fleet & Materials'
-    elif code.startswith('65'):
-        return 'Facilities & Services'
-    elif code.startswith('67'):
-        return 'Equipment Costs'
-    elif code.startswith('693'):
-        return 'Allocation Credits'
-    elif code.startswith('69'):
-        return 'Other Allocations'
-    elif code.startswith('71') or code.startswith('72'):
-        return 'Corporate Overhead'
-    elif code.startswith('73') or code.startswith('74') or code.startswith('75'):
-        return 'G&A & Other'
-    else:
-        return 'Other'
-
+# Runtime instrumentation (--instrument): perf.js goes in just before init.js,
+# which wires up the functions it wraps; its build ID replaces PERF_PLACEHOLDER
+INSTRUMENT_CSS = 'perf'
+INSTRUMENT_JS = 'perf'
+PERF_PLACEHOLDER = "'<!-- PERF_CONFIG -->'"
+
+
+# Cost type category rules: first rule whose prefix matches the numeric code
+# ("611000" from "611000 - Regular Time") wins. Prefixes are at most
+# RULE_PREFIX_DIGITS long so every rule compiles into one 0-999 table.
+COST_CATEGORY_RULES = [
+    (('61',), 'Labor Costs'),
+    (('62',), 'Travel & Per Diem'),
+    (('64',), 'Fleet & Materials'),
+    (('65',), 'Facilities & Services'),
+    (('67',), 'Equipment Costs'),
+    (('693',), 'Allocation Credits'),
+    (('69',), 'Other Allocations'),
+    (('71', '72'), 'Corporate Overhead'),
+    (('73', '74', '75'), 'G&A & Other'),
+]
+DEFAULT_CATEGORY = 'Other'
+ALLOCATION_PREFIX = '693'
+RULE_PREFIX_DIGITS = 3
 
 # Department mapping based on last 3 digits of Job number
 DEPARTMENT_MAP = {
@@ -143,27 +243,125 @@ DEPARTMENT_CATEGORY_MAP = {
     '760': 'Tools',
     '590': 'Other', '770': 'Other', '850': 'Other', '860': 'Other',
 }
+DEFAULT_DEPT_CATEGORY = 'Other'
+UNKNOWN_DEPARTMENT = 'Unknown'
+
+# Replaced in config.js with the compiled tables
+RULES_PLACEHOLDER = "'<!-- DERIVATION_RULES -->'"
+
+# Chart size thresholds, injected into config.js as CHART_LIMITS:
+#   maxPoints      time-axis points before consecutive months are bucketed
+#   maxSeries      stacked series before the smallest fold into "Other"
+#   maxCategories  category-axis bars before the smallest fold into "Other"
+CHART_LIMITS = {'maxPoints': 72, 'maxSeries': 15, 'maxCategories': 50}
+CHART_LIMITS_PLACEHOLDER = "'<!-- CHART_LIMITS -->'"
+
+# Manhours: |Actual Units| of dated rows with one of these document types and
+# a cost type starting with the prefix. Injected into config.js as
+# MANHOUR_RULES and used by the export subcommand
+MANHOUR_DOC_TYPES = ('T2', 'JE')
+MANHOUR_COST_PREFIX = '511'
+MANHOUR_PLACEHOLDER = "'<!-- MANHOUR_RULES -->'"
+
+
+@lru_cache(maxsize=None)
+def compile_derivation_rules() -> dict:
+    """
+    Compile the rule tables above into dense lookup arrays.
+
+    Both the Polars transform and the browser import path derive Category,
+    Is_Allocation, Department and Dept_Category from these arrays:
+      categories      category names; id 0 is DEFAULT_CATEGORY
+      costPrefix      first three digits of the cost type code (0-999) -> category id
+      departments     department label per department id; id 0 is unmapped ('')
+      deptCategories  department category per department id
+      deptIndex       last three digits of the job number (0-999) -> department id
+    """
+    size = 10 ** RULE_PREFIX_DIGITS
+    categories = [DEFAULT_CATEGORY]
+    for _, category in COST_CATEGORY_RULES:
+        if category not in categories:
+            categories.append(category)
+
+    cost_prefix = []
+    for n in range(size):
+        code = str(n).zfill(RULE_PREFIX_DIGITS)
+        match = next((c for prefixes, c in COST_CATEGORY_RULES if code.startswith(prefixes)), DEFAULT_CATEGORY)
+        cost_prefix.append(categories.index(match))
+
+    codes = sorted(set(DEPARTMENT_MAP) | set(DEPARTMENT_CATEGORY_MAP))
+    departments = [''] + [f'{code} - {DEPARTMENT_MAP[code]}' if code in DEPARTMENT_MAP else '' for code in codes]
+    dept_categories = [DEFAULT_DEPT_CATEGORY] + [DEPARTMENT_CATEGORY_MAP.get(code, DEFAULT_DEPT_CATEGORY) for code in codes]
+    dept_index = [0] * size
+    for i, code in enumerate(codes, start=1):
+        dept_index[int(code)] = i
+
+    return {
+        'categories': categories,
+        'costPrefix': cost_prefix,
+        'allocationPrefix': ALLOCATION_PREFIX,
+        'departments': departments,
+        'deptCategories': dept_categories,
+        'deptIndex': dept_index,
+        'unknownDepartment': UNKNOWN_DEPARTMENT,
+    }
+
+
+def template_constants() -> dict:
+    """Build-time values injected into config.js, keyed by placeholder."""
+    return {
+        RULES_PLACEHOLDER: compile_derivation_rules(),
+        CHART_LIMITS_PLACEHOLDER: CHART_LIMITS,
+        MANHOUR_PLACEHOLDER: {'docTypes': list(MANHOUR_DOC_TYPES), 'costPrefix': MANHOUR_COST_PREFIX},
+    }
+
+
+def _cost_code(cost_type) -> str:
+    """Numeric code from a "611000 - Regular Time" cost type."""
+    return str(cost_type).split(' - ')[0].strip()
+
+
+def _dept_code(job_value) -> str:
+    job_str = str(int(job_value)) if isinstance(job_value, float) else str(job_value)
+    return job_str[-3:]
+
+
+def categorize_cost_type(cost_type: str) -> str:
+    """Map cost type code to high-level category."""
+    if cost_type is None or not cost_type:
+        return DEFAULT_CATEGORY
+    rules = compile_derivation_rules()
+    prefix = _cost_code(cost_type)[:RULE_PREFIX_DIGITS]
+    if len(prefix) < RULE_PREFIX_DIGITS or not prefix.isdigit():
+        return DEFAULT_CATEGORY
+    return rules['categories'][rules['costPrefix'][int(prefix)]]
+
+
+def _department_id(dept_code: str) -> int:
+    if len(dept_code) != RULE_PREFIX_DIGITS or not dept_code.isdigit():
+        return 0
+    return compile_derivation_rules()['deptIndex'][int(dept_code)]
 
 
 def get_department(job_value) -> str:
     """Extract department from job number (last 3 digits). Returns 'code - description' format."""
     if job_value is None:
-        return 'Unknown'
-    job_str = str(int(job_value)) if isinstance(job_value, float) else str(job_value)
-    dept_code = job_str[-3:]
-    dept_name = DEPARTMENT_MAP.get(dept_code)
-    if dept_name:
-        return f'{dept_code} - {dept_name}'
-    return f'Unknown ({dept_code})'
+        return UNKNOWN_DEPARTMENT
+    dept_code = _dept_code(job_value)
+    label = compile_derivation_rules()['departments'][_department_id(dept_code)]
+    return label or f'{UNKNOWN_DEPARTMENT} ({dept_code})'
 
 
 def get_department_category(job_value) -> str:
     """Get department category from job number."""
     if job_value is None:
-        return 'Unknown'
-    job_str = str(int(job_value)) if isinstance(job_value, float) else str(job_value)
-    dept_code = job_str[-3:]
-    return DEPARTMENT_CATEGORY_MAP.get(dept_code, 'Other')
+        return UNKNOWN_DEPARTMENT
+    return compile_derivation_rules()['deptCategories'][_department_id(_dept_code(job_value))]
+
+
+def _table_lookup(index: pl.Expr, table: list, dtype=pl.Utf8) -> pl.Expr:
+    """Gather table[index] per row (null where index is null)."""
+    return pl.lit(pl.Series(table, dtype=dtype)).gather(index)
 
 
 def file_hash(path: Path) -> str:
@@ -171,7 +369,7 @@ def file_hash(path: Path) -> str:
     return hashlib.md5(path.read_bytes()).hexdigest()
 
 
-def get_cached_csv(excel_path: Path, cache_dir: Path) -> tuple[str, int] | None:
+def get_cached_csv(excel_path: Path, cache_dir: Path) -> tuple[str | list, int] | None:
     """Try to load cached CSV if Excel file hasn't changed."""
     cache_file = cache_dir / "csv_cache.pkl"
     hash_file = cache_dir / "excel_hash.txt"
@@ -190,13 +388,16 @@ def get_cached_csv(excel_path: Path, cache_dir: Path) -> tuple[str, int] | None:
     try:
         with open(cache_file, 'rb') as f:
             cached = pickle.load(f)
+        # Chunked conversions cache their part paths (in cache_dir/chunks)
+        if not isinstance(cached['csv_data'], str) and not all(Path(p).exists() for p in cached['csv_data']):
+            return None
         print(f"  Using cached CSV (Excel unchanged)")
         return cached['csv_data'], cached['record_count']
     except Exception:
         return None
 
 
-def save_csv_cache(csv_data: str, record_count: int, excel_path: Path, cache_dir: Path):
+def save_csv_cache(csv_data: str | list, record_count: int, excel_path: Path, cache_dir: Path):
     """Save processed CSV to cache."""
     cache_dir.mkdir(exist_ok=True)
 
@@ -209,97 +410,528 @@ def save_csv_cache(csv_data: str, record_count: int, excel_path: Path, cache_dir
     hash_file.write_text(file_hash(excel_path))
 
 
-def excel_to_csv(excel_path: Path, cache_dir: Path = None, use_cache: bool = True) -> tuple[str, int]:
+# ============================================================================
+# INPUT READERS
+# ============================================================================
+# Each reader returns the report as a LazyFrame; read_input() normalizes it
+# (clean column names, Grand Total row removed, G/L Date as a date) so the
+# rest of the pipeline is the same for every format. Parquet, Arrow IPC and
+# CSV are scanned lazily, so the INPUT_COLUMNS projection and the Grand Total
+# filter are pushed down into the scan. CSV is read as text and only
+# NUMERIC_COLUMNS (as floats, for every format) and G/L Date are typed, so
+# codes such as Cost Code '032' keep their leading zeros.
+
+def _clean_name(column: str) -> str:
+    """Remove newlines, extra spaces, normalize whitespace in a column name."""
+    return ' '.join(str(column).split())
+
+
+@lru_cache(maxsize=8)
+def _detail_sheets(path: Path, mtime_ns: int) -> tuple[tuple[str, int], ...]:
+    import fastexcel  # calamine binding behind pl.read_excel(engine='calamine')
+    reader = fastexcel.read_excel(path)
+    sheets = []
+    for name in reader.sheet_names:
+        if not INPUT_SHEET_PATTERN.match(name):
+            continue
+        sheet = reader.load_sheet(name, n_rows=1)
+        header = {_clean_name(column.name) for column in sheet.available_columns()}
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            print(f"  WARNING: skipping sheet '{name}' (missing columns: {', '.join(missing)})")
+            continue
+        sheets.append((name, sheet.total_height))
+    if not sheets:
+        raise ValueError(f"No '{INPUT_SHEET}' sheets with columns {', '.join(REQUIRED_COLUMNS)} in {path.name}")
+    return tuple(sheets)
+
+
+def detail_sheets(path: Path) -> list[tuple[str, int]]:
     """
-    Read Excel file and convert to CSV string using Polars (optimized).
-    Returns (csv_string, record_count).
-
-    Uses calamine engine (Rust-based) for 5-10x faster Excel reading.
-    Caches results to skip processing if Excel file unchanged.
+    (sheet name, data rows) of every detail sheet in a workbook, in workbook
+    order: names matching INPUT_SHEET_PATTERN with REQUIRED_COLUMNS in the
+    header. Cached per file version.
     """
-    # Try cache first
-    if use_cache and cache_dir:
-        cached = get_cached_csv(excel_path, cache_dir)
-        if cached:
-            return cached
+    path = Path(path)
+    return list(_detail_sheets(path, path.stat().st_mtime_ns))
+
+
+def _read_xlsx(path: Path, rows: tuple[int, int] = None) -> pl.LazyFrame:
+    # Polars + calamine (Rust engine) - 5-10x faster than openpyxl.
+    # Detail sheets are read concurrently and stacked in workbook order; a
+    # row range counts across the sheets as if they were one.
+    reads, start = [], 0
+    for name, height in detail_sheets(path):
+        if rows is None:
+            reads.append((name, None))
+        else:
+            lo, hi = max(rows[0], start), min(rows[0] + rows[1], start + height)
+            if lo < hi:
+                reads.append((name, {'skip_rows': lo - start, 'n_rows': hi - lo}))
+        start += height
+    if not reads:
+        reads.append((detail_sheets(path)[0][0], {'n_rows': 0}))
 
-    print(f"Reading Excel file: {excel_path.name}")
+    def read_sheet(read):
+        name, read_options = read
+        df = pl.read_excel(path, sheet_name=name, engine='calamine', read_options=read_options)
+        return df.rename({col: _clean_name(col) for col in df.columns})
 
-    # Read with Polars + calamine (Rust engine) - 5-10x faster than openpyxl
-    df = pl.read_excel(excel_path, sheet_name='Cost Code Detail Report', engine='calamine')
+    with ThreadPoolExecutor(max_workers=len(reads)) as executor:
+        frames = list(executor.map(read_sheet, reads))
+    if rows is None:
+        for (name, _), df in zip(reads, frames):
+            print(f"  Sheet '{name}': {len(df):,} rows")
+    return pl.concat(frames, how='diagonal_relaxed').lazy()
 
-    # Clean column names (remove newlines, extra spaces, normalize whitespace)
-    df = df.rename({col: ' '.join(col.split()) for col in df.columns})
 
-    print(f"  Original columns: {df.columns}")
-    print(f"  Original record count: {len(df):,}")
+def _sliced(lf: pl.LazyFrame, rows: tuple[int, int] = None) -> pl.LazyFrame:
+    return lf.slice(*rows) if rows else lf
 
-    # Filter out Grand Total row
-    if 'Document Type' in df.columns:
-        df = df.filter(pl.col('Document Type') != 'Grand Total')
-        print(f"  After removing Grand Total: {len(df):,}")
 
-    # Add derived columns using vectorized Polars expressions (much faster than apply)
-    cost_type_code = pl.col('Cost Type').cast(pl.Utf8).str.split(' - ').list.first().str.strip_chars()
+def _read_csv(path: Path, rows: tuple[int, int] = None) -> pl.LazyFrame:
+    return _sliced(pl.scan_csv(path, infer_schema=False), rows)
+
 
-    # Vectorized category assignment
-    category_expr = (
-        pl.when(cost_type_code.str.starts_with('61')).then(pl.lit('Labor Costs'))
-          .when(cost_type_code.str.starts_with('62')).then(pl.lit('Travel & Per Diem'))
-          .when(cost_type_code.str.starts_with('64')).then(pl.lit('Fleet & Materials'))
-          .when(cost_type_code.str.starts_with('65')).then(pl.lit('Facilities & Services'))
-          .when(cost_type_code.str.starts_with('67')).then(pl.lit('Equipment Costs'))
-          .when(cost_type_code.str.starts_with('693')).then(pl.lit('Allocation Credits'))
-          .when(cost_type_code.str.starts_with('69')).then(pl.lit('Other Allocations'))
-          .when(cost_type_code.str.starts_with('71') | cost_type_code.str.starts_with('72')).then(pl.lit('Corporate Overhead'))
-          .when(cost_type_code.str.starts_with('73') | cost_type_code.str.starts_with('74') | cost_type_code.str.starts_with('75')).then(pl.lit('G&A & Other'))
-          .otherwise(pl.lit('Other'))
-          .alias('Category')
+def _read_parquet(path: Path, rows: tuple[int, int] = None) -> pl.LazyFrame:
+    return _sliced(pl.scan_parquet(path), rows)
+
+
+def _read_ipc(path: Path, rows: tuple[int, int] = None) -> pl.LazyFrame:
+    return _sliced(pl.scan_ipc(path), rows)
+
+
+# File extension -> reader; find_excel_file() prefers them in this order
+INPUT_READERS = {
+    '.xlsx': _read_xlsx,
+    '.parquet': _read_parquet,
+    '.arrow': _read_ipc,
+    '.feather': _read_ipc,
+    '.ipc': _read_ipc,
+    '.csv': _read_csv,
+}
+
+
+def _input_reader(path: Path):
+    reader = INPUT_READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"Unsupported input format: {path.name} (expected {', '.join(INPUT_READERS)})")
+    return reader
+
+
+def read_input(path: Path, rows: tuple[int, int] = None, columns: tuple = INPUT_COLUMNS) -> pl.LazyFrame:
+    """
+    Normalized report frame for any supported input file.
+
+    rows is an optional (offset, length) range of data rows (header
+    excluded), as used by the chunked conversion. columns are kept (in
+    input order) when present; None keeps every column (profile).
+    """
+    path = Path(path)
+    lf = _input_reader(path)(path, rows)
+
+    # Clean column names (remove newlines, extra spaces, normalize whitespace)
+    schema = lf.collect_schema()
+    lf = lf.rename({col: _clean_name(col) for col in schema.names()})
+    schema = {_clean_name(col): dtype for col, dtype in schema.items()}
+    if columns is not None:
+        schema = {col: dtype for col, dtype in schema.items() if col in columns}
+        lf = lf.select(list(schema))
+
+    # Filter out Grand Total row
+    if 'Document Type' in schema:
+        lf = lf.filter(pl.col('Document Type').cast(pl.Utf8) != 'Grand Total')
+
+    # Amounts are floats whatever the source typed them as (CSV: text, with
+    # any currency formatting; calamine: i64 when a sheet holds whole numbers)
+    lf = lf.with_columns(
+        (pl.col(col).str.replace_all(r'[$,]', '') if schema[col] == pl.Utf8 else pl.col(col))
+        .cast(pl.Float64, strict=False)
+        for col in NUMERIC_COLUMNS if col in schema and schema[col] != pl.Float64
     )
 
-    # Vectorized Is_Allocation
-    is_allocation_expr = cost_type_code.str.starts_with('693').alias('Is_Allocation')
+    # CSV exports carry G/L Date as text
+    if schema.get('G/L Date') == pl.Utf8:
+        lf = lf.with_columns(pl.col('G/L Date').str.slice(0, 10).str.to_date(strict=False))
+    return lf
+
+
+def derive_columns(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Add Category, Is_Allocation, Department and Dept_Category and format G/L Date."""
+    # Derived columns with O(1) lookups into the compiled rule tables
+    rules = compile_derivation_rules()
+    cost_type_code = pl.col('Cost Type').cast(pl.Utf8).str.split(' - ').list.first().str.strip_chars()
+    cost_prefix = cost_type_code.str.extract(rf'^(\d{{{RULE_PREFIX_DIGITS}}})', 1).cast(pl.Int32)
+
+    category_labels = [rules['categories'][c] for c in rules['costPrefix']]
+    category_expr = _table_lookup(cost_prefix, category_labels).fill_null(DEFAULT_CATEGORY).alias('Category')
+    is_allocation_expr = cost_type_code.str.starts_with(ALLOCATION_PREFIX).alias('Is_Allocation')
 
-    # Vectorized Department extraction (last 3 digits of Job)
+    # Department from the last 3 digits of Job
     job_str = pl.col('Job').cast(pl.Utf8).str.replace_all(r'\.0$', '')
-    dept_code = job_str.str.slice(-3)
+    dept_code = job_str.str.slice(-RULE_PREFIX_DIGITS)
+    dept_id = dept_code.str.extract(rf'^(\d{{{RULE_PREFIX_DIGITS}}})$', 1).cast(pl.Int32).fill_null(0)
+    dept_ids = _table_lookup(dept_id, rules['deptIndex'], pl.Int32)
 
-    # Build department mapping expression
-    dept_expr = dept_code
-    for code, name in DEPARTMENT_MAP.items():
-        dept_expr = pl.when(dept_code == code).then(pl.lit(f'{code} - {name}')).otherwise(dept_expr)
-    dept_expr = pl.when(pl.col('Job').is_null()).then(pl.lit('Unknown')).otherwise(
-        pl.when(dept_expr == dept_code).then(pl.concat_str([pl.lit('Unknown ('), dept_code, pl.lit(')')])).otherwise(dept_expr)
-    ).alias('Department')
+    department = _table_lookup(dept_ids, rules['departments'])
+    dept_expr = pl.when(pl.col('Job').is_null()).then(pl.lit(UNKNOWN_DEPARTMENT)).when(department == '').then(
+        pl.concat_str([pl.lit(f'{UNKNOWN_DEPARTMENT} ('), dept_code, pl.lit(')')])
+    ).otherwise(department).alias('Department')
 
-    # Build dept_category mapping expression
-    dept_cat_expr = pl.lit('Other')
-    for code, cat in DEPARTMENT_CATEGORY_MAP.items():
-        dept_cat_expr = pl.when(dept_code == code).then(pl.lit(cat)).otherwise(dept_cat_expr)
-    dept_cat_expr = pl.when(pl.col('Job').is_null()).then(pl.lit('Unknown')).otherwise(dept_cat_expr).alias('Dept_Category')
+    dept_cat_expr = pl.when(pl.col('Job').is_null()).then(pl.lit(UNKNOWN_DEPARTMENT)).otherwise(
+        _table_lookup(dept_ids, rules['deptCategories'])
+    ).alias('Dept_Category')
 
-    df = df.with_columns([category_expr, is_allocation_expr, dept_expr, dept_cat_expr])
+    lf = lf.with_columns([category_expr, is_allocation_expr, dept_expr, dept_cat_expr])
 
     # Format G/L Date
-    if 'G/L Date' in df.columns:
-        df = df.with_columns(
+    if 'G/L Date' in lf.collect_schema():
+        lf = lf.with_columns(
             pl.col('G/L Date').cast(pl.Date).dt.strftime('%Y-%m-%d').alias('G/L Date')
         )
+    return lf
+
 
-    print(f"  Added Department column with {df['Department'].n_unique()} unique departments")
+def count_input_rows(path: Path) -> int:
+    """Data rows in the input (header excluded, Grand Total included)."""
+    path = Path(path)
+    if path.suffix.lower() == '.xlsx':
+        return sum(height for _, height in detail_sheets(path))
+    return _input_reader(path)(path).select(pl.len()).collect().item()
+
+
+def _convert_chunk(path: Path, rows: tuple[int, int], part_path: Path) -> tuple[int, dict, list]:
+    """
+    Worker: derive one row range of the input and write it as a CSV part
+    (with the header). Returns the record count, Dept_Category counts and
+    distinct departments for the build log.
+    """
+    df = derive_columns(read_input(path, rows)).collect()
+    with open(part_path, 'wb') as f:
+        df.write_csv(f)
     dept_cat_counts = df['Dept_Category'].value_counts()
-    print(f"  Department categories: {dict(zip(dept_cat_counts['Dept_Category'].to_list(), dept_cat_counts['count'].to_list()))}")
+    return (len(df), dict(zip(dept_cat_counts['Dept_Category'].to_list(), dept_cat_counts['count'].to_list())),
+            df['Department'].unique().to_list())
+
 
-    # Convert to CSV
-    csv_string = df.write_csv()
-    record_count = len(df)
+def convert_chunked(excel_path: Path, parts_dir: Path, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                    workers: int = None) -> tuple[list, int]:
+    """
+    Convert a Parquet/Arrow/CSV input in row ranges of chunk_rows on a
+    process pool. Returns (part paths in row order, record_count).
+
+    Each worker slices its range from a lazy scan and writes it to
+    parts_dir as a CSV part, so peak memory of the conversion scales with
+    chunk_rows x workers rather than the report. The parts are not joined:
+    encode_columnar() reads them one at a time. .xlsx inputs cannot be
+    sliced (calamine parses the whole sheet) and are not chunked.
+    """
+    total = count_input_rows(excel_path)
+    ranges = [(offset, min(chunk_rows, total - offset)) for offset in range(0, total, chunk_rows)] or [(0, 0)]
+    workers = min(workers or os.cpu_count() or 1, len(ranges))
+    print(f"  {total:,} rows in {len(ranges)} chunk(s) of {chunk_rows:,} on {workers} worker(s)")
+
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    parts_dir.mkdir(parents=True)
+    parts = [parts_dir / f'part-{i:05d}.csv' for i in range(len(ranges))]
+    # spawn: forking a process that already runs Polars' thread pool can deadlock
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        results = list(pool.map(_convert_chunk, [excel_path] * len(ranges), ranges, parts))
+
+    record_count = sum(r[0] for r in results)
+    dept_cat_counts, departments = {}, set()
+    for _, counts, depts in results:
+        for name, n in counts.items():
+            dept_cat_counts[name] = dept_cat_counts.get(name, 0) + n
+        departments.update(depts)
+    print(f"  Record count (Grand Total removed): {record_count:,}")
+    print(f"  Added Department column with {len(departments)} unique departments")
+    print(f"  Department categories: {dept_cat_counts}")
+    return parts, record_count
+
+
+def excel_to_csv(excel_path: Path, cache_dir: Path = None, use_cache: bool = True,
+                 chunk_rows: int = None, workers: int = None) -> tuple[str | list, int]:
+    """
+    Read the input report (any INPUT_READERS format) and convert it to CSV
+    using Polars. Returns (csv_data, record_count): a CSV string, or with
+    chunk_rows the list of CSV part paths from convert_chunked() (kept in
+    cache_dir, or a temp directory removed at exit). Every consumer of the
+    converted data takes either form.
+
+    Derivations run on the lazy frame from read_input() and are collected
+    once, or per row range on worker processes when chunk_rows is given.
+    Caches results to skip processing if the input file is unchanged.
+    """
+    # Try cache first
+    if use_cache and cache_dir:
+        cached = get_cached_csv(excel_path, cache_dir)
+        if cached:
+            return cached
+
+    print(f"Reading input file: {excel_path.name}")
+    if chunk_rows and excel_path.suffix.lower() == '.xlsx':
+        print("  .xlsx cannot be read in row ranges; converting in one pass "
+              "(export the report as Parquet to bound memory)")
+        chunk_rows = None
+    if chunk_rows:
+        if cache_dir:
+            parts_dir = cache_dir / 'chunks'
+        else:
+            parts_dir = Path(tempfile.mkdtemp(prefix='ga_chunks_'))
+            atexit.register(shutil.rmtree, parts_dir, True)
+        csv_data, record_count = convert_chunked(excel_path, parts_dir, chunk_rows, workers)
+    else:
+        lf = read_input(excel_path)
+        print(f"  Columns: {lf.collect_schema().names()}")
+
+        df = derive_columns(lf).collect()
+        print(f"  Record count (Grand Total removed): {len(df):,}")
+
+        print(f"  Added Department column with {df['Department'].n_unique()} unique departments")
+        dept_cat_counts = df['Dept_Category'].value_counts()
+        print(f"  Department categories: {dict(zip(dept_cat_counts['Dept_Category'].to_list(), dept_cat_counts['count'].to_list()))}")
+
+        # Convert to CSV
+        csv_data = df.write_csv()
+        record_count = len(df)
 
     # Save to cache
     if cache_dir:
-        save_csv_cache(csv_string, record_count, excel_path, cache_dir)
+        save_csv_cache(csv_data, record_count, excel_path, cache_dir)
         print(f"  Cached CSV for future builds")
 
-    return csv_string, record_count
+    return csv_data, record_count
+
+
+def csv_size(csv_data: str | list) -> int:
+    """Size of converted CSV data (a string or excel_to_csv() parts), for the build log."""
+    if isinstance(csv_data, str):
+        return len(csv_data)
+    return sum(Path(part).stat().st_size for part in csv_data)
+
+
+def _typed_bytes(typecode: str, values) -> bytes:
+    """Pack values as a little-endian typed array."""
+    arr = array(typecode, values)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def aggregate_cube(encoded: dict, is_alloc: pl.Series) -> pl.DataFrame | None:
+    """
+    Month x CUBE_DIMENSIONS totals: gross (non-allocation) and alloc amounts
+    plus the row count per cell. Dimensions are the dictionary codes already
+    written for the row columns, months are yyyymm (0 = no date).
+    """
+    if any(name not in encoded for name in (DATE_COLUMN, 'Actual Amount', *CUBE_DIMENSIONS)):
+        return None
+    frame = pl.DataFrame({
+        'month': encoded[DATE_COLUMN] // 100,
+        **{name: encoded[name] for name in CUBE_DIMENSIONS},
+        'amount': encoded['Actual Amount'],
+        'is_alloc': is_alloc,
+    })
+    return frame.group_by(['month', *CUBE_DIMENSIONS]).agg(
+        pl.col('amount').filter(~pl.col('is_alloc')).sum().alias('gross'),
+        pl.col('amount').filter(pl.col('is_alloc')).sum().alias('alloc'),
+        pl.len().alias('rows'),
+    ).sort(['month', *CUBE_DIMENSIONS])
+
+
+def _code_counts(codes: pl.Series, size: int) -> list:
+    """Rows per dictionary code, aligned with the dictionary (0 for unused codes)."""
+    counts = [0] * size
+    for code, n in codes.value_counts().iter_rows():
+        counts[code] = n
+    return counts
+
+
+def _empty_string_frame() -> pl.DataFrame:
+    """The all-text frame of converted data with no parts: INPUT_COLUMNS, no rows."""
+    return pl.DataFrame(schema={name: pl.Utf8 for name in INPUT_COLUMNS})
+
+
+def _read_string_frame(csv_data: str | list, columns: list = None) -> pl.DataFrame:
+    """Converted CSV data (a string or excel_to_csv() parts) as an all-text frame."""
+    if isinstance(csv_data, str):
+        return pl.read_csv(csv_data.encode('utf-8'), infer_schema_length=0, columns=columns)
+    if not csv_data:
+        df = _empty_string_frame()
+        return df.select(columns) if columns is not None else df
+    lf = pl.scan_csv([str(part) for part in csv_data], infer_schema=False)
+    return (lf.select(columns) if columns is not None else lf).collect()
+
+
+def _csv_header(csv_data: str | list) -> list:
+    if isinstance(csv_data, str):
+        return pl.read_csv(csv_data.encode('utf-8'), n_rows=0).columns
+    if not csv_data:
+        return _empty_string_frame().columns
+    return pl.read_csv(csv_data[0], n_rows=0).columns
+
+
+def _encode_columns(df: pl.DataFrame, dictionaries: dict = None) -> tuple[list, list, dict]:
+    """
+    Column descriptors, typed-array buffers and encoded values per column of
+    a string frame. With dictionaries ({column: values} from the descriptors
+    of a larger frame) the codes index those shared lists and the
+    descriptors carry no values or counts.
+    """
+    columns, buffers, encoded = [], [], {}
+    for name in df.columns:
+        col = df[name]
+        if name in NUMERIC_COLUMNS:
+            values = col.str.replace_all(r'[$,]', '').cast(pl.Float64, strict=False).fill_null(0)
+            columns.append({'name': name, 'kind': 'numeric', 'type': 'f64'})
+            buffers.append(_typed_bytes('d', values.to_list()))
+        elif name == DATE_COLUMN:
+            values = col.str.slice(0, 10).str.replace_all('-', '').cast(pl.Int32, strict=False).fill_null(0)
+            columns.append({'name': name, 'kind': 'date', 'type': 'i32'})
+            buffers.append(_typed_bytes('i', values.to_list()))
+        else:
+            col = col.fill_null('')
+            dictionary = dictionaries[name] if dictionaries else sorted(set(col.unique().to_list()) | {''})
+            values = col.cast(pl.Enum(dictionary)).to_physical()
+            wide = len(dictionary) > 65536
+            column = {'name': name, 'kind': 'dict', 'type': 'u32' if wide else 'u16'}
+            if not dictionaries:
+                column.update(values=dictionary, counts=_code_counts(values, len(dictionary)))
+            columns.append(column)
+            buffers.append(_typed_bytes('I' if wide else 'H', values.to_list()))
+        encoded[name] = values
+    return columns, buffers, encoded
+
+
+def _allocation_rows(df: pl.DataFrame) -> pl.Series:
+    """True for the allocation (ALLOCATION_PREFIX Cost Type) rows of a string frame."""
+    if 'Cost Type' not in df.columns:
+        return pl.Series([False] * len(df))
+    return df['Cost Type'].fill_null('').str.starts_with(ALLOCATION_PREFIX)
+
+
+def _cube_section(cube: pl.DataFrame | None, columns: list) -> tuple[dict, list] | None:
+    """Header 'cube' section and its (descriptor, buffer) pairs, or None without the cube columns."""
+    if cube is None:
+        return None
+    dim_types = {c['name']: c['type'] for c in columns}
+    cube_columns = [('month', 'i32', 'i')]
+    cube_columns += [(name, dim_types[name], 'I' if dim_types[name] == 'u32' else 'H') for name in CUBE_DIMENSIONS]
+    cube_columns += [('gross', 'f64', 'd'), ('alloc', 'f64', 'd'), ('rows', 'u32', 'I')]
+    section, laid_out = {'length': len(cube), 'columns': []}, []
+    for name, type_name, typecode in cube_columns:
+        column = {'name': name, 'type': type_name}
+        section['columns'].append(column)
+        laid_out.append((column, _typed_bytes(typecode, cube[name].to_list())))
+    return section, laid_out
+
+
+def _lay_out(header: dict, laid_out: list) -> bytes:
+    """uint32 header length, JSON header, then each buffer 8-byte aligned at its descriptor's offset."""
+    # Header offsets depend on the header size, so lay out until stable
+    data_start = 0
+    while True:
+        offset = data_start
+        for column, buf in laid_out:
+            column['offset'] = offset
+            offset += (len(buf) + 7) // 8 * 8
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        start = (4 + len(header_bytes) + 7) // 8 * 8
+        if start == data_start:
+            break
+        data_start = start
+
+    out = bytearray(struct.pack('<I', len(header_bytes)) + header_bytes)
+    for column, buf in laid_out:
+        out.extend(b'\0' * (column['offset'] - len(out)))
+        out.extend(buf)
+    return bytes(out)
+
+
+def encode_columnar(csv_data: str | list) -> bytes:
+    """
+    Encode the converted CSV as the columnar binary the dashboard loads.
+
+    Layout: uint32 header length, JSON header, then one 8-byte aligned
+    little-endian typed array per column:
+      NUMERIC_COLUMNS -> f64 values (blank/non-numeric = 0)
+      DATE_COLUMN     -> i32 yyyymmdd keys (0 = no date)
+      all others      -> u16 dictionary codes (u32 past 65,536 values) into
+                         a sorted values list stored in the header; '' is code 0.
+                         The header also carries per-value row counts, so the
+                         filter dropdowns are built from the catalog alone.
+    The header's 'cube' section describes the aggregate_cube() columns, laid
+    out after the row columns the same way.
+
+    csv_data is a CSV string or the CSV parts of a chunked conversion,
+    which are encoded a part at a time (encode_parts).
+    """
+    if not isinstance(csv_data, str):
+        return encode_parts(csv_data)
+    return encode_frame(_read_string_frame(csv_data))
+
+
+def encode_parts(parts: list) -> bytes:
+    """
+    encode_columnar() for CSV parts, holding one part at a time: a first
+    pass collects the dictionaries and their row counts, a second encodes
+    each part against them onto the column buffers and merges its cube
+    cells. Peak memory is one part plus the encoded output.
+    """
+    if not parts:
+        return encode_frame(_empty_string_frame())
+    counts = {}
+    for part in parts:
+        df = pl.read_csv(part, infer_schema_length=0)
+        for name in df.columns:
+            if name not in NUMERIC_COLUMNS and name != DATE_COLUMN:
+                column_counts = counts.setdefault(name, {'': 0})
+                for value, n in df[name].fill_null('').value_counts().iter_rows():
+                    column_counts[value] = column_counts.get(value, 0) + n
+    dictionaries = {name: sorted(column_counts) for name, column_counts in counts.items()}
+
+    length, buffers, cubes = 0, None, []
+    for part in parts:
+        df = pl.read_csv(part, infer_schema_length=0)
+        columns, part_buffers, encoded = _encode_columns(df, dictionaries)
+        buffers = buffers or [bytearray() for _ in part_buffers]
+        for buf, part_buf in zip(buffers, part_buffers):
+            buf.extend(part_buf)
+        cube = aggregate_cube(encoded, _allocation_rows(df))
+        if cube is not None:
+            cubes.append(cube)
+        length += len(df)
+    for column in columns:
+        if column['kind'] == 'dict':
+            dictionary = dictionaries[column['name']]
+            column.update(values=dictionary, counts=[counts[column['name']][value] for value in dictionary])
+
+    header = {'format': COLUMNAR_FORMAT, 'v': 1, 'length': length, 'columns': columns}
+    laid_out = list(zip(columns, buffers))
+    if cubes:
+        keys = ['month', *CUBE_DIMENSIONS]
+        cube = pl.concat(cubes).group_by(keys).agg(pl.col('gross', 'alloc', 'rows').sum()).sort(keys)
+        header['cube'], cube_laid_out = _cube_section(cube, columns)
+        laid_out += cube_laid_out
+    return _lay_out(header, laid_out)
+
+
+def encode_frame(df: pl.DataFrame, dictionaries: dict = None) -> bytes:
+    """
+    encode_columnar() for a string frame. With shared dictionaries (sharded
+    output) the dictionary columns carry codes only and no cube is added;
+    the shard manifest holds both.
+    """
+    columns, buffers, encoded = _encode_columns(df, dictionaries)
+    header = {'format': COLUMNAR_FORMAT, 'v': 1, 'length': len(df), 'columns': columns}
+    laid_out = list(zip(columns, buffers))
+    if not dictionaries:
+        cube = _cube_section(aggregate_cube(encoded, _allocation_rows(df)), columns)
+        if cube is not None:
+            header['cube'], cube_laid_out = cube
+            laid_out += cube_laid_out
+    return _lay_out(header, laid_out)
 
 
 def encrypt_csv_data(csv_data: str, password: str) -> dict:
@@ -307,37 +939,558 @@ def encrypt_csv_data(csv_data: str, password: str) -> dict:
     Encrypt CSV data using AES-256-GCM with PBKDF2 key derivation.
     Returns encrypted payload as dictionary.
     """
-    # Generate random salt and IV
-    salt = secrets.token_bytes(SALT_LENGTH)
-    iv = secrets.token_bytes(IV_LENGTH)
+    return encrypt_bytes(csv_data.encode('utf-8'), password)
+
 
-    # Derive key using PBKDF2
+def derive_key(password: str, salt: bytes) -> bytes:
+    """PBKDF2-SHA256 key for password and salt."""
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=KEY_LENGTH,
         salt=salt,
         iterations=PBKDF2_ITERATIONS,
     )
-    key = kdf.derive(password.encode('utf-8'))
+    return kdf.derive(password.encode('utf-8'))
+
+
+def key_envelope(passwords: list, data_key: bytes = None) -> tuple[bytes, dict]:
+    """
+    A data key (random unless given) and the payload fields that unlock it:
+    the PBKDF2 parameters and one key slot per password, the data key
+    wrapped under that password's PBKDF2 key. Each slot costs one PBKDF2,
+    whatever the size of the data.
+    """
+    data_key = data_key or secrets.token_bytes(KEY_LENGTH)
+    salt = secrets.token_bytes(SALT_LENGTH)
+    slots = [aes_key_wrap(derive_key(password, salt), data_key) for password in dict.fromkeys(passwords)]
+    return data_key, {
+        'kdf': 'PBKDF2-SHA256',
+        'iter': PBKDF2_ITERATIONS,
+        'salt': base64.b64encode(salt).decode('ascii'),
+        'wrap': KEY_WRAP,
+        'slots': [base64.b64encode(slot).decode('ascii') for slot in slots],
+    }
+
+
+def unwrap_data_key(payload: dict, password: str) -> bytes:
+    """The data key of a key-slot payload, from the slot password opens."""
+    if 'slots' not in payload:
+        raise ValueError("The payload has no key slots (built before they were added); rebuild it")
+    kek = derive_key(password, base64.b64decode(payload['salt']))
+    for slot in payload['slots']:
+        try:
+            return aes_key_unwrap(kek, base64.b64decode(slot))
+        except InvalidUnwrap:
+            continue
+    raise ValueError("The password opens none of the payload's key slots")
+
+
+def rekey_payload(payload: dict, password: str, passwords: list) -> dict:
+    """
+    payload with its key slots replaced by slots for passwords (fresh salt).
+    password must open one of the current slots. The ciphertext, and so
+    the payload hash, are unchanged.
+    """
+    _, envelope = key_envelope(passwords, unwrap_data_key(payload, password))
+    return {**payload, **envelope}
+
+
+def encrypt_bytes(data: bytes, password: str) -> dict:
+    """Encrypt raw bytes into the payload format shared by the dashboard and data packs."""
+    return encrypt_with_key(data, *key_envelope([password]))
+
+
+def encrypt_with_key(data: bytes, key: bytes, envelope: dict, segment_bytes: int = None) -> dict:
+    """
+    Payload for data encrypted under a data key, with the key slots of
+    envelope (key_envelope()). With segment_bytes the ciphertext is stored
+    as a v2 payload: 'segments' of that many bytes each, base64-encoded,
+    plus 'segmentBytes' and 'ctLength' so the browser can decode them in
+    place.
+    """
+    iv = secrets.token_bytes(IV_LENGTH)
 
     # Encrypt data using AES-GCM
     aesgcm = AESGCM(key)
-    ciphertext = aesgcm.encrypt(iv, csv_data.encode('utf-8'), None)
+    ciphertext = aesgcm.encrypt(iv, data, None)
 
     # Build payload
     payload = {
         'v': 1,
         'alg': 'AES-256-GCM',
-        'kdf': 'PBKDF2-SHA256',
-        'iter': PBKDF2_ITERATIONS,
-        'salt': base64.b64encode(salt).decode('ascii'),
+        **envelope,
         'iv': base64.b64encode(iv).decode('ascii'),
-        'ct': base64.b64encode(ciphertext).decode('ascii'),
     }
+    if segment_bytes:
+        payload.update({
+            'v': 2,
+            'segmentBytes': segment_bytes,
+            'ctLength': len(ciphertext),
+            'segments': [base64.b64encode(ciphertext[i:i + segment_bytes]).decode('ascii')
+                         for i in range(0, len(ciphertext), segment_bytes)],
+        })
+    else:
+        payload['ct'] = base64.b64encode(ciphertext).decode('ascii')
 
     return payload
 
 
+def embedded_payload(data: bytes, key: bytes, envelope: dict, embed: str = 'base64') -> dict:
+    """
+    The page's encrypted payload in the given EMBED_MODES encoding, hash
+    stamped. For 'segments', data must already be gzip-compressed.
+    """
+    if embed == 'segments':
+        payload = encrypt_with_key(data, key, envelope, EMBED_SEGMENT_BYTES)
+        payload['compression'] = 'gzip'
+    else:
+        payload = encrypt_with_key(data, key, envelope)
+    return stamp_payload_hash(payload)
+
+
+def payload_ciphertext(payload: dict) -> bytes:
+    """Ciphertext bytes of a v1 ('ct') or v2 ('segments') payload."""
+    if 'segments' in payload:
+        return b''.join(base64.b64decode(segment) for segment in payload['segments'])
+    return base64.b64decode(payload['ct'])
+
+
+def stamp_payload_hash(payload: dict) -> dict:
+    """
+    Add a SHA-256 of the ciphertext as payload['hash'].
+
+    The dashboard keys its IndexedDB dataset cache on it, so every build
+    (new salt/IV, new ciphertext) invalidates the cache automatically.
+    """
+    payload['hash'] = hashlib.sha256(payload_ciphertext(payload)).hexdigest()
+    return payload
+
+
+def _add_months(year: int, month: int, n: int) -> tuple[int, int]:
+    index = year * 12 + month - 1 + n
+    return index // 12, index % 12 + 1
+
+
+def shard_bounds(fiscal_year: int, quarter: int = 0) -> tuple[int, int]:
+    """First and last yyyymmdd key of a fiscal year, or of one of its quarters (1-4)."""
+    year, month = _add_months(fiscal_year, FISCAL_YEAR_START_MONTH, -12 if FISCAL_YEAR_START_MONTH > 1 else 0)
+    if quarter:
+        year, month = _add_months(year, month, 3 * (quarter - 1))
+    end_year, end_month = _add_months(year, month, 3 if quarter else 12)
+    last = date(end_year, end_month, 1) - timedelta(days=1)
+    return year * 10000 + month * 100 + 1, last.year * 10000 + last.month * 100 + last.day
+
+
+def shard_dataset(csv_data: str | list, passwords: list, period: str = 'year',
+                  derived: tuple = None) -> tuple[dict, list]:
+    """
+    Split the converted data into one encrypted shard per fiscal year or
+    quarter (FISCAL_YEAR_START_MONTH). Rows without a G/L Date go to an
+    'undated' shard.
+
+    Returns (payload, files): payload is the encrypted manifest, embedded in
+    the page like the unsharded payload; files are (name, bytes) pairs to
+    write to the assets directory. Everything is encrypted under one data
+    key, so the browser unlocks the key slots once.
+
+    The manifest is gzip-compressed and laid out like encode_columnar(),
+    with format 'ga-shards': the header holds the dictionaries and counts
+    of all rows, the cube covers all rows (comparison periods and totals
+    need no shard), and 'shards' lists id, fiscalYear, from/to (yyyymmdd,
+    0 when undated), rows, gross, alloc and file per shard. A shard file is the
+    IV followed by the AES-GCM ciphertext of a gzip-compressed
+    encode_frame() binary coded against the manifest's dictionaries.
+
+    derived is an optional (key, envelope) pair from key_envelope(), so the
+    PBKDF2 step can run ahead of (or alongside) the encoding.
+    """
+    df = _read_string_frame(csv_data)
+    if DATE_COLUMN not in df.columns:
+        raise ValueError(f"Sharded output needs a '{DATE_COLUMN}' column")
+    columns, _, encoded = _encode_columns(df)
+    dictionaries = {c['name']: c['values'] for c in columns if c['kind'] == 'dict'}
+
+    date_col = pl.col(DATE_COLUMN)
+    year = date_col.str.slice(0, 4).cast(pl.Int32, strict=False)
+    month = date_col.str.slice(5, 2).cast(pl.Int32, strict=False)
+    fiscal_year = year + (month >= FISCAL_YEAR_START_MONTH).cast(pl.Int32) if FISCAL_YEAR_START_MONTH > 1 else year
+    quarter = (month - FISCAL_YEAR_START_MONTH + 12) % 12 // 3 + 1 if period == 'quarter' else pl.lit(0)
+    parts = df.with_columns(fiscal_year.alias('_fy'), quarter.alias('_q')).partition_by(['_fy', '_q'], as_dict=True)
+
+    key, envelope = derived or key_envelope(passwords)
+    aesgcm = AESGCM(key)
+
+    shards, files = [], []
+    # Dated shards in order, the undated one last
+    for (fy, q) in sorted(parts, key=lambda k: (k[0] is None, k[0] or 0, k[1] or 0)):
+        part = parts[(fy, q)].drop('_fy', '_q')
+        if fy is None:
+            shard_id, (start, end) = UNDATED_SHARD, (0, 0)
+        else:
+            shard_id = f'FY{fy}-Q{q}' if q else f'FY{fy}'
+            start, end = shard_bounds(fy, q)
+
+        amount = part['Actual Amount'].str.replace_all(r'[$,]', '').cast(pl.Float64, strict=False).fill_null(0)
+        is_alloc = part['Cost Type'].fill_null('').str.starts_with(ALLOCATION_PREFIX)
+
+        compressed = gzip.compress(encode_frame(part, dictionaries), compresslevel=6, mtime=0)
+        iv = secrets.token_bytes(IV_LENGTH)
+        blob = iv + aesgcm.encrypt(iv, compressed, None)
+        name = f'shard-{shard_id}.{content_hash(blob)}.bin'
+        files.append((name, blob))
+        shards.append({
+            'id': shard_id, 'fiscalYear': fy, 'from': start, 'to': end, 'rows': len(part),
+            'gross': round(float(amount.filter(~is_alloc).sum()), 2),
+            'alloc': round(float(amount.filter(is_alloc).sum()), 2),
+            'file': f'{ASSETS_DIR}/{name}', 'size': len(blob),
+        })
+
+    header = {'format': SHARDS_FORMAT, 'v': 1, 'period': period, 'fiscalStart': FISCAL_YEAR_START_MONTH,
+              'length': len(df), 'columns': columns, 'shards': shards}
+    laid_out = []
+    cube = _cube_section(aggregate_cube(encoded, _allocation_rows(df)), columns)
+    if cube is not None:
+        header['cube'], laid_out = cube
+    manifest = gzip.compress(_lay_out(header, laid_out), compresslevel=6, mtime=0)
+
+    payload = encrypt_with_key(manifest, key, envelope)
+    payload.update({'format': SHARDS_FORMAT, 'compression': 'gzip'})
+    return stamp_payload_hash(payload), files
+
+
+def pack_workbook(excel_path: Path, output_path: Path = None, passwords: list = None,
+                  chunk_rows: int = None, workers: int = None) -> dict:
+    """
+    Convert a workbook into an encrypted data pack for the import modal.
+
+    The data comes from excel_to_csv(), so Category, Department etc. are
+    already derived; it is encoded columnar (encode_columnar) and
+    gzip-compressed before encryption. The browser only has to decrypt,
+    decompress and map typed arrays instead of unzipping and SAX-parsing
+    the workbook. passwords get a key slot each (default:
+    DASHBOARD_PASSWORD). Returns a summary dict.
+    """
+    import time
+    start_time = time.time()
+
+    excel_path = Path(excel_path)
+    output_path = Path(output_path) if output_path else excel_path.with_suffix(PACK_SUFFIX)
+
+    # The build cache holds a single workbook; don't let packs evict it
+    csv_data, record_count = excel_to_csv(excel_path, cache_dir=None, use_cache=False,
+                                          chunk_rows=chunk_rows, workers=workers)
+
+    print()
+    print("Compressing and encrypting...")
+    columnar = encode_columnar(csv_data)
+    compressed = gzip.compress(columnar, compresslevel=6, mtime=0)
+    payload = encrypt_with_key(compressed, *key_envelope(passwords or [DASHBOARD_PASSWORD]))
+    payload.update({
+        'format': PACK_FORMAT,
+        'encoding': COLUMNAR_FORMAT,
+        'compression': 'gzip',
+        'records': record_count,
+        'source': excel_path.name,
+        'created': datetime.now(ZoneInfo("America/Los_Angeles")).strftime("%m/%d/%Y %I:%M %p PT"),
+    })
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(payload), encoding='utf-8')
+
+    return {
+        'input': excel_path,
+        'output': output_path,
+        'records': record_count,
+        'raw_size': len(columnar),
+        'size': output_path.stat().st_size,
+        'elapsed': time.time() - start_time,
+    }
+
+
+def _rekey_text(text: str, password: str, passwords: list) -> tuple[str, dict]:
+    """text with the key slots of its embedded payload replaced (rekey_payload())."""
+    start = text.find(PAYLOAD_PREFIX)
+    if start < 0:
+        raise ValueError("No embedded payload found")
+    start += len(PAYLOAD_PREFIX)
+    payload, end = json.JSONDecoder().raw_decode(text, start)
+    payload = rekey_payload(payload, password, passwords)
+    return text[:start] + json.dumps(payload) + text[end:], payload
+
+
+def rekey_output(path: Path, password: str, passwords: list) -> dict:
+    """
+    Replace the key slots of a build output in place, leaving its data as
+    it is: a single-file page, a split site (directory or its index.html)
+    or a data pack. password must open one of the current slots; each of
+    passwords gets a new one. Shard files are untouched, being encrypted
+    under the data key.
+
+    Dropping a password this way stops the output unlocking with it, but
+    whoever unlocked it before may have kept the data key; a full build
+    draws a new one. Returns a summary dict.
+    """
+    import time
+    start_time = time.time()
+
+    path = Path(path)
+    if path.is_dir():
+        path = path / 'index.html'
+
+    if path.suffix == PACK_SUFFIX:
+        payload = rekey_payload(json.loads(path.read_text(encoding='utf-8')), password, passwords)
+        path.write_text(json.dumps(payload), encoding='utf-8')
+        written = path
+    else:
+        html = path.read_text(encoding='utf-8')
+        match = DATA_ASSET_PATTERN.search(html)
+        if match:
+            # Split site: the payload asset is content-hashed, so it is renamed too
+            assets_dir = path.parent / ASSETS_DIR
+            old = assets_dir / match.group(1)
+            data, payload = _rekey_text(old.read_text(encoding='utf-8'), password, passwords)
+            asset = write_hashed_asset(assets_dir, 'data', '.js', data.encode('utf-8'))
+            path.write_text(html.replace(match.group(0), f'{ASSETS_DIR}/{asset}'), encoding='utf-8')
+            if asset != old.name:
+                old.unlink()
+            written = assets_dir / asset
+        else:
+            html, payload = _rekey_text(html, password, passwords)
+            path.write_text(html, encoding='utf-8')
+            written = path
+
+    return {
+        'output': written,
+        'slots': len(payload['slots']),
+        'size': written.stat().st_size,
+        'elapsed': time.time() - start_time,
+    }
+
+
+def profile_frame(df: pl.DataFrame, top: int = PROFILE_TOP_VALUES) -> dict:
+    """
+    Profile every column of df in one select: dtype, null rate, cardinality,
+    top values, in-memory bytes and the estimated encode_columnar() bytes.
+
+    'suggest' is the payload encoding the stats point to: numeric/date/dict
+    as encode_columnar() would store it, 'drop' for empty or constant
+    columns, 'project' for near-unique text a dictionary can't shrink.
+    """
+    rows = len(df)
+    exprs = []
+    for i, name in enumerate(df.columns):
+        col = pl.col(name)
+        exprs += [
+            col.null_count().alias(f'{i}_nulls'),
+            col.n_unique().alias(f'{i}_distinct'),
+            col.drop_nulls().value_counts(sort=True, name='count').head(top).implode().alias(f'{i}_top'),
+            col.drop_nulls().cast(pl.Utf8).unique().str.len_bytes().sum().alias(f'{i}_dict_bytes'),
+        ]
+    stats = df.select(exprs).row(0, named=True) if exprs else {}
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        dtype = df.schema[name]
+        nulls = stats[f'{i}_nulls']
+        distinct = stats[f'{i}_distinct'] - (1 if nulls else 0)
+        if name in NUMERIC_COLUMNS:
+            encoding, encoded_bytes = 'numeric', 8 * rows
+        elif name == DATE_COLUMN:
+            encoding, encoded_bytes = 'date', 4 * rows
+        else:
+            encoding = 'dict'
+            encoded_bytes = (4 if distinct + 1 > 65536 else 2) * rows + (stats[f'{i}_dict_bytes'] or 0)
+        if distinct <= 1:
+            suggest = 'drop'
+        elif encoding == 'dict' and rows and distinct / rows > PROFILE_HIGH_CARDINALITY:
+            suggest = 'project'
+        else:
+            suggest = encoding
+        columns.append({
+            'name': name,
+            'dtype': str(dtype),
+            'nulls': nulls,
+            'null_rate': round(nulls / rows, 4) if rows else 0.0,
+            'distinct': distinct,
+            'top_values': [[str(t[name]), t['count']] for t in stats[f'{i}_top']],
+            'bytes': df[name].estimated_size(),
+            'encoding': encoding,
+            'encoded_bytes': encoded_bytes,
+            'suggest': suggest,
+        })
+    return {'rows': rows, 'bytes': df.estimated_size(), 'columns': columns}
+
+
+def profile_workbook(excel_path: Path, sheet: str = None, top: int = PROFILE_TOP_VALUES) -> dict:
+    """
+    Profile each sheet (or just `sheet`) of a workbook, read with Polars +
+    calamine. Other INPUT_READERS formats are profiled as a single sheet
+    named after the file.
+    """
+    excel_path = Path(excel_path)
+    if excel_path.suffix.lower() != '.xlsx':
+        return {'source': excel_path.name,
+                'sheets': {excel_path.stem: profile_frame(read_input(excel_path, columns=None).collect(), top)}}
+    if sheet:
+        frames = {sheet: pl.read_excel(excel_path, sheet_name=sheet, engine='calamine', raise_if_empty=False)}
+    else:
+        frames = pl.read_excel(excel_path, sheet_id=0, engine='calamine', raise_if_empty=False)
+
+    sheets = {}
+    for name, df in frames.items():
+        # Same header cleanup as read_input()
+        df = df.rename({col: _clean_name(col) for col in df.columns})
+        sheets[name] = profile_frame(df, top)
+    return {'source': excel_path.name, 'sheets': sheets}
+
+
+# ============================================================================
+# KPI EXPORT
+# ============================================================================
+# The KPIs of computeAllMetrics() (filters.js) computed with Polars group-bys
+# over the converted data, for monthly close packs. A spec is a dict:
+#
+#   name      label in the output (default "spec <n>")
+#   from, to  inclusive G/L Date bounds (YYYY-MM-DD); undated rows are dropped
+#             once either is set, as in the dashboard
+#   jobType   'GA', 'IN' or 'all'
+#   filters   {column: [values]}: rows whose column is one of the values
+#   by        columns to break the KPIs down by
+#   period    one row per 'month', fiscal 'quarter' or 'year' (FISCAL_YEAR_START_MONTH), or 'all'
+
+EXPORT_COLUMNS = ('Actual Amount', 'Actual Units', DATE_COLUMN, 'Cost Type', 'Document Type', 'Job Type')
+
+
+def export_frame(csv_data: str | list, columns: list = None) -> pl.LazyFrame:
+    """
+    The converted CSV (only EXPORT_COLUMNS plus `columns`, if given) with the
+    typed helper columns the KPI queries use, computed once.
+    """
+    if columns is not None:
+        wanted = set(EXPORT_COLUMNS) | set(columns)
+        columns = [c for c in _csv_header(csv_data) if c in wanted]
+    df = _read_string_frame(csv_data, columns)
+
+    def number(name):
+        if name not in df.columns:
+            return pl.lit(0.0)
+        return pl.col(name).str.replace_all(r'[$,]', '').cast(pl.Float64, strict=False).fill_null(0)
+
+    date = pl.col(DATE_COLUMN).str.to_date('%Y-%m-%d', strict=False)
+    cost_type = pl.col('Cost Type').fill_null('')
+    return df.with_columns(
+        number('Actual Amount').alias('_amount'),
+        number('Actual Units').alias('_units'),
+        date.alias('_date'),
+        cost_type.str.starts_with(ALLOCATION_PREFIX).alias('_alloc'),
+        (cost_type.str.starts_with(MANHOUR_COST_PREFIX)
+         & pl.col('Document Type').is_in(list(MANHOUR_DOC_TYPES))).alias('_manhour'),
+    ).with_columns(
+        pl.col('_date').dt.strftime('%Y-%m').alias('_month'),
+    ).lazy()
+
+
+def normalize_export_spec(spec: dict, index: int, columns: list) -> dict:
+    """Validate a spec and fill in defaults; raises ValueError naming the spec."""
+    label = spec.get('name') or f'spec {index + 1}'
+    unknown = [key for key in spec if key not in EXPORT_SPEC_KEYS]
+    if unknown:
+        raise ValueError(f"{label}: unknown key(s) {', '.join(unknown)} (expected {', '.join(EXPORT_SPEC_KEYS)})")
+    spec = {'name': label, 'from': None, 'to': None, 'jobType': 'all', 'filters': {}, 'by': [],
+            'period': 'all', **{k: v for k, v in spec.items() if v is not None}}
+    if spec['period'] not in EXPORT_PERIODS:
+        raise ValueError(f"{label}: period must be one of {', '.join(EXPORT_PERIODS)}")
+    missing = [c for c in [*spec['filters'], *spec['by']] if c not in columns]
+    if missing:
+        raise ValueError(f"{label}: no column(s) {', '.join(missing)}")
+    for bound in ('from', 'to'):
+        if spec[bound]:
+            spec[bound] = date.fromisoformat(spec[bound])
+    return spec
+
+
+def _export_period(period: str) -> pl.Expr:
+    if period == 'month':
+        return pl.col('_month')
+    if period == 'all':
+        return pl.lit('all')
+    year, month = pl.col('_date').dt.year(), pl.col('_date').dt.month()
+    fiscal_year = year + (month >= FISCAL_YEAR_START_MONTH).cast(pl.Int32) if FISCAL_YEAR_START_MONTH > 1 else year
+    label = pl.format('FY{}', fiscal_year)
+    if period == 'quarter':
+        label = pl.format('FY{}-Q{}', fiscal_year, (month - FISCAL_YEAR_START_MONTH + 12) % 12 // 3 + 1)
+    return label
+
+
+def kpi_query(frame: pl.LazyFrame, spec: dict) -> pl.LazyFrame:
+    """The KPIs of a normalized spec, one row per period and 'by' group."""
+    conditions = []
+    if spec['from']:
+        conditions.append(pl.col('_date') >= spec['from'])
+    if spec['to']:
+        conditions.append(pl.col('_date') <= spec['to'])
+    if spec['jobType'] != 'all':
+        conditions.append(pl.col('Job Type') == spec['jobType'])
+    for column, values in spec['filters'].items():
+        conditions.append(pl.col(column).is_in([str(v) for v in values]))
+    if conditions:
+        frame = frame.filter(pl.all_horizontal(conditions))
+
+    amount, alloc, job_type = pl.col('_amount'), pl.col('_alloc'), pl.col('Job Type')
+    keys = ['period', *spec['by']]
+    return frame.with_columns(
+        _export_period(spec['period']).fill_null(UNDATED_SHARD).alias('period'),
+    ).group_by(keys).agg(
+        amount.filter(~alloc).sum().alias('gross'),
+        amount.filter(alloc).sum().alias('alloc'),
+        amount.filter(job_type == 'GA').sum().alias('ga_total'),
+        amount.filter(job_type == 'IN').sum().alias('in_total'),
+        pl.col('_month').drop_nulls().n_unique().alias('months'),
+        pl.col('_units').filter(pl.col('_manhour') & pl.col('_date').is_not_null()).abs().sum().alias('manhours'),
+        (~alloc).sum().alias('gross_records'),
+        alloc.sum().alias('alloc_records'),
+    ).with_columns(
+        (pl.col('gross') + pl.col('alloc')).alias('net'),
+        pl.when(pl.col('gross') != 0).then((pl.col('alloc') / pl.col('gross') * 100).abs())
+          .otherwise(0.0).alias('recovery_pct'),
+        (pl.col('ga_total') + pl.col('in_total')).alias('_split_total'),
+    ).with_columns(
+        pl.when(pl.col('_split_total') != 0).then(pl.col('ga_total') / pl.col('_split_total') * 100)
+          .otherwise(0.0).alias('ga_pct'),
+        pl.when(pl.col('_split_total') != 0).then(pl.col('in_total') / pl.col('_split_total') * 100)
+          .otherwise(0.0).alias('in_pct'),
+        (pl.col('net') / pl.max_horizontal(pl.col('months'), 1)).alias('monthly_avg'),
+    ).select(
+        pl.lit(spec['name']).alias('spec'), *keys,
+        *[pl.col(c).round(2) for c in ('gross', 'alloc', 'net', 'recovery_pct', 'ga_total', 'in_total',
+                                       'ga_pct', 'in_pct')],
+        'months', pl.col('monthly_avg').round(2), pl.col('manhours').round(2), 'gross_records', 'alloc_records',
+    ).sort(keys)
+
+
+def export_kpis(csv_data: str | list, specs: list) -> tuple[list, list]:
+    """
+    KPIs for each spec over the converted CSV, the queries collected
+    together so Polars runs them in parallel. Returns (normalized specs,
+    result frames).
+    """
+    header = _csv_header(csv_data)
+    specs = [normalize_export_spec(spec, i, header) for i, spec in enumerate(specs)]
+    frame = export_frame(csv_data, [c for spec in specs for c in [*spec['filters'], *spec['by']]])
+    return specs, pl.collect_all([kpi_query(frame, spec) for spec in specs])
+
+
+def write_kpi_export(specs: list, results: list, output_path: Path):
+    """Write the results as one CSV (by columns unioned) or, for .json, per spec."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix.lower() == '.json':
+        report = [{**{k: (str(v) if isinstance(v, date) else v) for k, v in spec.items()},
+                   'rows': df.drop('spec').to_dicts()} for spec, df in zip(specs, results)]
+        output_path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    else:
+        pl.concat(results, how='diagonal_relaxed').write_csv(output_path)
+
+
 def read_file(path: Path) -> str:
     """Read a file and return its contents."""
     return path.read_text(encoding='utf-8')
@@ -350,26 +1503,38 @@ def read_file_safe(path: Path) -> tuple[Path, str | None]:
     return path, None
 
 
-def assemble_template(template_dir: Path) -> str:
-    """
-    Assemble HTML from modular source files using parallel I/O.
+def template_order(instrument: bool = False) -> tuple:
+    """CSS and JS module lists, with the instrumentation modules when instrument is set."""
+    if not instrument:
+        return CSS_ORDER, JS_ORDER
+    init = JS_ORDER.index('init')
+    return CSS_ORDER + [INSTRUMENT_CSS], JS_ORDER[:init] + [INSTRUMENT_JS] + JS_ORDER[init:]
 
-    Combines:
-    - CSS files from template/css/
-    - HTML partials from template/html/
-    - JS files from template/js/
 
-    Returns the complete HTML template string.
+def build_id(js_content: str) -> str:
+    """Identifier of an instrumented build: Pacific build time plus the JS bundle's hash."""
+    stamp = datetime.now(ZoneInfo("America/Los_Angeles")).strftime('%Y%m%d-%H%M')
+    return f'{stamp}-{content_hash(js_content.encode("utf-8"))[:8]}'
+
+
+def read_template_parts(template_dir: Path, instrument: bool = False) -> dict:
     """
+    Read the modular source files using parallel I/O.
+
+    Returns a dict with the concatenated 'css' and 'js', the 'head' partial,
+    and the body sections ('password', 'header', 'filters', 'kpi', 'charts',
+    'drillthrough', 'modals'). With instrument, perf.css/perf.js are
+    included and the dict also carries the 'build_id' stamped into them.
+    """
+    css_order, js_order = template_order(instrument)
     css_dir = template_dir / 'css'
     html_dir = template_dir / 'html'
     js_dir = template_dir / 'js'
 
     # Build list of all files to read
-    all_files = []
-    css_files = [(name, css_dir / f'{name}.css') for name in CSS_ORDER]
+    css_files = [(name, css_dir / f'{name}.css') for name in css_order]
     html_files = [('head', html_dir / 'head.html')] + [(name, html_dir / f'{name}.html') for name in HTML_ORDER]
-    js_files = [(name, js_dir / f'{name}.js') for name in JS_ORDER]
+    js_files = [(name, js_dir / f'{name}.js') for name in js_order]
 
     all_paths = [f[1] for f in css_files + html_files + js_files]
 
@@ -409,99 +1574,97 @@ def assemble_template(template_dir: Path) -> str:
         else:
             print(f"  WARNING: JS file not found: {path}")
     js_content = '\n\n'.join(js_parts)
+    for placeholder, value in template_constants().items():
+        js_content = js_content.replace(placeholder, json.dumps(value, separators=(',', ':')))
+    instrumented_id = None
+    if instrument:
+        instrumented_id = build_id(js_content)
+        js_content = js_content.replace(PERF_PLACEHOLDER, json.dumps({'buildId': instrumented_id}))
 
-    # 5. Assemble the password section and dashboard sections
-    password_html = body_parts[0] if body_parts else ''
-    header_html = body_parts[1] if len(body_parts) > 1 else ''
-    filters_html = body_parts[2] if len(body_parts) > 2 else ''
-    kpi_html = body_parts[3] if len(body_parts) > 3 else ''
-    charts_html = body_parts[4] if len(body_parts) > 4 else ''
-    drillthrough_html = body_parts[5] if len(body_parts) > 5 else ''
+    # 5. Split the password section and dashboard sections
+    sections = ['password', 'header', 'filters', 'kpi', 'charts', 'drillthrough']
+    parts = {name: body_parts[i] if len(body_parts) > i else '' for i, name in enumerate(sections)}
 
     # Collect all modal HTML (indices 6+)
-    modals_html = '\n\n    '.join(body_parts[6:]) if len(body_parts) > 6 else ''
+    parts['modals'] = '\n\n    '.join(body_parts[6:]) if len(body_parts) > 6 else ''
+    parts.update(head=head_html, css=css_content, js=js_content, build_id=instrumented_id)
+    return parts
+
 
-    # 6. Assemble final HTML
-    html_template = f'''<!DOCTYPE html>
+def render_page(parts: dict, styles: str, scripts: str) -> str:
+    """Lay out the page around the given style and script blocks."""
+    return f'''<!DOCTYPE html>
 <html lang="en">
-{head_html}
-    <style>
-{css_content}
-    </style>
+{parts['head']}
+    {styles}
 </head>
 <body>
-    {password_html}
+    {parts['password']}
 
     <!-- Main Dashboard -->
     <div class="dashboard" id="dashboard">
         <!-- Sticky Header + Filters -->
         <div class="sticky-header">
-            {header_html}
+            {parts['header']}
 
-            {filters_html}
+            {parts['filters']}
         </div>
 
         <main class="main">
-            {kpi_html}
+            {parts['kpi']}
 
-            {charts_html}
+            {parts['charts']}
         </main>
     </div>
 
-    {drillthrough_html}
+    {parts['drillthrough']}
+
+    {parts['modals']}
+
+    {scripts}
+</body>
+</html>'''
+
+
+def assemble_template(template_dir: Path, instrument: bool = False) -> str:
+    """
+    Assemble HTML from modular source files using parallel I/O.
+
+    Combines:
+    - CSS files from template/css/
+    - HTML partials from template/html/
+    - JS files from template/js/ (plus perf.js with instrument)
+
+    Returns the complete HTML template string.
+    """
+    parts = read_template_parts(template_dir, instrument)
+    if parts['build_id']:
+        print(f"  Instrumented build: {parts['build_id']}")
 
-    {modals_html}
+    styles = f'''<style>
+{parts['css']}
+    </style>'''
 
-    <script>
+    scripts = f'''<script>
         // === ENCRYPTED PAYLOAD ===
         <!-- EMBEDDED_ENCRYPTED_PAYLOAD_JSON -->
 
-{js_content}
-    </script>
-</body>
-</html>'''
+{parts['js']}
+    </script>'''
 
-    return html_template
+    return render_page(parts, styles, scripts)
 
 
 def inline_libraries(html_content: str, lib_dir: Path) -> str:
     """Replace CDN script tags with inlined library content."""
-
-    # Chart.js
-    chart_path = lib_dir / 'chart.min.js'
-    if chart_path.exists():
-        chart_content = chart_path.read_text(encoding='utf-8')
-        html_content = html_content.replace(
-            '<script src="https://cdn.jsdelivr.net/npm/chart.js"></script>',
-            f'<script>{chart_content}</script>'
-        )
-        print(f"  Chart.js: {len(chart_content):,} bytes inlined")
-    else:
-        print("  WARNING: chart.min.js not found")
-
-    # PapaParse
-    papa_path = lib_dir / 'papaparse.min.js'
-    if papa_path.exists():
-        papa_content = papa_path.read_text(encoding='utf-8')
-        html_content = html_content.replace(
-            '<script src="https://cdnjs.cloudflare.com/ajax/libs/PapaParse/5.4.1/papaparse.min.js"></script>',
-            f'<script>{papa_content}</script>'
-        )
-        print(f"  PapaParse: {len(papa_content):,} bytes inlined")
-    else:
-        print("  WARNING: papaparse.min.js not found")
-
-    # SheetJS XLSX
-    xlsx_path = lib_dir / 'xlsx.full.min.js'
-    if xlsx_path.exists():
-        xlsx_content = xlsx_path.read_text(encoding='utf-8')
-        html_content = html_content.replace(
-            '<script src="https://cdnjs.cloudflare.com/ajax/libs/xlsx/0.18.5/xlsx.full.min.js"></script>',
-            f'<script>{xlsx_content}</script>'
-        )
-        print(f"  SheetJS XLSX: {len(xlsx_content):,} bytes inlined")
-    else:
-        print("  WARNING: xlsx.full.min.js not found")
+    for name, (label, tag) in LIBRARIES.items():
+        path = lib_dir / name
+        if path.exists():
+            content = path.read_text(encoding='utf-8')
+            html_content = html_content.replace(tag, f'<script>{content}</script>')
+            print(f"  {label}: {len(content):,} bytes inlined")
+        else:
+            print(f"  WARNING: {name} not found")
 
     return html_content
 
@@ -513,7 +1676,7 @@ def embed_encrypted_payload(html_content: str, payload: dict, timestamp: str) ->
     payload_json = json.dumps(payload)
     html_content = html_content.replace(
         '<!-- EMBEDDED_ENCRYPTED_PAYLOAD_JSON -->',
-        f'const encryptedPayload = {payload_json};'
+        f'{PAYLOAD_PREFIX}{payload_json};'
     )
 
     # Embed timestamp
@@ -525,103 +1688,824 @@ def embed_encrypted_payload(html_content: str, payload: dict, timestamp: str) ->
     return html_content
 
 
+def content_hash(content: bytes) -> str:
+    """Short content hash used in asset file names."""
+    return hashlib.sha256(content).hexdigest()[:10]
+
+
+def write_hashed_asset(assets_dir: Path, stem: str, suffix: str, content: bytes) -> str:
+    """Write content as <stem>.<hash><suffix> and return the file name."""
+    name = f'{stem}.{content_hash(content)}{suffix}'
+    path = assets_dir / name
+    if not path.exists():
+        path.write_bytes(content)
+    return name
+
+
+def write_split_site(template_dir: Path, lib_dir: Path, site_dir: Path,
+                     payload: dict, timestamp: str, files: list = None,
+                     instrument: bool = False, parts: dict = None) -> Path:
+    """
+    Write the dashboard as separate, browser-cacheable files:
+
+    site/index.html                  small page, revalidated on every visit
+    site/assets/<lib>.<hash>.js      libraries
+    site/assets/app.<hash>.css|js    template bundles
+    site/assets/data.<hash>.js       encrypted payload
+    site/_headers                    long-lived caching for assets/
+    site/assets/shard-<id>.<hash>.bin  encrypted data shards (files, sharded output)
+
+    Hashed names change only when content does, so after a data refresh a
+    returning visitor re-downloads just the page and the data file. The
+    payload is a script rather than JSON so the page also works from file://.
+    Assets no longer referenced by the page are removed. instrument adds
+    the runtime instrumentation to the app bundles (read_template_parts);
+    parts, when given, is that function's result, read ahead of time.
+    """
+    assets_dir = site_dir / ASSETS_DIR
+    assets_dir.mkdir(parents=True, exist_ok=True)
+
+    parts = dict(parts or read_template_parts(template_dir, instrument))
+    if parts['build_id']:
+        print(f"  Instrumented build: {parts['build_id']}")
+    written = []
+
+    # Libraries replace their CDN tags in the head partial
+    for name, (label, tag) in LIBRARIES.items():
+        path = lib_dir / name
+        if not path.exists():
+            print(f"  WARNING: {name} not found")
+            continue
+        asset = write_hashed_asset(assets_dir, Path(name).stem.removesuffix('.min'), '.js', path.read_bytes())
+        parts['head'] = parts['head'].replace(tag, f'<script src="{ASSETS_DIR}/{asset}"></script>')
+        written.append(asset)
+        print(f"  {label}: {ASSETS_DIR}/{asset}")
+
+    css_asset = write_hashed_asset(assets_dir, 'app', '.css', parts['css'].encode('utf-8'))
+    js_asset = write_hashed_asset(assets_dir, 'app', '.js', parts['js'].encode('utf-8'))
+    data = f'{PAYLOAD_PREFIX}{json.dumps(payload)};\n'.encode('utf-8')
+    data_asset = write_hashed_asset(assets_dir, 'data', '.js', data)
+    written += [css_asset, js_asset, data_asset]
+    for asset in (css_asset, js_asset, data_asset):
+        print(f"  {ASSETS_DIR}/{asset}")
+    for name, content in files or []:
+        (assets_dir / name).write_bytes(content)
+        written.append(name)
+        print(f"  {ASSETS_DIR}/{name} ({len(content):,} bytes)")
+
+    styles = f'<link rel="stylesheet" href="{ASSETS_DIR}/{css_asset}">'
+    scripts = (f'<script src="{ASSETS_DIR}/{data_asset}"></script>\n'
+               f'    <script src="{ASSETS_DIR}/{js_asset}"></script>')
+    html_content = render_page(parts, styles, scripts).replace(
+        "'<!-- DATA_TIMESTAMP -->'",
+        f"'{timestamp}'"
+    )
+
+    index_path = site_dir / 'index.html'
+    index_path.write_text(html_content, encoding='utf-8')
+    (site_dir / '_headers').write_text(SITE_HEADERS, encoding='utf-8')
+
+    # Drop assets from earlier builds
+    for path in assets_dir.iterdir():
+        if path.name not in written:
+            path.unlink()
+
+    return index_path
+
+
 def find_excel_file(input_dir: Path) -> Path:
-    """Find the first Excel file in the input directory."""
-    xlsx_files = list(input_dir.glob('*.xlsx'))
-    if not xlsx_files:
-        raise FileNotFoundError(f"No Excel files found in {input_dir}")
-    return xlsx_files[0]
+    """Find the input report: the first .xlsx, else the first file of another INPUT_READERS format."""
+    for suffix in INPUT_READERS:
+        files = sorted(input_dir.glob(f'*{suffix}'))
+        if files:
+            return files[0]
+    raise FileNotFoundError(f"No input files ({', '.join(INPUT_READERS)}) found in {input_dir}")
 
 
-def parse_args():
+def _chunk_rows_argv(argv: list) -> list:
+    """
+    argv with the default range filled in after a bare --chunk-rows that is
+    followed by a positional (`pack --chunk-rows big.parquet`), which
+    argparse would otherwise take as the row count.
+    """
+    argv = list(argv)
+    for i, arg in enumerate(argv[:-1]):
+        if arg == '--chunk-rows' and not argv[i + 1].startswith('-') and not argv[i + 1].isdigit():
+            argv.insert(i + 1, str(DEFAULT_CHUNK_ROWS))
+            break
+    return argv
+
+
+def parse_args(argv: list = None):
     """Parse command line arguments."""
-    parser = argparse.ArgumentParser(description='Build Indirect G&A Dashboard')
+    # Options shared with subcommands; SUPPRESS keeps a subcommand from
+    # resetting a value given before it
+    chunking = argparse.ArgumentParser(add_help=False)
+    chunking.add_argument('--chunk-rows', type=int, nargs='?', const=DEFAULT_CHUNK_ROWS, default=argparse.SUPPRESS,
+                          help='Convert a Parquet/Arrow/CSV input in row ranges on worker processes to bound memory '
+                               f'(default range: {DEFAULT_CHUNK_ROWS:,} rows)')
+    chunking.add_argument('--workers', type=int, default=argparse.SUPPRESS,
+                          help='Worker processes for --chunk-rows (default: CPU count)')
+    keys = argparse.ArgumentParser(add_help=False)
+    keys.add_argument('--passwords', type=Path, metavar='FILE', default=argparse.SUPPRESS,
+                      help='File with one password per line, each getting a key slot in the payload '
+                           '(default: DASHBOARD_PASSWORD)')
+
+    parser = argparse.ArgumentParser(description='Build Indirect G&A Dashboard', parents=[chunking, keys])
     parser.add_argument('--no-cache', action='store_true',
                         help='Disable caching (force re-process Excel)')
     parser.add_argument('--clear-cache', action='store_true',
                         help='Clear cache before building')
-    return parser.parse_args()
+    parser.add_argument('--target', choices=TARGETS, default='single',
+                        help='single: one self-contained HTML file for SharePoint (default); '
+                             f'split: content-hashed assets in {SITE_DIR}/ for static hosting')
+    parser.add_argument('--shard', choices=SHARD_PERIODS,
+                        help='With --target split: one encrypted data file per fiscal year or quarter, '
+                             'fetched by the page when the date filter needs it')
+    parser.add_argument('--embed', choices=EMBED_MODES, default='base64',
+                        help='Payload encoding: base64 (v1, default) or segments (v2: gzip-compressed '
+                             'ciphertext in base64 segments, about a quarter of the HTML size)')
+    parser.add_argument('--graph', action='store_true',
+                        help='Print the build stage graph for the given options and exit')
+    parser.add_argument('--instrument', action='store_true',
+                        help='Time the unlock and render phases in the browser (performance.mark/measure); '
+                             'open the page with ?perf=1 for the overlay and JSON trace')
+
+    subparsers = parser.add_subparsers(dest='command')
+    pack = subparsers.add_parser('pack', parents=[chunking, keys],
+                                 help='Convert a workbook into an encrypted data pack for the import modal')
+    pack.add_argument('workbook', nargs='?', type=Path,
+                      help=f'Workbook or .csv/.parquet/.arrow export to convert (default: first input in {INPUT_DIR}/)')
+    pack.add_argument('-o', '--output', type=Path,
+                      help=f'Output file (default: workbook name with {PACK_SUFFIX})')
+
+    rekey = subparsers.add_parser('rekey', parents=[keys],
+                                  help="Replace the key slots of a built page, site or data pack "
+                                       "with --passwords, without re-encrypting the data")
+    rekey.add_argument('target', nargs='?', type=Path,
+                       help=f'Page, split site directory or {PACK_SUFFIX} file (default: {OUTPUT_FILE})')
+    rekey.add_argument('--password', default=DASHBOARD_PASSWORD,
+                       help='A password that opens the current slots (default: DASHBOARD_PASSWORD)')
+
+    profile = subparsers.add_parser('profile', help='Profile workbook columns (dtype, nulls, cardinality, size) as JSON')
+    profile.add_argument('workbook', nargs='?', type=Path,
+                         help=f'Workbook or .csv/.parquet/.arrow export to profile (default: first input in {INPUT_DIR}/)')
+    profile.add_argument('--sheet', help='Only this sheet (default: all sheets)')
+    profile.add_argument('--top', type=int, default=PROFILE_TOP_VALUES,
+                         help=f'Top values reported per column (default: {PROFILE_TOP_VALUES})')
+    profile.add_argument('-o', '--output', type=Path,
+                         help=f'Output file (default: workbook name with {PROFILE_SUFFIX})')
+
+    export = subparsers.add_parser('export', parents=[chunking],
+                                   help='Compute the dashboard KPIs for filter/period specs (CSV or JSON)')
+    export.add_argument('workbook', nargs='?', type=Path,
+                        help=f'Workbook or .csv/.parquet/.arrow export (default: first input in {INPUT_DIR}/, cached)')
+    export.add_argument('--spec', type=Path,
+                        help='JSON file with a list of specs; replaces the single spec given by the options below')
+    export.add_argument('--name', help='Spec name in the output')
+    export.add_argument('--from', dest='start', help='First G/L Date (YYYY-MM-DD)')
+    export.add_argument('--to', dest='end', help='Last G/L Date (YYYY-MM-DD)')
+    export.add_argument('--job-type', choices=('all', 'GA', 'IN'), default='all')
+    export.add_argument('--filter', action='append', default=[], metavar='COLUMN=V1,V2',
+                        help='Keep rows whose COLUMN is one of the values (repeatable)')
+    export.add_argument('--by', action='append', default=[], metavar='COLUMN',
+                        help='Break the KPIs down by COLUMN (repeatable)')
+    export.add_argument('--period', choices=EXPORT_PERIODS, default='all',
+                        help='One row per month, fiscal quarter or year (default: all)')
+    export.add_argument('-o', '--output', type=Path,
+                        help=f'Output .csv or .json (default: {EXPORT_OUTPUT})')
+
+    bench = subparsers.add_parser('bench', help='Benchmark the dashboard JS hot paths in Node on synthetic data (JSON)')
+    bench.add_argument('--rows', type=lambda v: [int(n) for n in v.split(',')], default=list(BENCH_ROWS),
+                       help=f"Comma-separated dataset sizes (default: {','.join(str(n) for n in BENCH_ROWS)})")
+    bench.add_argument('--min-time', type=float, default=1.0,
+                       help='Seconds each case runs for (default: 1)')
+    bench.add_argument('-o', '--output', type=Path,
+                       help=f'Output file (default: {BENCH_OUTPUT})')
+    args = parser.parse_args(_chunk_rows_argv(sys.argv[1:] if argv is None else argv))
+    for name in ('chunk_rows', 'workers', 'passwords'):
+        setattr(args, name, getattr(args, name, None))
+    return args
+
+
+def write_bench_payloads(script_dir: Path, rows, directory: Path) -> Path | None:
+    """
+    Write an encrypted payload in every EMBED_MODES encoding per row count
+    for the payload cases of the bench: the converted input resampled (with
+    replacement, seeded) to that many rows, all under one random key.
+    Returns the path of their manifest (key, sizes, files), or None when
+    there is no input to sample.
+    """
+    try:
+        excel_path = find_excel_file(script_dir / INPUT_DIR)
+    except FileNotFoundError:
+        return None
+    csv_data, _ = excel_to_csv(excel_path, script_dir / CACHE_DIR)
+    source = _read_string_frame(csv_data)
+    key, envelope = key_envelope([DASHBOARD_PASSWORD])
+
+    entries = []
+    for n in rows:
+        columnar = encode_frame(source.sample(n, with_replacement=True, seed=42))
+        for embed in EMBED_MODES:
+            data = gzip.compress(columnar, compresslevel=6, mtime=0) if embed == 'segments' else columnar
+            text = json.dumps(embedded_payload(data, key, envelope, embed))
+            path = directory / f'payload-{n}-{embed}.json'
+            path.write_text(text, encoding='utf-8')
+            entries.append({
+                'rows': n, 'embed': embed, 'path': str(path), 'columnar_bytes': len(columnar),
+                'html_bytes': len(text), 'gzip_bytes': len(gzip.compress(text.encode('utf-8'), compresslevel=6)),
+            })
+    manifest = directory / 'payloads.json'
+    manifest.write_text(json.dumps({'key': key.hex(), 'payloads': entries}), encoding='utf-8')
+    return manifest
+
+
+def run_js_bench(template_dir: Path, harness: Path, rows=BENCH_ROWS, min_time: float = 1.0,
+                 node: str = None, payloads: Path = None) -> dict:
+    """
+    Benchmark the dashboard's JS hot paths (computeAllMetrics, applyFilters,
+    drill-through sort, aggregateExplorerData, aggregateMonthlyData) in Node.
 
+    The JS is the same bundle assemble_template() embeds; the harness runs it
+    against a stub DOM and returns ops/sec and heap usage per case and
+    dataset size. payloads is a manifest from write_bench_payloads(), whose
+    decode and unlock times are added to the report.
+    """
+    import subprocess
+
+    node = node or os.environ.get('NODE') or shutil.which('node')
+    if not node:
+        raise FileNotFoundError("Node.js not found (install it or set NODE)")
+
+    js = read_template_parts(template_dir)['js']
+    # Room for the largest synthetic dataset plus the filter/metric caches
+    heap_mb = max(4096, max(rows) // 1000)
+    with tempfile.TemporaryDirectory(prefix='ga_bench_') as tmp:
+        script = Path(tmp) / 'dashboard.js'
+        script.write_text(js, encoding='utf-8')
+        result = subprocess.run(
+            [node, '--expose-gc', f'--max-old-space-size={heap_mb}', str(harness), str(script),
+             '--rows', ','.join(str(n) for n in rows), '--min-time', str(min_time),
+             *(['--payloads', str(payloads)] if payloads else [])],
+            stdout=subprocess.PIPE, check=True, text=True,
+        )
+    return json.loads(result.stdout)
 
-def main():
+
+def run_bench(args, script_dir: Path) -> int:
+    """Run the bench subcommand."""
     import time
     start_time = time.time()
 
-    args = parse_args()
-    script_dir = Path(__file__).parent
-    cache_dir = script_dir / CACHE_DIR
+    print("Benchmarking dashboard JS in Node...")
+    with tempfile.TemporaryDirectory(prefix='ga_payloads_') as tmp:
+        payloads = write_bench_payloads(script_dir, args.rows, Path(tmp))
+        if payloads is None:
+            print(f"  No input in {INPUT_DIR}/ to sample; payload cases skipped")
+        report = run_js_bench(script_dir / TEMPLATE_DIR, script_dir / BENCH_HARNESS, args.rows, args.min_time,
+                              payloads=payloads)
+    output_path = args.output or script_dir / BENCH_OUTPUT
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    for size in report['sizes']:
+        print()
+        print(f"  {size['rows']:,} rows ({size['dataset_mb']:.0f} MB dataset)")
+        print(f"    {'Case':<38} {'ops/sec':>9} {'mean':>10} {'heap peak':>10}")
+        for case in size['results']:
+            print(f"    {case['name']:<38} {case['ops_per_sec']:>9.2f} {case['mean_ms']:>8.1f}ms "
+                  f"{case['heap_peak_mb']:>8.0f}MB")
+
+    if report['payloads']:
+        print()
+        print(f"  Payloads (PBKDF2 excluded)")
+        print(f"    {'Rows':>10} {'Embed':<9} {'Decoder':<14} {'HTML':>9} {'gzip':>9} "
+              f"{'parse':>9} {'decode':>9} {'unlock':>9}")
+        for entry in report['payloads']:
+            times = {case['name']: case['mean_ms'] for case in entry['results']}
+            print(f"    {entry['rows']:>10,} {entry['embed']:<9} {entry['decoder']:<14} "
+                  f"{entry['html_bytes'] / 1048576:>7.1f}MB {entry['gzip_bytes'] / 1048576:>7.1f}MB "
+                  f"{times['JSON.parse']:>7.1f}ms {times['decode']:>7.1f}ms {times['unlock (after PBKDF2)']:>7.1f}ms")
+
+    print()
+    print(f"Results saved to: {output_path} (Node {report['node']}, {time.time() - start_time:.1f}s)")
+    return 0
+
 
+def run_pack(args, script_dir: Path) -> int:
+    """Run the pack subcommand."""
     print("=" * 60)
-    print("Indirect G&A Cost Dashboard Builder (OPTIMIZED)")
+    print("Indirect G&A Cost Dashboard - Data Pack")
     print("=" * 60)
     print()
 
-    # Clear cache if requested
-    if args.clear_cache and cache_dir.exists():
-        import shutil
-        shutil.rmtree(cache_dir)
-        print("Cache cleared.")
+    excel_path = args.workbook or find_excel_file(script_dir / INPUT_DIR)
+    result = pack_workbook(excel_path, args.output, read_passwords(args.passwords),
+                           chunk_rows=args.chunk_rows, workers=args.workers)
+
+    print()
+    print("=" * 60)
+    print("PACK SUCCESSFUL!")
+    print("=" * 60)
+    print(f"  Input:   {result['input'].name}")
+    print(f"  Records: {result['records']:,}")
+    print(f"  Output:  {result['output']}")
+    print(f"  Size:    {result['size'] / 1024 / 1024:.2f} MB (uncompressed {result['raw_size'] / 1024 / 1024:.2f} MB)")
+    print(f"  Time:    {result['elapsed']:.2f}s")
+    print()
+    print("Load it with Import in the dashboard; it uses the dashboard password.")
+
+    return 0
+
+
+def read_passwords(path: Path = None) -> list:
+    """The passwords in path, one per line (blank lines skipped), or [DASHBOARD_PASSWORD] without one."""
+    if path is None:
+        return [DASHBOARD_PASSWORD]
+    passwords = [line for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+    if not passwords:
+        raise ValueError(f"No passwords in {path}")
+    return passwords
+
+
+def run_rekey(args, script_dir: Path) -> int:
+    """Run the rekey subcommand."""
+    target = args.target or script_dir / OUTPUT_FILE
+    passwords = read_passwords(args.passwords)
+    try:
+        result = rekey_output(target, args.password, passwords)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    print(f"Rekeyed {result['output']}: {result['slots']} key slot(s), "
+          f"{result['size']:,} bytes, {result['elapsed'] * 1000:.0f}ms")
+    return 0
+
+
+def run_profile(args, script_dir: Path) -> int:
+    """Run the profile subcommand."""
+    import time
+    start_time = time.time()
+
+    excel_path = args.workbook or find_excel_file(script_dir / INPUT_DIR)
+    output_path = args.output or excel_path.with_name(excel_path.stem + PROFILE_SUFFIX)
+    print(f"Profiling {excel_path.name}...")
+    profile = profile_workbook(excel_path, args.sheet, args.top)
+    output_path.write_text(json.dumps(profile, indent=2, default=str), encoding='utf-8')
+
+    for sheet, info in profile['sheets'].items():
+        print()
+        print(f"  {sheet}: {info['rows']:,} rows, {info['bytes'] / 1024 / 1024:.2f} MB in memory")
+        print(f"    {'Column':<24} {'Type':<10} {'Null %':>7} {'Distinct':>9} {'Encoded':>10}  Suggest")
+        for col in info['columns']:
+            print(f"    {col['name'][:24]:<24} {col['dtype'][:10]:<10} {col['null_rate'] * 100:>6.1f}% "
+                  f"{col['distinct']:>9,} {col['encoded_bytes'] / 1024:>8.0f}KB  {col['suggest']}")
+
+    print()
+    print(f"Profile saved to: {output_path} ({time.time() - start_time:.2f}s)")
+    return 0
+
+
+def run_export(args, script_dir: Path) -> int:
+    """Run the export subcommand."""
+    import time
+    start_time = time.time()
+
+    if args.spec:
+        specs = json.loads(args.spec.read_text(encoding='utf-8'))
+        if isinstance(specs, dict):
+            specs = [specs]
+    else:
+        filters = {}
+        for item in args.filter:
+            column, sep, values = item.partition('=')
+            if not sep:
+                print(f"ERROR: --filter expects COLUMN=V1,V2, got '{item}'")
+                return 1
+            filters[column.strip()] = [v.strip() for v in values.split(',')]
+        specs = [{'name': args.name, 'from': args.start, 'to': args.end, 'jobType': args.job_type,
+                  'filters': filters, 'by': args.by, 'period': args.period}]
+
+    # Only the build input uses the build cache; other files would evict it
+    excel_path = args.workbook or find_excel_file(script_dir / INPUT_DIR)
+    cache_dir = None if args.workbook else script_dir / CACHE_DIR
+    csv_data, record_count = excel_to_csv(excel_path, cache_dir, use_cache=cache_dir is not None,
+                                          chunk_rows=args.chunk_rows, workers=args.workers)
+
+    try:
+        specs, results = export_kpis(csv_data, specs)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    output_path = args.output or script_dir / EXPORT_OUTPUT
+    write_kpi_export(specs, results, output_path)
+
+    print()
+    for spec, df in zip(specs, results):
+        print(f"  {spec['name']}: {len(df):,} rows")
+    print()
+    print(f"KPIs for {len(specs)} spec(s) over {record_count:,} records saved to: {output_path} "
+          f"({time.time() - start_time:.2f}s)")
+    return 0
+
+
+def convert_input(script_dir: Path = None, use_cache: bool = True,
+                  chunk_rows: int = None, workers: int = None) -> tuple[Path, str, int]:
+    """
+    Locate the input workbook and convert it to CSV (with caching), in
+    chunks on worker processes when chunk_rows is given.
+    Returns (excel_path, csv_data, record_count).
+
+    Independent of template assembly, so callers may run it concurrently
+    with other work and hand the result to build().
+    """
+    script_dir = Path(script_dir or Path(__file__).parent)
+    cache_dir = script_dir / CACHE_DIR
 
     # Find Excel file
     input_dir = script_dir / INPUT_DIR
-    print(f"Looking for Excel files in: {input_dir}")
+    print(f"Looking for input files in: {input_dir}")
     excel_path = find_excel_file(input_dir)
-    print(f"Found Excel file: {excel_path.name}")
+    print(f"Found input file: {excel_path.name}")
 
-    # Assemble template from modular files (parallel I/O)
-    template_dir = script_dir / TEMPLATE_DIR
-    print()
-    print("Assembling template from modular source files...")
-    print(f"  CSS files: {len(CSS_ORDER)}")
-    print(f"  HTML partials: {len(HTML_ORDER) + 1}")  # +1 for head.html
-    print(f"  JS modules: {len(JS_ORDER)}")
-    html_content = assemble_template(template_dir)
-    print(f"  Assembled template: {len(html_content):,} bytes")
-
-    # Convert Excel to CSV (with caching)
+    # Convert input to CSV (with caching)
     print()
-    print("Converting Excel to CSV...")
-    use_cache = not args.no_cache
-    csv_data, record_count = excel_to_csv(excel_path, cache_dir, use_cache=use_cache)
+    print("Converting input to CSV...")
+    csv_data, record_count = excel_to_csv(excel_path, cache_dir, use_cache=use_cache,
+                                          chunk_rows=chunk_rows, workers=workers)
+    return excel_path, csv_data, record_count
+
+
+# ============================================================================
+# BUILD STAGE GRAPH
+# ============================================================================
+# build() declares its work as stages: a name, the stages whose outputs it
+# takes (deps), a function of those outputs, and the inputs (files,
+# directories, settings) it reads besides them. run_stages() starts each
+# stage on a thread pool as soon as its deps are done. Polars, the PBKDF2
+# and AES-GCM calls in `cryptography` and file I/O release the GIL, so the
+# build takes about as long as its critical path rather than the sum.
+#
+# A stage's fingerprint hashes its inputs and its deps' fingerprints, so a
+# changed input changes every fingerprint downstream of it. Stages marked
+# cache store their output under STAGE_CACHE_DIR and reuse it while the
+# fingerprint matches. Only deterministic stages may be cached: the key
+# (fresh salt), encryption (fresh IV) and the write run on every build.
+
+STAGE_CACHE_DIR = 'stages'
+
+
+def stage(name: str, fn, deps: tuple = (), inputs: tuple = (), cache: bool = False) -> dict:
+    """Declare a build stage; fn is called with the outputs of deps, in order."""
+    return {'name': name, 'fn': fn, 'deps': tuple(deps), 'inputs': tuple(inputs), 'cache': cache}
+
+
+def _input_fingerprint(value) -> str:
+    """
+    Fingerprint of a stage input: file contents for paths (every file for
+    directories), else its JSON. Callables are called first, so inputs that
+    need a lookup (the input file) are resolved only when the stage runs.
+    """
+    if callable(value):
+        value = value()
+    if isinstance(value, Path):
+        if value.is_dir():
+            digest = hashlib.sha256()
+            for path in sorted(p for p in value.rglob('*') if p.is_file()):
+                digest.update(str(path.relative_to(value)).encode('utf-8'))
+                digest.update(hashlib.sha256(path.read_bytes()).digest())
+            return digest.hexdigest()
+        return file_hash(value) if value.exists() else 'missing'
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def stage_fingerprint(spec: dict, dep_fingerprints: list) -> str:
+    digest = hashlib.sha256(spec['name'].encode('utf-8'))
+    for part in [_input_fingerprint(v) for v in spec['inputs']] + dep_fingerprints:
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _load_stage_cache(cache_dir: Path, name: str, fingerprint: str) -> tuple[bool, object]:
+    path = cache_dir / STAGE_CACHE_DIR / f'{name}.pkl'
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+    except Exception:
+        return False, None
+    if cached.get('fingerprint') != fingerprint:
+        return False, None
+    return True, cached['output']
+
+
+def _save_stage_cache(cache_dir: Path, name: str, fingerprint: str, output):
+    path = cache_dir / STAGE_CACHE_DIR / f'{name}.pkl'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump({'fingerprint': fingerprint, 'output': output}, f)
+
+
+def _run_stage(spec: dict, args: list, dep_fingerprints: list, cache_dir: Path, origin: float) -> tuple:
+    import time
+    start = time.perf_counter()
+    fingerprint = stage_fingerprint(spec, dep_fingerprints)
+    cached, output = False, None
+    if spec['cache'] and cache_dir:
+        cached, output = _load_stage_cache(cache_dir, spec['name'], fingerprint)
+    if not cached:
+        output = spec['fn'](*args)
+        if spec['cache'] and cache_dir:
+            _save_stage_cache(cache_dir, spec['name'], fingerprint, output)
+    end = time.perf_counter()
+    return output, fingerprint, {'start': start - origin, 'elapsed': end - start, 'cached': cached}
+
+
+def run_stages(stages: list, cache_dir: Path = None) -> tuple[dict, dict]:
+    """
+    Run the stage graph. Returns (outputs, timings), both keyed by stage
+    name; a timing has 'start' (seconds after the run began), 'elapsed'
+    and 'cached'. With cache_dir None no stage cache is read or written.
+    The first failing stage's exception is raised once running stages finish.
+    """
+    import time
+    names = {spec['name'] for spec in stages}
+    for spec in stages:
+        missing = [d for d in spec['deps'] if d not in names]
+        if missing:
+            raise ValueError(f"Stage '{spec['name']}' depends on unknown stage(s): {', '.join(missing)}")
+
+    outputs, fingerprints, timings = {}, {}, {}
+    pending, running = list(stages), {}
+    origin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(stages) or 1) as executor:
+        while pending or running:
+            for spec in [s for s in pending if all(d in outputs for d in s['deps'])]:
+                pending.remove(spec)
+                future = executor.submit(_run_stage, spec, [outputs[d] for d in spec['deps']],
+                                         [fingerprints[d] for d in spec['deps']], cache_dir, origin)
+                running[future] = spec
+            if not running:
+                raise ValueError(f"Stage graph has a cycle: {', '.join(s['name'] for s in pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)['name']
+                outputs[name], fingerprints[name], timings[name] = future.result()
+    return outputs, timings
+
+
+def critical_path(stages: list, timings: dict) -> list:
+    """Names of the stages on the longest chain of elapsed time through the graph."""
+    finish, via = {}, {}
+    for spec in stages:     # declared in dependency order
+        name = spec['name']
+        prior = max(spec['deps'], key=lambda d: finish[d], default=None)
+        finish[name] = timings[name]['elapsed'] + (finish[prior] if prior else 0.0)
+        via[name] = prior
+    path, name = [], max(finish, key=finish.get, default=None)
+    while name:
+        path.append(name)
+        name = via[name]
+    return path[::-1]
+
+
+def print_stage_graph(stages: list, timings: dict = None):
+    """Print the stages with their deps; with timings, also start, elapsed and the critical path (*)."""
+    width = max(len(spec['name']) for spec in stages)
+    if not timings:
+        for spec in stages:
+            deps = ', '.join(spec['deps']) or '-'
+            print(f"  {spec['name']:<{width}}  <- {deps}{'  (cacheable)' if spec['cache'] else ''}")
+        return
+    path = critical_path(stages, timings)
+    total = sum(timings[n]['elapsed'] for n in path)
+    print(f"  {'stage':<{width + 2}}  {'start':>7}  {'time':>7}  deps")
+    for spec in stages:
+        t = timings[spec['name']]
+        mark = '*' if spec['name'] in path else ' '
+        note = '  (cached)' if t['cached'] else ''
+        deps = ', '.join(spec['deps']) or '-'
+        print(f"  {mark} {spec['name']:<{width}}  {t['start']:>6.2f}s  {t['elapsed']:>6.2f}s  {deps}{note}")
+    print(f"  Critical path: {' -> '.join(path)} ({total:.2f}s)")
+
+
+def build_stages(script_dir: Path, timestamp: str, use_cache: bool = True, converted: tuple = None,
+                 target: str = 'single', chunk_rows: int = None, workers: int = None,
+                 shard: str = None, instrument: bool = False, embed: str = 'base64',
+                 passwords: list = None) -> list:
+    """
+    The build as a stage graph (see run_stages), in dependency order:
+
+    template   template/ -> HTML template (single) or its parts (split)
+    page       template + lib/ -> HTML with the libraries inlined (single)
+    convert    input file -> (input_path, csv_data, record_count)
+    key        -> (data key, key slots): one PBKDF2 per password
+    encode     convert -> columnar binary (unsharded; cached)
+    compress   encode -> gzip-compressed binary (embed "segments"; cached)
+    encrypt    key + encode/compress (or convert, sharded) -> (payload, shard files)
+    write      page or template + encrypt -> (output_path, size)
+    """
+    template_dir = script_dir / TEMPLATE_DIR
+    lib_dir = script_dir / 'lib'
+    site_dir = script_dir / SITE_DIR
+
+    if converted is None:
+        def input_path():
+            return find_excel_file(script_dir / INPUT_DIR)
+
+        def convert():
+            return convert_input(script_dir, use_cache=use_cache, chunk_rows=chunk_rows, workers=workers)
+    else:
+        input_path = converted[0]
+
+        def convert():
+            return converted
+
+    passwords = passwords or [DASHBOARD_PASSWORD]
+
+    def derive():
+        return key_envelope(passwords)
+
+    def encode(data):
+        columnar = encode_columnar(data[1])
+        print(f"  Columnar data: {len(columnar):,} bytes (CSV {csv_size(data[1]):,})")
+        return columnar
+
+    def encrypt(derived, data):
+        if shard:
+            payload, files = shard_dataset(data[1], passwords, shard, derived)
+            print(f"  {len(files)} shards, {sum(len(f) for _, f in files):,} bytes (CSV {csv_size(data[1]):,})")
+            return payload, files
+        payload = embedded_payload(data, *derived, embed)
+        if embed == 'segments':
+            print(f"  Payload: {len(payload['segments'])} segments, {payload['ctLength']:,} bytes encrypted")
+        return payload, None
+
+    def compress(columnar):
+        return gzip.compress(columnar, compresslevel=6, mtime=0)
+
+    stages = []
+    if target == 'split':
+        stages.append(stage('template', lambda: read_template_parts(template_dir, instrument),
+                            inputs=(template_dir, instrument)))
+    else:
+        stages += [
+            stage('template', lambda: assemble_template(template_dir, instrument),
+                  inputs=(template_dir, instrument)),
+            stage('page', lambda html: inline_libraries(html, lib_dir), deps=('template',), inputs=(lib_dir,)),
+        ]
+    stages += [
+        stage('convert', convert, inputs=(input_path,)),
+        stage('key', derive),
+    ]
+    if shard:
+        stages.append(stage('encrypt', encrypt, deps=('key', 'convert'), inputs=(shard,)))
+    else:
+        # The builder source is an input: the encoding is defined here
+        stages += [
+            stage('encode', encode, deps=('convert',), inputs=(Path(__file__),), cache=True),
+        ]
+        if embed == 'segments':
+            stages += [
+                stage('compress', compress, deps=('encode',), cache=True),
+                stage('encrypt', encrypt, deps=('key', 'compress')),
+            ]
+        else:
+            stages.append(stage('encrypt', encrypt, deps=('key', 'encode')))
+
+    def write(page, encrypted):
+        payload, files = encrypted
+        if target == 'split':
+            output_path = write_split_site(template_dir, lib_dir, site_dir, payload, timestamp,
+                                           files, instrument, parts=page)
+            return output_path, sum(p.stat().st_size for p in site_dir.rglob('*') if p.is_file())
+        output_path = script_dir / OUTPUT_FILE
+        output_path.parent.mkdir(exist_ok=True)
+        output_path.write_text(embed_encrypted_payload(page, payload, timestamp), encoding='utf-8')
+        return output_path, output_path.stat().st_size
+
+    stages.append(stage('write', write, deps=('template' if target == 'split' else 'page', 'encrypt')))
+    return stages
+
+
+def build(script_dir: Path = None, use_cache: bool = True, converted: tuple = None,
+          target: str = 'single', chunk_rows: int = None, workers: int = None,
+          shard: str = None, instrument: bool = False, embed: str = 'base64',
+          passwords: list = None) -> dict:
+    """
+    Build the dashboard for the given target ("single" or "split").
+
+    converted is an optional (excel_path, csv_data, record_count) tuple
+    from convert_input(); when omitted the input is converted here
+    (chunked when chunk_rows is given). shard ("year" or "quarter", split
+    target only) writes the data as per-period shards (shard_dataset).
+    instrument bundles the runtime instrumentation (template/js/perf.js).
+    embed picks the encoding of an unsharded payload (EMBED_MODES).
+    passwords get a key slot each (default: DASHBOARD_PASSWORD).
+
+    The work runs as the stage graph from build_stages(); independent
+    stages overlap and the stage timings are printed at the end. Returns a
+    summary dict with the input, output path (the HTML page), total output
+    size, record count, timestamp, elapsed time and the stage timings.
+    """
+    import time
+    start_time = time.time()
+
+    if shard and target != 'split':
+        raise ValueError("Sharded output needs the split target")
+
+    script_dir = Path(script_dir or Path(__file__).parent)
 
     # Generate timestamp
     pacific_tz = ZoneInfo("America/Los_Angeles")
     timestamp = datetime.now(pacific_tz).strftime("%m/%d/%Y %I:%M %p PT")
     print(f"Timestamp (Pacific): {timestamp}")
 
-    # Inline JavaScript libraries
+    css_order, js_order = template_order(instrument)
+    print()
+    print(f"Building {target} target: {len(css_order)} CSS files, {len(HTML_ORDER) + 1} HTML partials, "
+          f"{len(js_order)} JS modules; data {'in ' + shard + ' shards' if shard else 'embedded as ' + embed}")
     print()
-    print("Inlining JavaScript libraries for SharePoint compatibility...")
-    lib_dir = script_dir / 'lib'
-    html_content = inline_libraries(html_content, lib_dir)
 
-    # Encrypt data
+    stages = build_stages(script_dir, timestamp, use_cache=use_cache, converted=converted, target=target,
+                          chunk_rows=chunk_rows, workers=workers, shard=shard, instrument=instrument,
+                          embed=embed, passwords=passwords)
+    outputs, timings = run_stages(stages, script_dir / CACHE_DIR if use_cache else None)
+
     print()
-    print("Encrypting embedded data...")
-    payload = encrypt_csv_data(csv_data, DASHBOARD_PASSWORD)
+    print("Build stages:")
+    print_stage_graph(stages, timings)
+
+    excel_path, csv_data, record_count = outputs['convert']
+    output_path, size = outputs['write']
+    return {
+        'input': excel_path,
+        'output': output_path,
+        'records': record_count,
+        'size': size,
+        'timestamp': timestamp,
+        'elapsed': time.time() - start_time,
+        'stages': timings,
+    }
+
+
+def main():
+    import time
+    start_time = time.time()
+
+    args = parse_args()
+    script_dir = Path(__file__).parent
+    cache_dir = script_dir / CACHE_DIR
+
+    if args.command == 'pack':
+        return run_pack(args, script_dir)
+    if args.command == 'profile':
+        return run_profile(args, script_dir)
+    if args.command == 'bench':
+        return run_bench(args, script_dir)
+    if args.command == 'export':
+        return run_export(args, script_dir)
+    if args.command == 'rekey':
+        return run_rekey(args, script_dir)
+
+    print("=" * 60)
+    print("Indirect G&A Cost Dashboard Builder (OPTIMIZED)")
+    print("=" * 60)
+    print()
+
+    # Clear cache if requested
+    if args.clear_cache and cache_dir.exists():
+        shutil.rmtree(cache_dir)
+        print("Cache cleared.")
+
+    if args.shard and args.target != 'split':
+        print("ERROR: --shard needs --target split")
+        return 1
 
-    # Embed into HTML
-    print("Embedding encrypted payload into HTML...")
-    html_content = embed_encrypted_payload(html_content, payload, timestamp)
+    if args.graph:
+        print("Build stages (stage <- deps):")
+        print_stage_graph(build_stages(script_dir, '', target=args.target, shard=args.shard,
+                                       instrument=args.instrument, embed=args.embed))
+        return 0
 
-    # Write output
-    output_path = script_dir / OUTPUT_FILE
-    output_path.parent.mkdir(exist_ok=True)
-    output_path.write_text(html_content, encoding='utf-8')
+    result = build(script_dir, use_cache=not args.no_cache, target=args.target,
+                   chunk_rows=args.chunk_rows, workers=args.workers, shard=args.shard,
+                   instrument=args.instrument, embed=args.embed, passwords=read_passwords(args.passwords))
 
     # Summary
-    output_size_mb = output_path.stat().st_size / 1024 / 1024
+    output_size_mb = result['size'] / 1024 / 1024
     elapsed = time.time() - start_time
 
     print()
     print("=" * 60)
     print("BUILD SUCCESSFUL!")
     print("=" * 60)
-    print(f"  Input:   {excel_path.name}")
-    print(f"  Records: {record_count:,}")
-    print(f"  Output:  {OUTPUT_FILE}")
+    print(f"  Input:   {result['input'].name}")
+    print(f"  Records: {result['records']:,}")
+    print(f"  Output:  {result['output'].relative_to(script_dir)}")
     print(f"  Size:    {output_size_mb:.2f} MB")
-    print(f"  Updated: {timestamp}")
+    print(f"  Updated: {result['timestamp']}")
     print(f"  Time:    {elapsed:.2f}s")
 
     return 0
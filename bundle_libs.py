@@ -1,62 +1,170 @@
 #!/usr/bin/env python3
 """
 Indirect G&A Dashboard - JavaScript Library Bundler
-Downloads and caches Chart.js and PapaParse for SharePoint compatibility.
+Downloads and caches Chart.js, PapaParse and SheetJS for SharePoint compatibility.
+
+Libraries are pinned in lib/libs.lock.json (URL, version, SHA-256, size).
+Files already present and matching the lock are skipped; the rest are
+fetched concurrently and verified before being written.
+
+A mirror can replace the CDN URLs for offline builds:
+  --mirror /path/to/dir          local directory containing the files
+  --mirror http://host:8000/lib  base URL (the file name is appended)
+The LIB_MIRROR environment variable sets the same thing.
 """
 
+import argparse
+import hashlib
+import json
+import os
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Library CDN URLs
-LIBS = {
-    'chart.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js',
-    'papaparse.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/PapaParse/5.4.1/papaparse.min.js',
-    'xlsx.full.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/xlsx/0.18.5/xlsx.full.min.js',
-}
+LOCK_FILE = 'libs.lock.json'
+MIRROR_ENV = 'LIB_MIRROR'
+
+
+def load_lock(lib_dir: Path) -> dict:
+    """Load the library lock manifest: {name: {version, url, sha256, size}}."""
+    return json.loads((lib_dir / LOCK_FILE).read_text(encoding='utf-8'))
+
+
+def sha256_bytes(content: bytes) -> str:
+    """Return the hex SHA-256 digest of content."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def is_verified(path: Path, entry: dict) -> bool:
+    """Check that path exists and matches the locked size and SHA-256."""
+    if not path.exists() or path.stat().st_size != entry['size']:
+        return False
+    return sha256_bytes(path.read_bytes()) == entry['sha256']
+
 
-def download_library(name: str, url: str, lib_dir: Path) -> bool:
-    """Download a library from CDN and save to lib folder."""
+def verify_libraries(lib_dir: Path, lock: dict = None) -> list[str]:
+    """Return the names of locked libraries that are missing or don't match the lock."""
+    lock = lock or load_lock(lib_dir)
+    return [name for name, entry in lock.items() if not is_verified(lib_dir / name, entry)]
+
+
+def resolve_source(name: str, entry: dict, mirror: str = None) -> str:
+    """Return the URL or local path a library should be fetched from."""
+    if not mirror:
+        return entry['url']
+    if '://' in mirror:
+        return f"{mirror.rstrip('/')}/{name}"
+    return str(Path(mirror) / name)
+
+
+def fetch(source: str) -> bytes:
+    """Read a library from a URL or a local path."""
+    if '://' not in source:
+        return Path(source).read_bytes()
+    req = urllib.request.Request(source, headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return response.read()
+
+
+def download_library(name: str, entry: dict, lib_dir: Path, mirror: str = None) -> bool:
+    """Fetch a library, verify it against the lock and save it to the lib folder."""
     output_path = lib_dir / name
-    
-    print(f"Downloading {name}...")
+    source = resolve_source(name, entry, mirror)
+
+    print(f"Downloading {name} {entry['version']} from {source}...")
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read()
-            output_path.write_bytes(content)
-            size_kb = len(content) / 1024
-            print(f"  Saved: {output_path} ({size_kb:.1f} KB)")
-            return True
+        content = fetch(source)
     except Exception as e:
         print(f"  ERROR: Failed to download {name}: {e}")
         return False
 
-def main():
+    digest = sha256_bytes(content)
+    if len(content) != entry['size'] or digest != entry['sha256']:
+        print(f"  ERROR: {name} failed verification "
+              f"(got {len(content):,} bytes, sha256 {digest[:12]}...; "
+              f"expected {entry['size']:,} bytes, sha256 {entry['sha256'][:12]}...)")
+        return False
+
+    # Write to a temp file and rename so a partial write never looks verified
+    tmp_path = output_path.with_suffix(output_path.suffix + '.part')
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, output_path)
+    print(f"  Saved: {output_path} ({len(content) / 1024:.1f} KB)")
+    return True
+
+
+def fetch_libraries(lib_dir: Path, mirror: str = None, force: bool = False) -> int:
+    """
+    Ensure every locked library is present and verified.
+    Returns the number of libraries that could not be fetched.
+    """
+    lock = load_lock(lib_dir)
+    names = list(lock) if force else verify_libraries(lib_dir, lock)
+
+    for name in lock:
+        if name not in names:
+            print(f"  {name} {lock[name]['version']}: present and verified")
+
+    if not names:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        results = list(executor.map(
+            lambda name: download_library(name, lock[name], lib_dir, mirror), names
+        ))
+    return results.count(False)
+
+
+def relock(lib_dir: Path):
+    """Record the SHA-256 and size of the current lib files in the lock manifest."""
+    lock = load_lock(lib_dir)
+    for name, entry in lock.items():
+        content = (lib_dir / name).read_bytes()
+        entry['sha256'] = sha256_bytes(content)
+        entry['size'] = len(content)
+        print(f"  {name} {entry['version']}: {entry['sha256']} ({entry['size']:,} bytes)")
+    (lib_dir / LOCK_FILE).write_text(json.dumps(lock, indent=2) + '\n', encoding='utf-8')
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Download and verify dashboard JavaScript libraries')
+    parser.add_argument('--mirror', default=os.environ.get(MIRROR_ENV),
+                        help=f'Local directory or base URL to fetch from instead of the CDNs (env: {MIRROR_ENV})')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-fetch libraries even if they are present and verified')
+    parser.add_argument('--relock', action='store_true',
+                        help=f'Update {LOCK_FILE} from the files currently in lib/ (after an upgrade)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     script_dir = Path(__file__).parent
     lib_dir = script_dir / 'lib'
-    
+
     # Ensure lib directory exists
     lib_dir.mkdir(exist_ok=True)
-    
+
     print("=" * 60)
     print("Indirect G&A Dashboard - JavaScript Library Bundler")
     print("=" * 60)
     print()
-    
-    success_count = 0
-    for name, url in LIBS.items():
-        if download_library(name, url, lib_dir):
-            success_count += 1
-    
+
+    if args.relock:
+        relock(lib_dir)
+        return 0
+
+    failed = fetch_libraries(lib_dir, mirror=args.mirror, force=args.force)
+
     print()
-    if success_count == len(LIBS):
-        print("All libraries downloaded successfully!")
+    if failed == 0:
+        print("All libraries present and verified!")
     else:
-        print(f"WARNING: {len(LIBS) - success_count} library(ies) failed to download.")
+        print(f"WARNING: {failed} library(ies) failed to download.")
         return 1
-    
+
     return 0
 
 if __name__ == "__main__":
     exit(main())
-
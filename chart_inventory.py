@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Streaming chart inventory for Excel workbooks.
+
+Lists the charts in an .xlsx without loading it in openpyxl: the workbook,
+relationship, drawing and xl/charts/*.xml parts are read straight from the
+zip with iterparse, and worksheet XML is only opened far enough to read its
+<dimension>. Files are inventoried in a process pool and results are cached
+by file content hash (the 'chart_inventory' section of
+chart_analysis_results.json), so re-running over a folder of reports only
+parses new or changed files.
+
+Used by analyze_charts.py and analyze_charts_simple.py (--inventory).
+"""
+
+import hashlib
+import json
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+CACHE_KEY = 'chart_inventory'
+INVENTORY_VERSION = 1
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+NS_CHART = '{http://schemas.openxmlformats.org/drawingml/2006/chart}'
+NS_DRAWING = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+
+# plotArea element -> openpyxl chart class name
+CHART_CLASSES = {
+    'barChart': 'BarChart',
+    'bar3DChart': 'BarChart3D',
+    'lineChart': 'LineChart',
+    'line3DChart': 'LineChart3D',
+    'pieChart': 'PieChart',
+    'pie3DChart': 'PieChart3D',
+    'doughnutChart': 'DoughnutChart',
+    'ofPieChart': 'ProjectedPieChart',
+    'areaChart': 'AreaChart',
+    'area3DChart': 'AreaChart3D',
+    'scatterChart': 'ScatterChart',
+    'radarChart': 'RadarChart',
+    'bubbleChart': 'BubbleChart',
+    'stockChart': 'StockChart',
+    'surfaceChart': 'SurfaceChart',
+    'surface3DChart': 'SurfaceChart3D',
+}
+
+# Same labels analyze_charts.py uses
+CHART_TYPE_NAMES = {
+    'BarChart': 'Bar Chart',
+    'LineChart': 'Line Chart',
+    'PieChart': 'Pie Chart',
+    'DoughnutChart': 'Doughnut Chart',
+    'AreaChart': 'Area Chart',
+    'ScatterChart': 'Scatter Chart',
+    'RadarChart': 'Radar Chart',
+    'BubbleChart': 'Bubble Chart',
+    'StockChart': 'Stock Chart',
+}
+
+
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ============================================================================
+# ZIP PART READERS
+# ============================================================================
+
+def _read_rels(zf: zipfile.ZipFile, part: str) -> dict:
+    """Return {rId: absolute part path} from the .rels file next to part."""
+    folder, name = posixpath.split(part)
+    rels_path = posixpath.join(folder, '_rels', name + '.rels')
+    if rels_path not in zf.NameToInfo:
+        return {}
+    rels = {}
+    with zf.open(rels_path) as f:
+        for _, elem in iterparse(f):
+            if elem.tag == NS_PKG_REL + 'Relationship' and elem.get('TargetMode') != 'External':
+                target = elem.get('Target', '')
+                if target.startswith('/'):
+                    rels[elem.get('Id')] = target.lstrip('/')
+                else:
+                    rels[elem.get('Id')] = posixpath.normpath(posixpath.join(folder, target))
+            elem.clear()
+    return rels
+
+
+def _workbook_sheets(zf: zipfile.ZipFile) -> list:
+    """Return [(sheet name, sheet part path)] in workbook order."""
+    rels = _read_rels(zf, 'xl/workbook.xml')
+    sheets = []
+    with zf.open('xl/workbook.xml') as f:
+        for _, elem in iterparse(f):
+            if elem.tag == NS_MAIN + 'sheet':
+                sheets.append((elem.get('name'), rels.get(elem.get(NS_REL + 'id'))))
+            elif elem.tag == NS_MAIN + 'sheets':
+                break
+    return sheets
+
+
+def _sheet_dimension(zf: zipfile.ZipFile, part: str) -> str:
+    """The sheet's <dimension ref>, reading only up to that element."""
+    if part not in zf.NameToInfo:
+        return None
+    with zf.open(part) as f:
+        for _, elem in iterparse(f):
+            if elem.tag == NS_MAIN + 'dimension':
+                return elem.get('ref')
+            if elem.tag == NS_MAIN + 'sheetData':
+                break
+    return None
+
+
+def _drawing_charts(zf: zipfile.ZipFile, sheet_part: str) -> list:
+    """Chart part paths anchored on a sheet, in drawing order."""
+    charts = []
+    for target in _read_rels(zf, sheet_part).values():
+        if not target.startswith('xl/drawings/') or target not in zf.NameToInfo:
+            continue
+        drawing_rels = _read_rels(zf, target)
+        with zf.open(target) as f:
+            for _, elem in iterparse(f):
+                if elem.tag == NS_CHART + 'chart':
+                    chart_part = drawing_rels.get(elem.get(NS_REL + 'id'))
+                    if chart_part in zf.NameToInfo:
+                        charts.append(chart_part)
+                elem.clear()
+    return charts
+
+
+def _text(elem) -> str:
+    """Concatenated <a:t> runs (rich text) or <c:v> (cached value) under elem."""
+    if elem is None:
+        return None
+    runs = [t.text or '' for t in elem.iter(NS_DRAWING + 't')]
+    if runs:
+        return ''.join(runs)
+    v = elem.find(f'.//{NS_CHART}v')
+    return v.text if v is not None else None
+
+
+def _ref(elem) -> str:
+    """Formula of the first numRef/strRef under elem."""
+    if elem is None:
+        return None
+    f = elem.find(f'.//{NS_CHART}f')
+    return f.text if f is not None else None
+
+
+def _parse_chart(zf: zipfile.ZipFile, part: str) -> dict:
+    """Type, title and series of one xl/charts/chartN.xml part."""
+    with zf.open(part) as f:
+        root = None
+        for _, elem in iterparse(f):
+            root = elem
+    chart = root.find(NS_CHART + 'chart')
+    plot_area = chart.find(NS_CHART + 'plotArea') if chart is not None else None
+    plots = [el for el in (plot_area if plot_area is not None else [])
+             if el.tag.startswith(NS_CHART) and el.tag[len(NS_CHART):] in CHART_CLASSES]
+
+    class_name = CHART_CLASSES[plots[0].tag[len(NS_CHART):]] if plots else 'Chart'
+    title = chart.find(NS_CHART + 'title') if chart is not None else None
+    details = {
+        'type': CHART_TYPE_NAMES.get(class_name, class_name),
+        'class': class_name,
+        'title': _text(title.find(NS_CHART + 'tx')) if title is not None else None,
+        'series_count': 0,
+        'series': [],
+        'part': part,
+    }
+    if plots:
+        first = plots[0]
+        for key, tag in (('bar_direction', 'barDir'), ('grouping', 'grouping'), ('subtype', 'scatterStyle')):
+            el = first.find(NS_CHART + tag)
+            if el is not None:
+                details[key] = el.get('val')
+    if len(plots) > 1:
+        details['combined'] = [CHART_CLASSES[p.tag[len(NS_CHART):]] for p in plots[1:]]
+
+    for plot in plots:
+        for ser in plot.findall(NS_CHART + 'ser'):
+            tx = ser.find(NS_CHART + 'tx')
+            details['series'].append({
+                'index': len(details['series']),
+                'title': _ref(tx) or _text(tx),
+                'values_ref': _ref(ser.find(NS_CHART + 'val')) or _ref(ser.find(NS_CHART + 'yVal')),
+                'categories_ref': _ref(ser.find(NS_CHART + 'cat')) or _ref(ser.find(NS_CHART + 'xVal')),
+            })
+    details['series_count'] = len(details['series'])
+    return details
+
+
+# ============================================================================
+# INVENTORY
+# ============================================================================
+
+def inventory_workbook(path) -> dict:
+    """Chart inventory of one .xlsx, shaped like analyze_charts.analyze_excel_file()."""
+    path = Path(path)
+    info = {'file_name': path.name, 'file_path': str(path), 'sheets': []}
+    try:
+        with zipfile.ZipFile(path) as zf:
+            for sheet_name, part in _workbook_sheets(zf):
+                dimension = _sheet_dimension(zf, part) if part else None
+                charts = []
+                for idx, chart_part in enumerate(_drawing_charts(zf, part) if part else []):
+                    chart = _parse_chart(zf, chart_part)
+                    chart['index'] = idx
+                    charts.append(chart)
+                info['sheets'].append({
+                    'sheet_name': sheet_name,
+                    'charts': charts,
+                    'data_range': f"A1:{dimension.split(':')[-1]}" if dimension else 'A1:A1',
+                })
+    except (OSError, KeyError, zipfile.BadZipFile, SyntaxError) as e:
+        info['error'] = str(e)
+    return info
+
+
+def load_inventory_cache(results_path: Path) -> dict:
+    """{sha256: inventory} from results_path, or {} if missing/outdated."""
+    try:
+        data = json.loads(Path(results_path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    cache = data.get(CACHE_KEY) if isinstance(data, dict) else None
+    if not isinstance(cache, dict) or cache.get('version') != INVENTORY_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_inventory_cache(results_path: Path, cache: dict, extra: dict = None):
+    """Write the cache into results_path, keeping its other sections (extra overrides them)."""
+    results_path = Path(results_path)
+    try:
+        data = json.loads(results_path.read_text(encoding='utf-8'))
+        if not isinstance(data, dict):
+            data = {}
+    except (OSError, ValueError):
+        data = {}
+    data.update(extra or {})
+    data[CACHE_KEY] = {'version': INVENTORY_VERSION, 'files': cache}
+    results_path.write_text(json.dumps(data, indent=2, default=str), encoding='utf-8')
+
+
+def expand_paths(paths) -> list:
+    """Files as given; directories expand to their *.xlsx (skipping ~$ lock files)."""
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.glob('*.xlsx') if not f.name.startswith('~$')))
+        elif p.exists():
+            files.append(p)
+        else:
+            print(f"File not found: {p}")
+    return files
+
+
+def inventory_files(paths, cache: dict, workers: int = None) -> list:
+    """
+    Inventory each workbook, reusing cache entries whose content hash matches.
+
+    Files are hashed in a process pool first; only the misses are then parsed
+    (also in the pool). The cache dict is updated in place.
+    """
+    paths = [str(p) for p in paths]
+    if not paths:
+        return []
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        hashes = dict(zip(paths, pool.map(file_sha256, map(Path, paths))))
+        misses = [p for p in paths if hashes[p] not in cache]
+        for path, info in zip(misses, pool.map(inventory_workbook, misses)):
+            if 'error' not in info:
+                cache[hashes[path]] = {k: v for k, v in info.items() if k not in ('file_name', 'file_path')}
+            results[path] = info
+    for path in paths:
+        if path not in results:
+            results[path] = {'file_name': Path(path).name, 'file_path': path, **cache[hashes[path]]}
+    return [results[p] for p in paths]
@@ -3,25 +3,63 @@
 Indirect G&A Cost Dashboard - Build & Deploy Pipeline
 
 Full automation for building and deploying the dashboard to GitHub Pages.
+
+The build runs in-process through build_dashboard.build(), and independent
+stages (remote sync, input conversion, library check) overlap on a thread
+pool, so deploy time approaches the longest stage rather than the sum.
 """
 
 import argparse
 import atexit
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
 from pathlib import Path
 
 
 # Configuration
 OUTPUT_FILE = "outputs/Indirect G&A Dashboard.html"
+SITE_DIR = "outputs/site"
 INDEX_FILE = "index.html"
 INPUT_DIR = "input"
 LOG_DIR = "logs"
+BACKUP_DIR = ".xlsx_backup_temp"
+DEPLOY_WORKTREE = ".deploy_worktree"
+HASH_CACHE_FILE = ".build_cache/xlsx_hashes.json"
+REMOTE = "origin"
+BRANCH = "main"
+
+PUBLISH_BRANCH = "gh-pages"
+
+# Publish modes:
+#   main   - commit index.html (and changed workbooks) on top of main
+#   orphan - force-push the build output as a single parentless commit to
+#            a publish branch/repo, keeping main code-only
+PUBLISH_MODES = ("main", "orphan")
+
+# Sync strategies:
+#   reset    - fetch + hard reset of this checkout (inputs are moved aside by rename)
+#   worktree - depth-1 fetch into a separate worktree; this checkout is never touched
+SYNC_STRATEGIES = ("reset", "worktree")
+
+# Build targets (see build_dashboard.TARGETS):
+#   single - one self-contained HTML file, copied to index.html
+#   split  - page + content-hashed assets in SITE_DIR (orphan publish only)
+TARGETS = ("single", "split")
 
 # Logging
 _log_file = None
+_log_lock = threading.Lock()
+_console = sys.stdout
 
 
 def setup_logging(script_dir: Path):
@@ -70,65 +108,106 @@ def log(message: str):
     timestamp = datetime.now().strftime("%H:%M:%S")
     log_message = f"[{timestamp}] {message}"
     
-    print(message)
+    with _log_lock:
+        print(message, file=_console, flush=True)
+        
+        if _log_file:
+            _log_file.write(log_message + "\n")
+            _log_file.flush()
+
+
+class _LogStream:
+    """File-like object that forwards complete lines to log(), per thread."""
     
-    if _log_file:
-        _log_file.write(log_message + "\n")
-        _log_file.flush()
+    def __init__(self, prefix: str = "    "):
+        self.prefix = prefix
+        self._local = threading.local()
+    
+    def write(self, text: str) -> int:
+        pending = getattr(self._local, 'buffer', '') + text
+        *lines, self._local.buffer = pending.split('\n')
+        for line in lines:
+            log(f"{self.prefix}{line}" if line else "")
+        return len(text)
+    
+    def flush(self):
+        pass
 
 
-def run_command(cmd: str, cwd: Path = None, capture: bool = False):
-    """Run a shell command and log output."""
+def run_command(cmd: str, cwd: Path = None, capture: bool = False, env: dict = None):
+    """Run a shell command, streaming its output to the log line by line."""
     log(f"  Running: {cmd}")
     
-    result = subprocess.run(
+    proc = subprocess.Popen(
         cmd,
         shell=True,
         cwd=cwd,
-        capture_output=True,
-        text=True
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1
     )
     
-    if result.stdout.strip():
-        for line in result.stdout.strip().split('\n'):
+    # Drain stderr on a helper thread so a chatty child can't block on a full pipe
+    stderr_lines = []
+    drain = threading.Thread(target=lambda: stderr_lines.extend(proc.stderr))
+    drain.start()
+    
+    stdout_lines = []
+    for line in proc.stdout:
+        line = line.rstrip('\n')
+        stdout_lines.append(line)
+        if line.strip():
             log(f"    {line}")
     
-    if result.returncode != 0:
-        if result.stderr.strip():
-            for line in result.stderr.strip().split('\n'):
-                log(f"    ERROR: {line}")
-        raise RuntimeError(f"Command failed with exit code {result.returncode}")
+    returncode = proc.wait()
+    drain.join()
+    
+    if returncode != 0:
+        for line in stderr_lines:
+            if line.strip():
+                log(f"    ERROR: {line.rstrip()}")
+        raise RuntimeError(f"Command failed with exit code {returncode}")
     
-    return result.stdout.strip() if capture else None
+    return '\n'.join(stdout_lines).strip() if capture else None
+
+
+def timed(name: str, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) and log how long it took."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    log(f"  [{name}] finished in {time.perf_counter() - start:.2f}s")
+    return result
 
 
 def backup_excel_files(script_dir: Path) -> Path:
-    """Backup Excel files before git operations."""
+    """Move Excel files out of the way before git operations (rename, no copy)."""
     input_dir = script_dir / INPUT_DIR
-    backup_dir = script_dir / ".xlsx_backup_temp"
+    backup_dir = script_dir / BACKUP_DIR
     
     # Find Excel files
     xlsx_files = list(input_dir.glob("*.xlsx"))
     if not xlsx_files:
         return None
     
-    log(f"  Backing up {len(xlsx_files)} Excel file(s)...")
+    log(f"  Moving {len(xlsx_files)} Excel file(s) aside...")
     
     # Create backup directory
     if backup_dir.exists():
         shutil.rmtree(backup_dir)
     backup_dir.mkdir()
     
-    # Copy files
+    # Rename into the backup directory (same filesystem, no data copied)
     for xlsx_file in xlsx_files:
-        shutil.copy2(xlsx_file, backup_dir / xlsx_file.name)
-        log(f"    Backed up: {xlsx_file.name}")
+        os.replace(xlsx_file, backup_dir / xlsx_file.name)
+        log(f"    Moved: {xlsx_file.name}")
     
     return backup_dir
 
 
 def restore_excel_files(script_dir: Path, backup_dir: Path):
-    """Restore Excel files after git operations."""
+    """Move Excel files back after git operations."""
     if not backup_dir or not backup_dir.exists():
         return
     
@@ -139,58 +218,175 @@ def restore_excel_files(script_dir: Path, backup_dir: Path):
     
     for backup_file in backup_dir.glob("*.xlsx"):
         dest_path = input_dir / backup_file.name
-        shutil.copy2(backup_file, dest_path)
+        os.replace(backup_file, dest_path)
         log(f"    Restored: {backup_file.name}")
     
     # Clean up backup
     shutil.rmtree(backup_dir)
 
 
-def sync_with_remote(script_dir: Path):
-    """Force sync with remote repository, preserving Excel files."""
-    log("\n[1/4] Syncing with remote repository...")
+def link_or_copy(src: Path, dest: Path):
+    """Hardlink src to dest, falling back to a copy across filesystems."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists():
+        dest.unlink()
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def git_blob_hash(path: Path) -> str:
+    """Compute the git blob id of a file without invoking git."""
+    digest = hashlib.sha1(f"blob {path.stat().st_size}\0".encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_hashes(script_dir: Path, paths: list) -> dict:
+    """Return {path: git blob id}, reusing cached ids for files whose size/mtime are unchanged."""
+    cache_path = script_dir / HASH_CACHE_FILE
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    
+    hashes = {}
+    for path in paths:
+        st = path.stat()
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = cache.get(path.name)
+        if entry and entry.get('stamp') == stamp:
+            hashes[path] = entry['blob']
+        else:
+            hashes[path] = git_blob_hash(path)
+            cache[path.name] = {'stamp': stamp, 'blob': hashes[path]}
     
-    # Backup Excel files
+    cache_path.parent.mkdir(exist_ok=True)
+    cache_path.write_text(json.dumps(cache, indent=2))
+    return hashes
+
+
+def changed_workbooks(script_dir: Path, repo_dir: Path) -> list:
+    """List input workbooks whose content differs from the committed version in repo_dir."""
+    xlsx_files = sorted((script_dir / INPUT_DIR).glob("*.xlsx"))
+    if not xlsx_files:
+        return []
+    
+    committed = {}
+    result = subprocess.run(
+        ["git", "ls-tree", "HEAD", f"{INPUT_DIR}/"],
+        cwd=repo_dir, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        meta, _, name = line.partition("\t")
+        committed[Path(name).name] = meta.split()[2]
+    
+    changed = []
+    for path, blob in workbook_hashes(script_dir, xlsx_files).items():
+        if committed.get(path.name) == blob:
+            log(f"  Unchanged, not staging: {path.name}")
+        else:
+            changed.append(path)
+    return changed
+
+
+def sync_with_remote(script_dir: Path, strategy: str = "reset") -> Path:
+    """
+    Sync with the remote repository, preserving Excel files.
+    
+    Returns the directory deploy commits should be made in: this checkout
+    for the reset strategy, or the deploy worktree for the worktree strategy.
+    """
+    log(f"\n[1/4] Syncing with remote repository ({strategy})...")
+    
+    if strategy == "worktree":
+        return sync_worktree(script_dir)
+    
+    # Move Excel files aside
     backup_dir = backup_excel_files(script_dir)
     
     try:
         # Fetch and reset
-        run_command("git fetch origin main", cwd=script_dir)
-        run_command("git checkout main", cwd=script_dir)
-        run_command("git reset --hard origin/main", cwd=script_dir)
-        run_command("git clean -fd", cwd=script_dir)
+        run_command(f"git fetch {REMOTE} {BRANCH}", cwd=script_dir)
+        run_command(f"git checkout {BRANCH}", cwd=script_dir)
+        run_command(f"git reset --hard {REMOTE}/{BRANCH}", cwd=script_dir)
+        run_command(f"git clean -fd -e {BACKUP_DIR}", cwd=script_dir)
         
         log("  Sync complete!")
     finally:
         # Always restore Excel files
         restore_excel_files(script_dir, backup_dir)
+    
+    return script_dir
+
+
+def sync_worktree(script_dir: Path) -> Path:
+    """
+    Point a separate, unpopulated worktree at the tip of the remote branch.
+    
+    Only the tip commit is fetched and nothing is checked out: the worktree's
+    index is loaded from the fetched tree and files are linked in at commit time.
+    """
+    worktree = script_dir / DEPLOY_WORKTREE
+    
+    run_command(f"git fetch --depth=1 {REMOTE} {BRANCH}", cwd=script_dir)
+    tip = run_command("git rev-parse FETCH_HEAD", cwd=script_dir, capture=True)
+    
+    if not (worktree / ".git").exists():
+        run_command(f'git worktree add --no-checkout --detach "{worktree}" {tip}', cwd=script_dir)
+    else:
+        run_command(f"git update-ref --no-deref HEAD {tip}", cwd=worktree)
+    run_command("git read-tree HEAD", cwd=worktree)
+    
+    log("  Sync complete!")
+    return worktree
 
 
 def check_libraries(script_dir: Path):
     """Check if JavaScript libraries exist, download if needed."""
     log("\n[2/4] Checking JavaScript libraries...")
     
+    import bundle_libs
     lib_dir = script_dir / "lib"
-    required_libs = ["chart.min.js", "papaparse.min.js"]
+    lock = bundle_libs.load_lock(lib_dir)
     
-    missing = [lib for lib in required_libs if not (lib_dir / lib).exists()]
+    missing = bundle_libs.verify_libraries(lib_dir, lock)
     
     if missing:
-        log(f"  Missing libraries: {', '.join(missing)}")
-        log("  Running bundle_libs.py...")
-        run_command(f"{sys.executable} bundle_libs.py", cwd=script_dir)
+        log(f"  Missing or unverified libraries: {', '.join(missing)}")
+        log("  Running bundle_libs...")
+        if bundle_libs.main([]) != 0:
+            raise RuntimeError("Library download failed")
     else:
-        log("  All libraries present!")
-        for lib in required_libs:
-            size_kb = (lib_dir / lib).stat().st_size / 1024
-            log(f"    {lib}: {size_kb:.1f} KB")
+        log("  All libraries present and verified!")
+        for lib, entry in lock.items():
+            size_kb = entry['size'] / 1024
+            log(f"    {lib} {entry['version']}: {size_kb:.1f} KB")
 
 
-def build_dashboard(script_dir: Path):
-    """Build the dashboard HTML file."""
-    log("\n[3/4] Building dashboard...")
+def convert_input(script_dir: Path):
+    """Read and transform the input workbook (independent of sync and libraries)."""
+    log("\n[3/4] Converting input data...")
+    
+    import build_dashboard as builder
+    return builder.convert_input(script_dir)
+
 
-    run_command(f"{sys.executable} build_dashboard.py", cwd=script_dir)
+def build_dashboard(script_dir: Path, converted: tuple = None, target: str = "single"):
+    """Build the dashboard in-process."""
+    log("\n[3/4] Building dashboard...")
+    
+    import build_dashboard as builder
+    result = builder.build(script_dir, converted=converted, target=target)
+    log(f"  Built {result['records']:,} records in {result['elapsed']:.2f}s")
+    
+    if target == "split":
+        size_mb = result['size'] / 1024 / 1024
+        log(f"  Site written to {SITE_DIR} ({size_mb:.2f} MB total)")
+        return
     
     # Copy to index.html
     output_path = script_dir / OUTPUT_FILE
@@ -206,19 +402,35 @@ def build_dashboard(script_dir: Path):
         raise RuntimeError(f"Build output not found: {output_path}")
 
 
-def commit_and_push(script_dir: Path, message: str = None):
-    """Commit changes and push to GitHub."""
+def commit_and_push(script_dir: Path, message: str = None, repo_dir: Path = None):
+    """
+    Commit changes and push to GitHub.
+    
+    repo_dir is the checkout to commit in (defaults to script_dir). When it
+    is a separate deploy worktree, the build output and changed workbooks
+    are hardlinked into it before staging.
+    """
     log("\n[4/4] Committing and pushing to GitHub...")
     
-    # Stage files
-    run_command("git add index.html", cwd=script_dir)
-    run_command(f"git add {INPUT_DIR}/*.xlsx", cwd=script_dir)
+    repo_dir = repo_dir or script_dir
+    in_worktree = repo_dir != script_dir
+    
+    # Stage files (workbooks only when their content actually changed)
+    workbooks = changed_workbooks(script_dir, repo_dir)
+    if in_worktree:
+        link_or_copy(script_dir / INDEX_FILE, repo_dir / INDEX_FILE)
+        for path in workbooks:
+            link_or_copy(path, repo_dir / INPUT_DIR / path.name)
+    
+    run_command(f"git add {INDEX_FILE}", cwd=repo_dir)
+    for path in workbooks:
+        run_command(f'git add "{INPUT_DIR}/{path.name}"', cwd=repo_dir)
     
     # Check if there are changes to commit
     result = subprocess.run(
         "git diff --cached --quiet",
         shell=True,
-        cwd=script_dir
+        cwd=repo_dir
     )
     
     if result.returncode == 0:
@@ -233,14 +445,63 @@ def commit_and_push(script_dir: Path, message: str = None):
         commit_message = f"Update Indirect G&A Dashboard ({timestamp})"
     
     # Commit
-    run_command(f'git commit -m "{commit_message}"', cwd=script_dir)
+    run_command(f'git commit -m "{commit_message}"', cwd=repo_dir)
     
     # Push
-    run_command("git push origin main", cwd=script_dir)
+    if in_worktree:
+        run_command(f"git push {REMOTE} HEAD:{BRANCH}", cwd=repo_dir)
+    else:
+        run_command(f"git push {REMOTE} {BRANCH}", cwd=repo_dir)
     
     log("  Push complete!")
 
 
+def publish_orphan(script_dir: Path, remote: str, branch: str, message: str = None, target: str = "single"):
+    """
+    Publish the build output as a single parentless commit on a publish branch.
+    
+    The commit is assembled with git plumbing in a throwaway index, so neither
+    the working tree nor the current branch is touched, and force-pushed to
+    remote (a remote name, URL or path - e.g. a local bare repository).
+    Each deploy replaces the previous one, so the publish history never grows.
+    For the split target the whole site directory is published.
+    """
+    log(f"\n[4/4] Publishing to {remote} {branch} (orphan commit)...")
+    
+    out_dir = script_dir / SITE_DIR if target == "split" else script_dir
+    index_path = out_dir / INDEX_FILE
+    if not index_path.exists():
+        raise RuntimeError(f"Build output not found: {index_path}")
+    
+    if target == "split":
+        files = {p.relative_to(out_dir).as_posix(): p for p in sorted(out_dir.rglob("*")) if p.is_file()}
+    else:
+        files = {INDEX_FILE: index_path}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        nojekyll = tmp_dir / ".nojekyll"
+        nojekyll.touch()
+        files[".nojekyll"] = nojekyll
+        
+        env = {**os.environ, "GIT_INDEX_FILE": str(tmp_dir / "index")}
+        for name, path in files.items():
+            blob = run_command(f'git hash-object -w "{path}"', cwd=script_dir, capture=True)
+            run_command(f'git update-index --add --cacheinfo 100644,{blob},"{name}"', cwd=script_dir, env=env)
+        tree = run_command("git write-tree", cwd=script_dir, capture=True, env=env)
+    
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    if message:
+        commit_message = f"{message} ({timestamp})"
+    else:
+        commit_message = f"Publish Indirect G&A Dashboard ({timestamp})"
+    
+    commit = run_command(f'git commit-tree {tree} -m "{commit_message}"', cwd=script_dir, capture=True)
+    run_command(f'git push --force "{remote}" {commit}:refs/heads/{branch}', cwd=script_dir)
+    
+    log("  Publish complete!")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Build and deploy Indirect G&A Cost Dashboard"
@@ -260,8 +521,41 @@ def main():
         action="store_true",
         help="Only build, don't commit or push"
     )
+    parser.add_argument(
+        "--sync-strategy",
+        choices=SYNC_STRATEGIES,
+        default="reset",
+        help="reset: hard-reset this checkout to the remote (default); "
+             "worktree: depth-1 fetch into a separate deploy worktree, leaving this checkout untouched"
+    )
+    parser.add_argument(
+        "--publish",
+        choices=PUBLISH_MODES,
+        default="main",
+        help="main: commit the build to main (default); "
+             "orphan: force-push it as a single commit to --publish-branch, keeping main code-only"
+    )
+    parser.add_argument(
+        "--publish-remote",
+        default=REMOTE,
+        help=f"Remote name, URL or path to publish to in orphan mode (default: {REMOTE})"
+    )
+    parser.add_argument(
+        "--publish-branch",
+        default=PUBLISH_BRANCH,
+        help=f"Branch to publish to in orphan mode (default: {PUBLISH_BRANCH})"
+    )
+    parser.add_argument(
+        "--target",
+        choices=TARGETS,
+        default="single",
+        help="single: one self-contained HTML file (default, SharePoint); "
+             f"split: content-hashed assets in {SITE_DIR} so repeat visits only fetch new data"
+    )
     
     args = parser.parse_args()
+    if args.target == "split" and args.publish == "main" and not args.build_only:
+        parser.error("--target split is published with --publish orphan (or use --build-only)")
     
     script_dir = Path(__file__).parent.resolve()
     
@@ -275,23 +569,42 @@ def main():
     log(f"Log file: {log_path}")
     
     try:
-        # Step 1: Sync with remote
-        if not args.skip_sync and not args.build_only:
-            sync_with_remote(script_dir)
-        else:
+        start = time.perf_counter()
+        do_sync = not args.skip_sync and not args.build_only
+        repo_dir = script_dir
+        if not do_sync:
             log("\n[1/4] Skipping remote sync")
+            if args.sync_strategy == "worktree" and (script_dir / DEPLOY_WORKTREE / ".git").exists():
+                repo_dir = script_dir / DEPLOY_WORKTREE
         
-        # Step 2: Check libraries
-        check_libraries(script_dir)
+        with ThreadPoolExecutor(max_workers=3) as pool, redirect_stdout(_LogStream()):
+            # Step 1: Sync with remote. The reset strategy rewrites this
+            # checkout (templates, libraries, inputs), so nothing may overlap
+            # it; the worktree strategy never touches it and runs alongside.
+            sync_future = None
+            if do_sync and args.sync_strategy == "reset":
+                repo_dir = timed("sync", sync_with_remote, script_dir, args.sync_strategy)
+            elif do_sync:
+                sync_future = pool.submit(timed, "sync", sync_with_remote, script_dir, args.sync_strategy)
+            
+            # Steps 2-3: Libraries and input conversion are independent
+            convert_future = pool.submit(timed, "convert", convert_input, script_dir)
+            libs_future = pool.submit(timed, "libraries", check_libraries, script_dir)
+            
+            libs_future.result()
+            timed("build", build_dashboard, script_dir, convert_future.result(), args.target)
+            if sync_future:
+                repo_dir = sync_future.result()
         
-        # Step 3: Build dashboard
-        build_dashboard(script_dir)
+        log(f"\n  Build stages completed in {time.perf_counter() - start:.2f}s")
         
         # Step 4: Commit and push
-        if not args.build_only:
-            commit_and_push(script_dir, args.message)
-        else:
+        if args.build_only:
             log("\n[4/4] Skipping commit and push (build-only mode)")
+        elif args.publish == "orphan":
+            publish_orphan(script_dir, args.publish_remote, args.publish_branch, args.message, args.target)
+        else:
+            commit_and_push(script_dir, args.message, repo_dir)
         
         print()
         print("=" * 60)
@@ -0,0 +1,79 @@
+// === CHART MANAGER ===
+// Each chart is created once and then updated in place: labels, datasets and
+// options are swapped on the existing Chart instance, and every pending
+// chart.update() runs together in the next animation frame. A chart is only
+// rebuilt when its type changes. Size thresholds come from CHART_LIMITS.
+
+const pendingChartUpdates = new Set();
+let chartUpdateFrame = 0;
+
+/** Create charts[key] on canvasId, or update the existing instance with config. */
+function renderChart(key, canvasId, config) {
+    const chart = charts[key];
+    if (chart && chart.config.type === config.type) {
+        chart.data.labels = config.data.labels;
+        syncChartDatasets(chart.data.datasets, config.data.datasets);
+        chart.options = config.options || {};
+        scheduleChartUpdate(chart);
+        return chart;
+    }
+    destroyChart(key);
+    charts[key] = new Chart(document.getElementById(canvasId).getContext('2d'), config);
+    return charts[key];
+}
+
+function destroyChart(key) {
+    const chart = charts[key];
+    if (!chart) return;
+    pendingChartUpdates.delete(chart);
+    chart.destroy();
+    delete charts[key];
+}
+
+/** Copy next datasets onto the current dataset objects, keeping their identity. */
+function syncChartDatasets(current, next) {
+    for (let i = 0; i < next.length; i++) {
+        const ds = current[i];
+        if (!ds || ds.type !== next[i].type) {
+            current[i] = next[i];
+            continue;
+        }
+        for (const k of Object.keys(ds)) if (!(k in next[i])) delete ds[k];
+        Object.assign(ds, next[i]);
+    }
+    current.length = next.length;
+}
+
+function scheduleChartUpdate(chart) {
+    pendingChartUpdates.add(chart);
+    if (chartUpdateFrame) return;
+    chartUpdateFrame = requestAnimationFrame(() => {
+        chartUpdateFrame = 0;
+        const batch = [...pendingChartUpdates];
+        pendingChartUpdates.clear();
+        batch.forEach(c => c.update());
+    });
+}
+
+// ── Size limits ──
+
+/** Split n points into at most maxPoints consecutive [start, end] index ranges. */
+function chartBuckets(n, maxPoints) {
+    const size = maxPoints > 0 && n > maxPoints ? Math.ceil(n / maxPoints) : 1;
+    const buckets = [];
+    for (let s = 0; s < n; s += size) buckets.push([s, Math.min(s + size, n) - 1]);
+    return buckets;
+}
+
+/**
+ * Keep the first `limit` ranked [label, value] entries and fold the rest
+ * into one [`Other (n)`, merged] entry flagged with `.folded = true`.
+ * merge(a, b) combines two values (default: addition).
+ */
+function foldChartEntries(entries, limit, merge = (a, b) => a + b) {
+    if (!(limit > 0) || entries.length <= limit) return entries;
+    const rest = entries.slice(limit);
+    const other = [`Other (${rest.length})`, rest.map(e => e[1]).reduce(merge)];
+    other.folded = true;
+    return [...entries.slice(0, limit), other];
+}
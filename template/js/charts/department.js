@@ -15,9 +15,8 @@ function renderDepartmentChart() {
     const ctx = document.getElementById('departmentChart').getContext('2d');
     if (charts.dept) charts.dept.destroy();
 
-    if (comparisonMode && periodAData.length > 0 && periodBData.length > 0) {
-        const deptDataA = aggregateDeptData(periodAData);
-        const deptDataB = aggregateDeptData(periodBData);
+    if (comparisonMode && comparisonHasData()) {
+        const [deptDataA, deptDataB] = comparisonRows().map(aggregateDeptData);
 
         // Combine keys from both periods
         const allDepts = [...new Set([...Object.keys(deptDataA), ...Object.keys(deptDataB)])];
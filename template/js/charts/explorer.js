@@ -14,46 +14,17 @@ const EXPLORER_DIMENSIONS = {
 };
 
 function aggregateExplorerData(data, dimension, metric) {
-    // Use cached metrics if available
-    if (cachedMetrics) {
-        const cacheMap = {
-            'division': cachedMetrics.byDivision,
-            'deptcat': cachedMetrics.byDeptCategory,
-            'department': cachedMetrics.byDepartment,
-            'doctype': cachedMetrics.byDocType,
-            'costtype': cachedMetrics.byCostType
-        };
-        if (cacheMap[dimension] && Object.keys(cacheMap[dimension]).length > 0) {
-            return cacheMap[dimension];
-        }
-    }
-
-    // Fallback: compute from scratch
-    const config = EXPLORER_DIMENSIONS[dimension];
-    const result = {};
-
-    data.forEach(r => {
-        // Optionally exclude allocation codes
-        if (config.excludeAlloc && String(r['Cost Type'] || '').startsWith('693')) {
-            return;
-        }
-
-        let key = r[config.field] || 'Unknown';
-
-        // For doc types, include the code name
-        if (dimension === 'doctype' && DOC_TYPE_NAMES[key]) {
-            key = `${key} - ${DOC_TYPE_NAMES[key]}`;
-        }
-
-        if (!result[key]) {
-            result[key] = { amount: 0, count: 0 };
-        }
-
-        result[key].amount += (r['Actual Amount'] || 0);
-        result[key].count += 1;
-    });
-
-    return result;
+    // Use cached metrics if available; otherwise aggregate the given rows
+    // (computeAllMetrics builds every explorer dimension in one pass)
+    const metrics = cachedMetrics || computeAllMetrics(data);
+    const cacheMap = {
+        'division': metrics.byDivision,
+        'deptcat': metrics.byDeptCategory,
+        'department': metrics.byDepartment,
+        'doctype': metrics.byDocType,
+        'costtype': metrics.byCostType
+    };
+    return cacheMap[dimension] || {};
 }
 
 function sortExplorerData(data, sort, limit) {
@@ -75,13 +46,12 @@ function sortExplorerData(data, sort, limit) {
         entries = entries.slice(0, limit);
     }
 
-    return entries;
+    // "All" still caps the bar count; the tail is folded into one bar
+    return foldChartEntries(entries, CHART_LIMITS.maxCategories,
+        (a, b) => ({ amount: a.amount + b.amount, count: a.count + b.count }));
 }
 
 function renderExplorerChart() {
-    const ctx = document.getElementById('explorerChart').getContext('2d');
-    if (charts.explorer) charts.explorer.destroy();
-
     const config = EXPLORER_DIMENSIONS[explorerDimension];
     const aggData = aggregateExplorerData(filteredData, explorerDimension, explorerMetric);
     const sorted = sortExplorerData(aggData, explorerSort, explorerLimit);
@@ -121,7 +91,7 @@ function renderExplorerChart() {
     // Generate colors
     const barColors = sorted.map((_, i) => PALETTE[i % PALETTE.length] + 'cc');
 
-    charts.explorer = new Chart(ctx, {
+    renderChart('explorer', 'explorerChart', {
         type: 'bar',
         data: {
             labels,
@@ -174,7 +144,7 @@ function renderExplorerChart() {
                 }
             },
             onClick: (e, el) => {
-                if (el.length > 0) {
+                if (el.length > 0 && !sorted[el[0].index].folded) {
                     const label = fullLabels[el[0].index];
                     const config = EXPLORER_DIMENSIONS[explorerDimension];
 
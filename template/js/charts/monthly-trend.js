@@ -7,78 +7,65 @@ function aggregateMonthlyData(data, useCache) {
     }
 
     // Compute from scratch (always used for comparison period data)
-    const monthlyAgg = {};
-    data.forEach(r => {
-        const m = (r['G/L Date'] || '').substring(0, 7);
-        if (!m) return;
-        if (!monthlyAgg[m]) monthlyAgg[m] = { total: 0, gross: 0, alloc: 0, ga: 0, in: 0, manhours: 0, byDiv: {}, byDept: {}, byDeptCat: {} };
-        const amt = r['Actual Amount'] || 0;
-        const ct = String(r['Cost Type'] || '');
-        const isAlloc = ct.startsWith('693');
-
-        monthlyAgg[m].total += amt;
-        if (isAlloc) monthlyAgg[m].alloc += amt; else monthlyAgg[m].gross += amt;
-        if (r['Job Type'] === 'GA') monthlyAgg[m].ga += amt;
-        else if (r['Job Type'] === 'IN') monthlyAgg[m].in += amt;
-
-        // Track manhours for T2/JE with 511* cost types only
-        const docType = r['Document Type'] || '';
-        if (MANHOUR_DOC_TYPES.includes(docType) && ct.startsWith(MANHOUR_COST_PREFIX)) {
-            monthlyAgg[m].manhours += Math.abs(r['Actual Units'] || 0);
-        }
-
-        if (!isAlloc) {
-            const div = r['Division Name'] || 'Unknown';
-            const dept = r['Department'] || 'Unknown';
-            const deptCat = r['Dept_Category'] || 'Other';
-            monthlyAgg[m].byDiv[div] = (monthlyAgg[m].byDiv[div] || 0) + amt;
-            monthlyAgg[m].byDept[dept] = (monthlyAgg[m].byDept[dept] || 0) + amt;
-            monthlyAgg[m].byDeptCat[deptCat] = (monthlyAgg[m].byDeptCat[deptCat] || 0) + amt;
-        }
-    });
-    return monthlyAgg;
+    return computeAllMetrics(data).monthlyAgg;
 }
 
 // Aggregate data by a dimension for comparison mode
 function aggregateByDimension(data, dimension) {
-    const result = {};
-    data.forEach(r => {
-        const ct = String(r['Cost Type'] || '');
-        const isAlloc = ct.startsWith('693');
-        if (isAlloc) return; // Exclude allocations for breakdown views
-
-        let key;
-        switch (dimension) {
-            case 'division': key = r['Division Name'] || 'Unknown'; break;
-            case 'department': key = r['Department'] || 'Unknown'; break;
-            case 'deptcat': key = r['Dept_Category'] || 'Other'; break;
-            case 'jobtype': key = r['Job Type'] || 'Unknown'; break;
-            default: key = 'Unknown';
+    switch (dimension) {
+        case 'division': return datasetSumBy(rawData, data, 'Division Name', 'Unknown', true);
+        case 'department': return datasetSumBy(rawData, data, 'Department', 'Unknown', true);
+        case 'deptcat': return datasetSumBy(rawData, data, 'Dept_Category', 'Other', true);
+        case 'jobtype': return datasetSumBy(rawData, data, 'Job Type', 'Unknown', true);
+        default: {
+            const sums = datasetSumBy(rawData, data, 'Job Type', 'Unknown', true);
+            return { Unknown: Object.values(sums).reduce((a, b) => a + b, 0) };
         }
-        result[key] = (result[key] || 0) + (r['Actual Amount'] || 0);
-    });
-    return result;
+    }
 }
 
 // Aggregate GA vs IN data including allocations for totals
 function aggregateJobTypeData(data) {
-    const result = { GA: 0, IN: 0 };
-    data.forEach(r => {
-        const jt = r['Job Type'];
-        if (jt === 'GA') result.GA += (r['Actual Amount'] || 0);
-        else if (jt === 'IN') result.IN += (r['Actual Amount'] || 0);
-    });
-    return result;
+    const sums = datasetSumBy(rawData, data, 'Job Type');
+    return { GA: sums.GA || 0, IN: sums.IN || 0 };
 }
 
-function renderMonthlyTrend() {
-    const ctx = document.getElementById('monthlyTrendChart').getContext('2d');
-    if (charts.monthly) charts.monthly.destroy();
+/**
+ * Merge consecutive months so at most CHART_LIMITS.maxPoints remain.
+ * Each bucket is keyed by its first month; spans[key] = { last, label }
+ * (null when no bucketing was needed).
+ */
+function bucketMonthlyAgg(monthlyAgg) {
+    const months = Object.keys(monthlyAgg).sort();
+    const buckets = chartBuckets(months.length, CHART_LIMITS.maxPoints);
+    if (buckets.length === months.length) return { monthlyAgg, months, spans: null };
+
+    const merged = {}, spans = {}, keys = [];
+    for (const [start, end] of buckets) {
+        const key = months[start], last = months[end];
+        const agg = {};
+        for (let i = start; i <= end; i++) {
+            for (const [field, value] of Object.entries(monthlyAgg[months[i]])) {
+                if (typeof value === 'number') agg[field] = (agg[field] || 0) + value;
+                else {
+                    const sums = agg[field] || (agg[field] = {});
+                    for (const [k, v] of Object.entries(value)) sums[k] = (sums[k] || 0) + v;
+                }
+            }
+        }
+        merged[key] = agg;
+        spans[key] = { last, label: key === last ? formatMonthLabel(key) : `${formatMonthLabel(key)} - ${formatMonthLabel(last)}` };
+        keys.push(key);
+    }
+    return { monthlyAgg: merged, months: keys, spans };
+}
 
+function renderMonthlyTrend() {
     // Comparison mode: show grouped bar chart based on trendView
-    if (comparisonMode && periodAData.length > 0 && periodBData.length > 0) {
-        const aggA = aggregateMonthlyData(periodAData, false);
-        const aggB = aggregateMonthlyData(periodBData, false);
+    if (comparisonMode && comparisonHasData()) {
+        // Served from the month x dimension cube; rows only for Job Type and Department
+        const aggA = periodMonthlyAgg(periodA);
+        const aggB = periodMonthlyAgg(periodB);
 
         const monthsA = Object.keys(aggA).sort();
         const monthsB = Object.keys(aggB).sort();
@@ -184,8 +171,7 @@ function renderMonthlyTrend() {
             };
         } else if (trendView === 'by-jobtype') {
             // GA vs IN comparison
-            const jtA = aggregateJobTypeData(periodAData);
-            const jtB = aggregateJobTypeData(periodBData);
+            const [jtA, jtB] = comparisonRows().map(aggregateJobTypeData);
 
             labels = ['G&A', 'Indirect'];
             subtitle = `G&A vs Indirect: Period A (${subtitleA}) vs Period B (${subtitleB})`;
@@ -235,8 +221,7 @@ function renderMonthlyTrend() {
             const labelMap = { 'by-division': 'Division', 'by-department': 'Department', 'by-deptcat': 'Dept Category' };
             const dimension = dimensionMap[trendView];
 
-            const dataA = aggregateByDimension(periodAData, dimension);
-            const dataB = aggregateByDimension(periodBData, dimension);
+            const [dataA, dataB] = comparisonByDimension(dimension);
 
             // Get all unique keys from both periods, sort by combined total
             const allKeys = [...new Set([...Object.keys(dataA), ...Object.keys(dataB)])];
@@ -310,7 +295,7 @@ function renderMonthlyTrend() {
 
         document.getElementById('monthlyTrendSubtitle').textContent = subtitle;
 
-        charts.monthly = new Chart(ctx, {
+        renderChart('monthly', 'monthlyTrendChart', {
             type: 'bar',
             data: { labels, datasets },
             options: chartOptions
@@ -318,10 +303,10 @@ function renderMonthlyTrend() {
         return;
     }
 
-    // Standard mode
-    const monthlyAgg = aggregateMonthlyData(filteredData);
-    const months = Object.keys(monthlyAgg).sort();
-    const labels = months.map(formatMonthLabel);
+    // Standard mode (long ranges are bucketed to CHART_LIMITS.maxPoints bars)
+    const { monthlyAgg, months, spans } = bucketMonthlyAgg(aggregateMonthlyData(filteredData));
+    const monthLabel = m => spans ? spans[m].label : formatMonthLabel(m);
+    const labels = months.map(monthLabel);
     let datasets = [];
     let subtitle = '';
 
@@ -356,8 +341,8 @@ function renderMonthlyTrend() {
             { label: 'Indirect', data: months.map(m => monthlyAgg[m].in), backgroundColor: COLORS.cyan + 'cc', stack: 'stack1' }
         ];
     } else {
-        // Show top 15 items + "Other" bucket
-        const MAX_LEGEND = 15;
+        // Show the top CHART_LIMITS.maxSeries items + "Other" bucket
+        const MAX_LEGEND = CHART_LIMITS.maxSeries;
         const keyMap = { 'by-division': 'byDiv', 'by-department': 'byDept', 'by-deptcat': 'byDeptCat' };
         const key = keyMap[trendView];
         const labelMap = { 'by-division': 'division', 'by-department': 'department', 'by-deptcat': 'dept category' };
@@ -404,7 +389,7 @@ function renderMonthlyTrend() {
 
     document.getElementById('monthlyTrendSubtitle').textContent = subtitle;
 
-    charts.monthly = new Chart(ctx, {
+    renderChart('monthly', 'monthlyTrendChart', {
         type: 'bar',
         data: { labels, datasets },
         options: {
@@ -419,7 +404,7 @@ function renderMonthlyTrend() {
                             if (!items.length) return '';
                             const idx = items[0].dataIndex;
                             const currentMonth = months[idx];
-                            return formatMonthLabel(currentMonth);
+                            return monthLabel(currentMonth);
                         },
                         label: ctx => {
                             if (ctx.dataset.label === 'Manhours') {
@@ -449,7 +434,7 @@ function renderMonthlyTrend() {
                                     const prevNet = prevGross + monthlyAgg[prevMonth].alloc;
 
                                     lines.push('\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500\u2500');
-                                    lines.push(`vs ${formatMonthLabel(prevMonth)}:`);
+                                    lines.push(`vs ${monthLabel(prevMonth)}:`);
 
                                     const grossChange = prevGross !== 0 ? ((gross - prevGross) / Math.abs(prevGross) * 100).toFixed(1) : '0.0';
                                     const netChange = prevNet !== 0 ? ((net - prevNet) / Math.abs(prevNet) * 100).toFixed(1) : '0.0';
@@ -466,7 +451,7 @@ function renderMonthlyTrend() {
                                     const lyGross = monthlyAgg[lastYearMonth].gross;
                                     const lyNet = lyGross + monthlyAgg[lastYearMonth].alloc;
 
-                                    lines.push(`vs ${formatMonthLabel(lastYearMonth)}:`);
+                                    lines.push(`vs ${monthLabel(lastYearMonth)}:`);
                                     const grossYoY = lyGross !== 0 ? ((gross - lyGross) / Math.abs(lyGross) * 100).toFixed(1) : '0.0';
                                     const netYoY = lyNet !== 0 ? ((net - lyNet) / Math.abs(lyNet) * 100).toFixed(1) : '0.0';
                                     const grossYoYArrow = gross > lyGross ? '\u25b2' : (gross < lyGross ? '\u25bc' : '-');
@@ -508,7 +493,11 @@ function renderMonthlyTrend() {
             onClick: (e, el) => {
                 if (el.length > 0) {
                     const m = months[el[0].index];
-                    openDrill(`${formatMonthLabel(m)}`, `All transactions for ${formatMonthLabel(m)}`, r => (r['G/L Date']||'').startsWith(m));
+                    const last = spans ? spans[m].last : m;
+                    openDrill(monthLabel(m), `All transactions for ${monthLabel(m)}`, r => {
+                        const month = (r['G/L Date'] || '').substring(0, 7);
+                        return month !== '' && month >= m && month <= last;
+                    });
                 }
             }
         }
@@ -1,8 +1,9 @@
 // === COMPARISON MODE ===
 
 let comparisonMode = false;
-let periodAData = [];
-let periodBData = [];
+let periodAData = new Int32Array(0);   // Row indices into rawData, built on demand (comparisonRows)
+let periodBData = new Int32Array(0);
+let periodRowsReady = false;
 let currentPeriodType = 'month'; // 'month', 'quarter', 'year'
 
 // Available periods extracted from data
@@ -38,18 +39,23 @@ function initComparisonFilters() {
 }
 
 function extractAvailablePeriods() {
-    const dates = rawData.map(r => r['G/L Date']).filter(Boolean).sort();
-    if (dates.length === 0) return;
+    // Distinct months come from the cube's month axis
+    const cube = datasetCube(rawData);
+    const monthKeys = new Set();
+    for (let k = 0; k < cube.length; k++) {
+        if (cube.months[k]) monthKeys.add(cube.months[k]);
+    }
+    if (monthKeys.size === 0) return;
 
     // Extract unique months with data
     const monthSet = new Set();
     const quarterSet = new Set();
     const yearSet = new Set();
 
-    dates.forEach(date => {
-        const year = date.substring(0, 4);
-        const month = date.substring(0, 7);
-        const q = Math.ceil(parseInt(date.substring(5, 7)) / 3);
+    monthKeys.forEach(key => {
+        const month = monthKeyToString(key);
+        const year = month.substring(0, 4);
+        const q = Math.ceil(parseInt(month.substring(5, 7)) / 3);
 
         monthSet.add(month);
         quarterSet.add(`${year}-Q${q}`);
@@ -204,8 +210,8 @@ function getLastDayOfMonth(monthStr) {
 }
 
 function initComparisonMultiselects() {
-    const divisions = [...new Set(rawData.map(r => r['Division Name']).filter(Boolean))].sort();
-    const deptCategories = [...new Set(rawData.map(r => r['Dept_Category']).filter(Boolean))].sort();
+    const divisions = datasetDistinct(rawData, 'Division Name');
+    const deptCategories = datasetDistinct(rawData, 'Dept_Category');
 
     // Populate divisions multiselect
     const divisionsOptions = document.getElementById('compareDivisionsOptions');
@@ -333,8 +339,7 @@ function updateComparisonWarnings() {
     if (valA) {
         const range = getPeriodDateRange(valA, currentPeriodType);
         const testPeriod = { startDate: range.start, endDate: range.end, divisions: [], deptCategories: [], docTypes: [] };
-        const data = filterDataForPeriod(rawData, testPeriod);
-        if (data.length === 0) {
+        if (periodTotals(testPeriod).rows === 0) {
             warnings.push(`Period A has no data`);
         }
     }
@@ -343,8 +348,7 @@ function updateComparisonWarnings() {
     if (valB) {
         const range = getPeriodDateRange(valB, currentPeriodType);
         const testPeriod = { startDate: range.start, endDate: range.end, divisions: [], deptCategories: [], docTypes: [] };
-        const data = filterDataForPeriod(rawData, testPeriod);
-        if (data.length === 0) {
+        if (periodTotals(testPeriod).rows === 0) {
             warnings.push(`Period B has no data`);
         }
     }
@@ -358,20 +362,116 @@ function updateComparisonWarnings() {
     }
 }
 
-function filterDataForPeriod(data, period) {
-    return data.filter(row => {
-        if (period.startDate && row['G/L Date'] < period.startDate) return false;
-        if (period.endDate && row['G/L Date'] > period.endDate) return false;
-        if (period.divisions.length > 0 && !period.divisions.includes(row['Division Name'])) return false;
-        if (period.deptCategories.length > 0 && !period.deptCategories.includes(row['Dept_Category'])) return false;
-        if (period.docTypes.length > 0 && !period.docTypes.includes(row['Document Type'])) return false;
-        return true;
+// Trend breakdowns (aggregateByDimension) the cube holds: [field, fallback label]
+const CUBE_BREAKDOWNS = { division: ['Division Name', 'Unknown'], deptcat: ['Dept_Category', 'Other'] };
+
+/**
+ * cubeTotals()/cubeGroupTotals() arguments for a period. Periods always span
+ * whole months (see getPeriodDateRange), so month-level cells give the same
+ * result as rows.
+ */
+function periodCubeQuery(period) {
+    const fromMonth = period.startDate ? (dateKeyFromString(period.startDate) / 100) | 0 : 0;
+    const toMonth = period.endDate ? (dateKeyFromString(period.endDate) / 100) | 0 : 0;
+    const masks = {};
+    [
+        ['Division Name', period.divisions],
+        ['Dept_Category', period.deptCategories],
+        ['Document Type', period.docTypes]
+    ].forEach(([field, selected]) => {
+        if (selected.length > 0) masks[field] = datasetCodeMask(rawData, field, selected);
+    });
+    return [datasetCube(rawData), fromMonth, toMonth, masks];
+}
+
+function periodTotals(period) {
+    return cubeTotals(...periodCubeQuery(period));
+}
+
+/** Monthly gross/alloc of a period from the cube, keyed like computeAllMetrics().monthlyAgg. */
+function periodMonthlyAgg(period) {
+    const agg = {};
+    [...cubeGroupTotals(...periodCubeQuery(period))]
+        .filter(([m]) => m)
+        .sort(([a], [b]) => a - b)
+        .forEach(([m, t]) => { agg[monthKeyToString(m)] = { gross: t.gross, alloc: t.alloc }; });
+    return agg;
+}
+
+/**
+ * Gross (non-allocation) amounts of a period by a cube dimension, labelled
+ * like datasetSumBy(). Codes whose cells carry no gross amount are left out.
+ */
+function periodSumBy(period, field, fallback) {
+    const values = datasetColumn(rawData, field).values;
+    const sums = new Float64Array(values.length), counts = new Uint32Array(values.length);
+    cubeGroupTotals(...periodCubeQuery(period), field).forEach((t, code) => {
+        sums[code] += t.gross;
+        if (t.gross !== 0) counts[code] += t.rows;
     });
+    return codeTotalsToObject(values, sums, counts, fallback).amounts;
+}
+
+/** Trend breakdown of both periods: from the cube where it holds the dimension, else from rows. */
+function comparisonByDimension(dimension) {
+    const breakdown = CUBE_BREAKDOWNS[dimension];
+    if (breakdown) return [periodA, periodB].map(p => periodSumBy(p, ...breakdown));
+    return comparisonRows().map(rows => aggregateByDimension(rows, dimension));
+}
+
+/**
+ * Row indices of both periods, for the breakdowns the cube cannot serve
+ * (Job Type, Department). Built on first use after each applyComparison.
+ */
+function comparisonRows() {
+    if (!periodRowsReady) {
+        periodAData = filterDataForPeriod(rawData, periodA);
+        periodBData = filterDataForPeriod(rawData, periodB);
+        periodRowsReady = true;
+    }
+    return [periodAData, periodBData];
+}
+
+/** Both periods have rows (cube row counts). */
+function comparisonHasData() {
+    return periodTotals(periodA).rows > 0 && periodTotals(periodB).rows > 0;
+}
+
+// Row subsets for the comparison charts
+function filterDataForPeriod(ds, period) {
+    const startKey = period.startDate ? dateKeyFromString(period.startDate) : 0;
+    const endKey = period.endDate ? dateKeyFromString(period.endDate) : 0;
+    const masks = [
+        ['Division Name', period.divisions],
+        ['Dept_Category', period.deptCategories],
+        ['Document Type', period.docTypes]
+    ].filter(([, selected]) => selected.length > 0)
+     .map(([field, selected]) => ({ mask: datasetCodeMask(ds, field, selected), codes: datasetColumn(ds, field).codes }));
+
+    const dates = ds.dates;
+    const out = new Int32Array(ds.length);
+    let n = 0;
+    rows: for (let i = 0; i < ds.length; i++) {
+        if (startKey && dates[i] < startKey) continue;
+        if (endKey && dates[i] > endKey) continue;
+        for (const m of masks) if (!m.mask[m.codes[i]]) continue rows;
+        out[n++] = i;
+    }
+    return out.slice(0, n);
 }
 
 function applyComparison() {
     updatePeriodFromSelects();
 
+    // Sharded data: fetch the shards both periods reach first
+    const loading = [periodA, periodB]
+        .map(p => ensureShardsLoaded(dateKeyFromString(p.startDate), dateKeyFromString(p.endDate)))
+        .filter(Boolean);
+    if (loading.length > 0) {
+        Promise.all(loading).then(applyComparison, e => console.error('Loading data shards failed:', e));
+        return;
+    }
+
     // Apply shared filters to both periods
     periodA.divisions = [...selectedDivisions];
     periodA.deptCategories = [...selectedCategories];
@@ -381,8 +481,9 @@ function applyComparison() {
     periodB.deptCategories = [...selectedCategories];
     periodB.docTypes = [];
 
-    periodAData = filterDataForPeriod(rawData, periodA);
-    periodBData = filterDataForPeriod(rawData, periodB);
+    periodAData = new Int32Array(0);
+    periodBData = new Int32Array(0);
+    periodRowsReady = false;
 
     comparisonMode = true;
     updateComparisonKPIs();
@@ -391,8 +492,9 @@ function applyComparison() {
 
 function clearComparison() {
     comparisonMode = false;
-    periodAData = [];
-    periodBData = [];
+    periodAData = new Int32Array(0);
+    periodBData = new Int32Array(0);
+    periodRowsReady = false;
     selectedDivisions = [];
     selectedCategories = [];
 
@@ -445,21 +547,12 @@ function calculateVariance(a, b) {
     return { diff, pct };
 }
 
-function calculatePeriodKPIs(data) {
-    let gross = 0, alloc = 0;
-    const months = new Set();
-
-    data.forEach(r => {
-        const amt = r['Actual Amount'] || 0;
-        const ct = String(r['Cost Type'] || '');
-        if (r['G/L Date']) months.add(r['G/L Date'].substring(0, 7));
-        if (ct.startsWith('693')) alloc += amt; else gross += amt;
-    });
-
+function calculatePeriodKPIs(period) {
+    const { gross, alloc, monthCount } = periodTotals(period);
     const net = gross + alloc;
     const recoveryPct = gross !== 0 ? Math.abs(alloc / gross * 100) : 0;
 
-    return { gross, alloc, net, recoveryPct, monthCount: months.size || 1 };
+    return { gross, alloc, net, recoveryPct, monthCount: monthCount || 1 };
 }
 
 function formatCompactCurrency(value) {
@@ -470,8 +563,8 @@ function formatCompactCurrency(value) {
 }
 
 function updateComparisonKPIs() {
-    const kpisA = calculatePeriodKPIs(periodAData);
-    const kpisB = calculatePeriodKPIs(periodBData);
+    const kpisA = calculatePeriodKPIs(periodA);
+    const kpisB = calculatePeriodKPIs(periodB);
 
     const grossVar = calculateVariance(kpisA.gross, kpisB.gross);
     const allocVar = calculateVariance(kpisA.alloc, kpisB.alloc);
@@ -35,8 +35,21 @@ const DEPT_CATEGORY_COLORS = {
     'Other': COLORS.gray
 };
 
-const MANHOUR_DOC_TYPES = ['T2', 'JE'];
-const MANHOUR_COST_PREFIX = '511';  // Only count manhours from 511* cost types
+// Category / department derivation tables, compiled from the rule table in
+// build_dashboard.py (compile_derivation_rules) and shared with the import modal
+const DERIVATION_RULES = '<!-- DERIVATION_RULES -->';
+
+// Chart size thresholds from build_dashboard.py (CHART_LIMITS), see chart-manager.js
+const CHART_LIMITS = '<!-- CHART_LIMITS -->';
+
+// Hours a decrypted dataset stays cached in IndexedDB for repeat opens (0 = off)
+const DATASET_CACHE_HOURS = 12;
+
+// Manhour rules from build_dashboard.py (MANHOUR_DOC_TYPES, MANHOUR_COST_PREFIX),
+// shared with its export subcommand
+const MANHOUR_RULES = '<!-- MANHOUR_RULES -->';
+const MANHOUR_DOC_TYPES = MANHOUR_RULES.docTypes;
+const MANHOUR_COST_PREFIX = MANHOUR_RULES.costPrefix;  // Only count manhours from 511* cost types
 
 // ── Multiselect filter configuration ──
 // Drives: state init, HTML setup, single-pass extraction, filter application, pills
@@ -1,6 +1,7 @@
 // === DECRYPTION ===
 
 function base64ToArrayBuffer(b64) {
+    if (Uint8Array.fromBase64) return Uint8Array.fromBase64(b64).buffer;
     const binary = atob(b64);
     const bytes = new Uint8Array(binary.length);
     for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
@@ -8,11 +9,68 @@ function base64ToArrayBuffer(b64) {
 }
 
 async function decryptData(password, payload) {
+    return new TextDecoder().decode(await decryptBytes(password, payload));
+}
+
+async function decryptBytes(password, payload) {
+    return decryptWithKey(await derivePayloadKey(password, payload), payload);
+}
+
+// 'encrypt' lets the dataset cache seal its own key under the payload key
+const PAYLOAD_KEY_USAGES = ['encrypt', 'decrypt'];
+
+/**
+ * AES-GCM key of the payload for password. The PBKDF2 key (payload salt and
+ * iteration count) decrypts the data directly in payloads without key slots;
+ * with them ('slots', build_dashboard.py key_envelope) it is a key-wrapping
+ * key, tried on each slot until one unwraps the data key. Slots hold 40 bytes
+ * each, so a wrong password never touches the bulk data.
+ */
+async function derivePayloadKey(password, payload) {
     const salt = base64ToArrayBuffer(payload.salt);
-    const iv = base64ToArrayBuffer(payload.iv);
-    const ct = base64ToArrayBuffer(payload.ct);
     const keyMaterial = await crypto.subtle.importKey('raw', new TextEncoder().encode(password), 'PBKDF2', false, ['deriveKey']);
-    const key = await crypto.subtle.deriveKey({ name: 'PBKDF2', salt, iterations: payload.iter, hash: 'SHA-256' }, keyMaterial, { name: 'AES-GCM', length: 256 }, false, ['decrypt']);
-    const decrypted = await crypto.subtle.decrypt({ name: 'AES-GCM', iv }, key, ct);
-    return new TextDecoder().decode(decrypted);
+    const params = { name: 'PBKDF2', salt, iterations: payload.iter, hash: 'SHA-256' };
+    if (!payload.slots) {
+        return crypto.subtle.deriveKey(params, keyMaterial, { name: 'AES-GCM', length: 256 }, false, PAYLOAD_KEY_USAGES);
+    }
+    const kek = await crypto.subtle.deriveKey(params, keyMaterial, { name: 'AES-KW', length: 256 }, false, ['unwrapKey']);
+    for (const slot of payload.slots) {
+        try {
+            return await crypto.subtle.unwrapKey('raw', base64ToArrayBuffer(slot), kek, 'AES-KW', 'AES-GCM', false, PAYLOAD_KEY_USAGES);
+        } catch (e) {
+            // The integrity check failed: another password's slot
+        }
+    }
+    throw new Error('Incorrect password');
+}
+
+async function decryptWithKey(key, payload) {
+    const iv = base64ToArrayBuffer(payload.iv);
+    const ct = payload.segments ? await decodeSegments(payload) : base64ToArrayBuffer(payload.ct);
+    return crypto.subtle.decrypt({ name: 'AES-GCM', iv }, key, ct);
+}
+
+/**
+ * Ciphertext of a v2 payload (build_dashboard.py --embed segments): each
+ * base64 segment is decoded straight into its place in one buffer, natively
+ * with Uint8Array.prototype.setFromBase64 where the browser has it, so no
+ * whole-payload binary string is ever built.
+ */
+async function decodeSegments(payload) {
+    const bytes = new Uint8Array(payload.ctLength);
+    const size = payload.segmentBytes;
+    payload.segments.forEach((segment, i) => {
+        if (bytes.setFromBase64) bytes.subarray(i * size).setFromBase64(segment);
+        else bytes.set(new Uint8Array(base64ToArrayBuffer(segment)), i * size);
+    });
+    return bytes.buffer;
+}
+
+/** Decrypt a binary blob laid out as IV (12 bytes) + ciphertext, e.g. a data shard. */
+async function decryptBlob(key, buffer) {
+    return crypto.subtle.decrypt({ name: 'AES-GCM', iv: new Uint8Array(buffer, 0, 12) }, key, new Uint8Array(buffer, 12));
+}
+
+async function gunzipBuffer(buffer) {
+    return new Response(new Blob([buffer]).stream().pipeThrough(new DecompressionStream('gzip'))).arrayBuffer();
 }
@@ -0,0 +1,132 @@
+// === DATASET CACHE ===
+// Keeps the decrypted columnar buffer in IndexedDB so repeat opens of the
+// same build skip base64 decoding, the payload decrypt and gunzip. The entry
+// is keyed by encryptedPayload.hash (stamped by the builder), so a new deploy
+// misses and replaces it.
+//
+// The buffer is encrypted under a random cache key that is never stored with
+// it in the clear:
+//   - the entry holds the cache key encrypted under the payload key, so after
+//     a new session it opens only once the password has been entered (the
+//     PBKDF2 step still runs; decoding and decrypting the payload do not);
+//   - the raw cache key is kept in sessionStorage for the tab's session, so
+//     reloads in that tab reopen the dashboard without the password.
+// Closing the tab or pressing Lock ends the session.
+// Entries expire after DATASET_CACHE_HOURS; 0 disables the cache.
+
+const DATASET_CACHE_DB = 'ga-dashboard';
+const DATASET_CACHE_STORE = 'datasets';
+const DATASET_SESSION_KEY = 'ga-dataset-key';
+
+function idbRequest(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function openDatasetCache() {
+    if (!DATASET_CACHE_HOURS || typeof indexedDB === 'undefined') return Promise.resolve(null);
+    const request = indexedDB.open(DATASET_CACHE_DB, 2);
+    request.onupgradeneeded = () => {
+        // Version 1 entries kept their key next to the data; drop them
+        if (request.result.objectStoreNames.contains(DATASET_CACHE_STORE)) {
+            request.result.deleteObjectStore(DATASET_CACHE_STORE);
+        }
+        request.result.createObjectStore(DATASET_CACHE_STORE, { keyPath: 'hash' });
+    };
+    return idbRequest(request).catch(e => { console.warn('Dataset cache unavailable:', e); return null; });
+}
+
+/** The session's raw cache key for hash, or null. */
+function sessionCacheKey(hash) {
+    try {
+        const stored = JSON.parse(sessionStorage.getItem(DATASET_SESSION_KEY));
+        return stored && stored.hash === hash ? base64ToArrayBuffer(stored.key) : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+function bytesToBase64(bytes) {
+    let binary = '';
+    for (let i = 0; i < bytes.length; i++) binary += String.fromCharCode(bytes[i]);
+    return btoa(binary);
+}
+
+async function readCachedEntry(hash) {
+    const db = await openDatasetCache();
+    if (!db) return null;
+    const entry = await idbRequest(db.transaction(DATASET_CACHE_STORE).objectStore(DATASET_CACHE_STORE).get(hash));
+    db.close();
+    if (!entry || Date.now() - entry.created > DATASET_CACHE_HOURS * 3600000) return null;
+    return entry;
+}
+
+/**
+ * Decrypted columnar buffer for this payload hash, or null on a miss.
+ * payloadKey (derivePayloadKey) opens the entry's cache key; without it
+ * only a key from this tab's session does.
+ */
+async function loadCachedDataset(hash, payloadKey = null) {
+    if (!hash) return null;
+    try {
+        const entry = await readCachedEntry(hash);
+        if (!entry) return null;
+        let raw = sessionCacheKey(hash);
+        if (!raw) {
+            if (!payloadKey) return null;
+            raw = await crypto.subtle.decrypt({ name: 'AES-GCM', iv: entry.keyIv }, payloadKey, entry.wrappedKey);
+            sessionStorage.setItem(DATASET_SESSION_KEY, JSON.stringify({ hash, key: bytesToBase64(new Uint8Array(raw)) }));
+        }
+        const key = await crypto.subtle.importKey('raw', raw, 'AES-GCM', false, ['decrypt']);
+        return await crypto.subtle.decrypt({ name: 'AES-GCM', iv: entry.iv }, key, entry.ct);
+    } catch (e) {
+        console.warn('Dataset cache read failed:', e);
+        return null;
+    }
+}
+
+/**
+ * Store the decrypted buffer under hash, replacing entries from older
+ * builds, and start a session for it. payloadKey must allow 'encrypt'.
+ */
+async function saveCachedDataset(hash, payloadKey, buffer) {
+    if (!hash) return;
+    try {
+        const db = await openDatasetCache();
+        if (!db) return;
+        const raw = crypto.getRandomValues(new Uint8Array(32));
+        const key = await crypto.subtle.importKey('raw', raw, 'AES-GCM', false, ['encrypt']);
+        const iv = crypto.getRandomValues(new Uint8Array(12));
+        const keyIv = crypto.getRandomValues(new Uint8Array(12));
+        const ct = await crypto.subtle.encrypt({ name: 'AES-GCM', iv }, key, buffer);
+        const wrappedKey = await crypto.subtle.encrypt({ name: 'AES-GCM', iv: keyIv }, payloadKey, raw);
+        const tx = db.transaction(DATASET_CACHE_STORE, 'readwrite');
+        const store = tx.objectStore(DATASET_CACHE_STORE);
+        store.clear();
+        store.put({ hash, iv, ct, keyIv, wrappedKey, created: Date.now() });
+        await new Promise((resolve, reject) => { tx.oncomplete = resolve; tx.onerror = () => reject(tx.error); });
+        db.close();
+        sessionStorage.setItem(DATASET_SESSION_KEY, JSON.stringify({ hash, key: bytesToBase64(raw) }));
+    } catch (e) {
+        console.warn('Dataset cache write failed:', e);
+    }
+}
+
+/** Drop the cached dataset and end the session. */
+async function clearDatasetCache() {
+    try {
+        sessionStorage.removeItem(DATASET_SESSION_KEY);
+    } catch (e) {
+        // Storage blocked; nothing was kept there either
+    }
+    try {
+        const db = await openDatasetCache();
+        if (!db) return;
+        await idbRequest(db.transaction(DATASET_CACHE_STORE, 'readwrite').objectStore(DATASET_CACHE_STORE).clear());
+        db.close();
+    } catch (e) {
+        console.warn('Dataset cache clear failed:', e);
+    }
+}
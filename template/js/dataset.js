@@ -0,0 +1,408 @@
+// === COLUMNAR DATASET ===
+// rawData holds one typed array per column instead of one object per row:
+//   NUMERIC_FIELDS  - Float64Array
+//   DATE_FIELD      - Int32Array of yyyymmdd keys (0 = no date)
+//   everything else - dictionary codes (Uint16Array, Uint32Array past 65,536
+//                     distinct values) into a sorted values array; code 0 is ''.
+//                     counts[code] is the number of rows holding each value.
+// filteredData and every other subset (drill, KPI, comparison periods) is an
+// Int32Array of row indices into rawData.
+//
+// Built by build_dashboard.py (encode_columnar) or by the import modal, or
+// concatenated from data shards (shards.js, datasetConcat).
+//
+// ds.cube holds month x CUBE_DIMENSIONS totals (gross, alloc, row count) for
+// comparison mode; the builder ships it, datasetCube() derives it otherwise.
+
+const DATE_FIELD = 'G/L Date';
+const NUMERIC_FIELDS = ['Actual Amount', 'Actual Units'];
+const COLUMNAR_FORMAT = 'ga-columnar';
+const CUBE_DIMENSIONS = ['Division Name', 'Dept_Category', 'Document Type'];
+
+const TYPED_ARRAYS = { f64: Float64Array, i32: Int32Array, u16: Uint16Array, u32: Uint32Array };
+
+function emptyDataset(length) {
+    return { length, fields: [], numeric: {}, dates: new Int32Array(length), dict: {}, lookups: {}, cube: null };
+}
+
+/** Header JSON of a binary laid out by the builder (columnar dataset or shard manifest). */
+function readBinaryHeader(buffer) {
+    const headerLength = new DataView(buffer).getUint32(0, true);
+    return JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+}
+
+/** Map the binary produced by encode_columnar() onto typed arrays (no copying). */
+function datasetFromBinary(buffer) {
+    const header = readBinaryHeader(buffer);
+    if (header.format !== COLUMNAR_FORMAT) throw new Error('Unsupported data format');
+
+    const ds = emptyDataset(header.length);
+    for (const col of header.columns) {
+        const values = new TYPED_ARRAYS[col.type](buffer, col.offset, header.length);
+        if (col.kind === 'numeric') ds.numeric[col.name] = values;
+        else if (col.kind === 'date') ds.dates = values;
+        else ds.dict[col.name] = { codes: values, values: col.values, counts: col.counts || null };
+        ds.fields.push(col.name);
+    }
+    ds.cube = cubeFromBinary(buffer, header);
+    return ds;
+}
+
+/** The header's cube section mapped onto typed arrays, or null. */
+function cubeFromBinary(buffer, header) {
+    if (!header.cube) return null;
+    const cols = {};
+    for (const col of header.cube.columns) cols[col.name] = new TYPED_ARRAYS[col.type](buffer, col.offset, header.cube.length);
+    return {
+        length: header.cube.length, months: cols.month,
+        dims: Object.fromEntries(CUBE_DIMENSIONS.map(f => [f, cols[f]])),
+        gross: cols.gross, alloc: cols.alloc, rows: cols.rows
+    };
+}
+
+/**
+ * Concatenate datasets whose dictionary codes index the same values (data
+ * shards). columns are the shared descriptors ({name, kind, type, values,
+ * counts}); the result takes its dictionaries and counts from them.
+ */
+function datasetConcat(columns, parts) {
+    const length = parts.reduce((n, p) => n + p.length, 0);
+    const concat = (Type, arrays) => {
+        const out = new Type(length);
+        let offset = 0;
+        for (const a of arrays) { out.set(a, offset); offset += a.length; }
+        return out;
+    };
+    const ds = emptyDataset(length);
+    ds.dates = concat(Int32Array, parts.map(p => p.dates));
+    for (const col of columns) {
+        if (col.kind === 'numeric') ds.numeric[col.name] = concat(Float64Array, parts.map(p => p.numeric[col.name]));
+        else if (col.kind === 'dict') {
+            const codes = concat(TYPED_ARRAYS[col.type], parts.map(p => p.dict[col.name].codes));
+            ds.dict[col.name] = { codes, values: col.values, counts: col.counts || null };
+        }
+        ds.fields.push(col.name);
+    }
+    return ds;
+}
+
+/**
+ * Incrementally build a dataset (used by the Excel import path).
+ * Write values with set(field, row, value); finish(length) trims the arrays
+ * and narrows dictionary codes to Uint16Array where they fit.
+ */
+function createDatasetBuilder(fields, capacity) {
+    const numeric = {}, encoders = {};
+    const dates = new Int32Array(capacity);
+    fields.forEach(f => {
+        if (NUMERIC_FIELDS.includes(f)) numeric[f] = new Float64Array(capacity);
+        else if (f !== DATE_FIELD) encoders[f] = { map: new Map([['', 0]]), values: [''], codes: new Uint32Array(capacity) };
+    });
+
+    function set(field, row, value) {
+        if (field === DATE_FIELD) { dates[row] = dateKeyFromString(value); return; }
+        if (numeric[field]) { numeric[field][row] = value || 0; return; }
+        const enc = encoders[field];
+        const key = value == null ? '' : String(value);
+        let code = enc.map.get(key);
+        if (code === undefined) {
+            code = enc.values.length;
+            enc.values.push(key);
+            enc.map.set(key, code);
+        }
+        enc.codes[row] = code;
+    }
+
+    function finish(length) {
+        const ds = emptyDataset(length);
+        ds.fields = fields.slice();
+        ds.dates = dates.slice(0, length);
+        for (const f in numeric) ds.numeric[f] = numeric[f].slice(0, length);
+        for (const f in encoders) {
+            // Re-code so values are sorted, matching the builder's dictionaries
+            const { values, codes } = encoders[f];
+            const order = values.map((v, i) => i).sort((a, b) => (values[a] < values[b] ? -1 : values[a] > values[b] ? 1 : 0));
+            const remap = new Uint32Array(values.length);
+            order.forEach((oldCode, newCode) => { remap[oldCode] = newCode; });
+            const out = values.length > 65536 ? new Uint32Array(length) : new Uint16Array(length);
+            const counts = new Array(values.length).fill(0);
+            for (let i = 0; i < length; i++) counts[out[i] = remap[codes[i]]]++;
+            ds.dict[f] = { codes: out, values: order.map(c => values[c]), counts };
+        }
+        return ds;
+    }
+
+    return { set, finish };
+}
+
+// ── Date keys ──
+
+const dateStringCache = new Map();
+
+function dateKeyFromString(value) {
+    if (!value) return 0;
+    if (value instanceof Date) return value.getFullYear() * 10000 + (value.getMonth() + 1) * 100 + value.getDate();
+    const s = String(value);
+    return parseInt(s.substring(0, 4) + s.substring(5, 7) + s.substring(8, 10), 10) || 0;
+}
+
+function dateKeyToString(key) {
+    if (!key) return '';
+    let s = dateStringCache.get(key);
+    if (s === undefined) {
+        const k = String(key);
+        s = `${k.substring(0, 4)}-${k.substring(4, 6)}-${k.substring(6, 8)}`;
+        dateStringCache.set(key, s);
+    }
+    return s;
+}
+
+function monthKeyToString(monthKey) {
+    const k = String(monthKey);
+    return `${k.substring(0, 4)}-${k.substring(4, 6)}`;
+}
+
+// ── Row access ──
+
+function datasetAllRows(ds) {
+    const idx = new Int32Array(ds.length);
+    for (let i = 0; i < ds.length; i++) idx[i] = i;
+    return idx;
+}
+
+function datasetValue(ds, field, i) {
+    if (field === DATE_FIELD) return dateKeyToString(ds.dates[i]);
+    const num = ds.numeric[field];
+    if (num) return num[i];
+    const col = ds.dict[field];
+    return col ? col.values[col.codes[i]] : undefined;
+}
+
+/** Materialize one row as a plain object (for tables and exports only). */
+function datasetRow(ds, i) {
+    const row = {};
+    for (const f of ds.fields) row[f] = datasetValue(ds, f, i);
+    return row;
+}
+
+function datasetRows(ds, indices) {
+    return Array.from(indices, i => datasetRow(ds, i));
+}
+
+/**
+ * Reusable row view: reading view['Field'] returns the value at view.index.
+ * Lets row predicates such as r => r['Department'] === x run without
+ * allocating an object per row.
+ */
+function createRowView(ds) {
+    const view = { index: 0 };
+    for (const f of ds.fields) {
+        Object.defineProperty(view, f, { get() { return datasetValue(ds, f, this.index); }, enumerable: true });
+    }
+    return view;
+}
+
+/** Return the subset of indices whose row satisfies predicate(rowView). */
+function datasetSelect(ds, indices, predicate) {
+    const view = createRowView(ds);
+    const out = new Int32Array(indices.length);
+    let n = 0;
+    for (let k = 0; k < indices.length; k++) {
+        view.index = indices[k];
+        if (predicate(view)) out[n++] = indices[k];
+    }
+    return out.slice(0, n);
+}
+
+// ── Column helpers ──
+
+const EMPTY_COLUMN = { codes: new Uint16Array(0), values: [''], counts: [0] };
+
+function datasetColumn(ds, field) {
+    return ds.dict[field] || EMPTY_COLUMN;
+}
+
+/** Distinct non-empty values of a dictionary column, sorted. */
+function datasetDistinct(ds, field) {
+    return datasetColumn(ds, field).values.filter(v => v !== '');
+}
+
+/**
+ * Filter catalog for a dictionary column: distinct non-empty values (sorted)
+ * with their row counts. Counts come from the payload header when present and
+ * are tallied once per dataset otherwise.
+ */
+function datasetCatalog(ds, field) {
+    const col = datasetColumn(ds, field);
+    if (!col.counts) {
+        col.counts = new Array(col.values.length).fill(0);
+        for (let i = 0; i < col.codes.length; i++) col.counts[col.codes[i]]++;
+    }
+    const values = [], counts = [];
+    for (let c = 0; c < col.values.length; c++) {
+        if (col.values[c] === '') continue;
+        values.push(col.values[c]);
+        counts.push(col.counts[c]);
+    }
+    return { values, counts };
+}
+
+/** Uint8Array over a column's dictionary: 1 where the value is in selected. */
+function datasetCodeMask(ds, field, selected) {
+    const values = datasetColumn(ds, field).values;
+    const wanted = new Set(selected.map(String));
+    const mask = new Uint8Array(values.length);
+    for (let c = 0; c < values.length; c++) if (wanted.has(values[c])) mask[c] = 1;
+    return mask;
+}
+
+/** Per-code flags for a dictionary column, computed once per dataset. */
+function datasetLookup(ds, name, field, test) {
+    if (!ds.lookups[name]) ds.lookups[name] = Uint8Array.from(datasetColumn(ds, field).values, v => test(v) ? 1 : 0);
+    return ds.lookups[name];
+}
+
+/** 1 for Cost Type codes that are allocations (693xxx). */
+function datasetAllocFlags(ds) {
+    return datasetLookup(ds, 'alloc', 'Cost Type', v => v.startsWith(DERIVATION_RULES.allocationPrefix));
+}
+
+/** Sum 'Actual Amount' by month ('YYYY-MM') over the given rows. */
+function datasetSumByMonth(ds, indices) {
+    const amounts = ds.numeric['Actual Amount'], dates = ds.dates;
+    const sums = new Map();
+    for (let k = 0; k < indices.length; k++) {
+        const i = indices[k];
+        if (!dates[i]) continue;
+        const m = (dates[i] / 100) | 0;
+        sums.set(m, (sums.get(m) || 0) + amounts[i]);
+    }
+    const out = {};
+    sums.forEach((v, m) => { out[monthKeyToString(m)] = v; });
+    return out;
+}
+
+/** Sum 'Actual Amount' by a dictionary column; '' is reported as fallback. */
+function datasetSumBy(ds, indices, field, fallback = 'Unknown', skipAlloc = false) {
+    const amounts = ds.numeric['Actual Amount'];
+    const col = datasetColumn(ds, field);
+    const alloc = datasetAllocFlags(ds), ct = datasetColumn(ds, 'Cost Type').codes;
+    const sums = new Float64Array(col.values.length), counts = new Uint32Array(col.values.length);
+    for (let k = 0; k < indices.length; k++) {
+        const i = indices[k];
+        if (skipAlloc && alloc[ct[i]]) continue;
+        sums[col.codes[i]] += amounts[i];
+        counts[col.codes[i]]++;
+    }
+    return codeTotalsToObject(col.values, sums, counts, fallback).amounts;
+}
+
+/**
+ * Convert per-code totals into { amounts: {label: sum}, counts: {label: n} },
+ * merging the empty value into fallback. Codes with no rows are skipped.
+ */
+function codeTotalsToObject(values, sums, counts, fallback) {
+    const amounts = {}, tally = {};
+    for (let c = 0; c < values.length; c++) {
+        if (counts[c] === 0) continue;
+        const label = values[c] || fallback;
+        amounts[label] = (amounts[label] || 0) + sums[c];
+        tally[label] = (tally[label] || 0) + counts[c];
+    }
+    return { amounts, counts: tally };
+}
+
+/** Min and max date keys over the given rows (0 when none have dates). */
+function datasetDateRange(ds, indices) {
+    let min = 0, max = 0;
+    const dates = ds.dates;
+    for (let k = 0; k < indices.length; k++) {
+        const d = dates[indices[k]];
+        if (!d) continue;
+        if (!min || d < min) min = d;
+        if (d > max) max = d;
+    }
+    return { min, max };
+}
+
+// ── Aggregate cube ──
+
+/** The dataset's month x dimension cube, built from the rows once if the payload had none. */
+function datasetCube(ds) {
+    if (!ds.cube) ds.cube = buildDatasetCube(ds);
+    return ds.cube;
+}
+
+function buildDatasetCube(ds) {
+    const amounts = ds.numeric['Actual Amount'] || new Float64Array(ds.length);
+    const alloc = datasetAllocFlags(ds), ct = datasetColumn(ds, 'Cost Type').codes;
+    const dimCodes = CUBE_DIMENSIONS.map(f => datasetColumn(ds, f).codes);
+    const cells = new Map();
+    for (let i = 0; i < ds.length; i++) {
+        const month = (ds.dates[i] / 100) | 0;
+        const key = `${month},${dimCodes[0][i] || 0},${dimCodes[1][i] || 0},${dimCodes[2][i] || 0}`;
+        let cell = cells.get(key);
+        if (!cell) cells.set(key, cell = { month, codes: dimCodes.map(c => c[i] || 0), gross: 0, alloc: 0, rows: 0 });
+        if (alloc[ct[i] || 0]) cell.alloc += amounts[i]; else cell.gross += amounts[i];
+        cell.rows++;
+    }
+
+    const n = cells.size;
+    const cube = {
+        length: n, months: new Int32Array(n),
+        dims: Object.fromEntries(CUBE_DIMENSIONS.map(f => [f, new Uint32Array(n)])),
+        gross: new Float64Array(n), alloc: new Float64Array(n), rows: new Uint32Array(n)
+    };
+    let k = 0;
+    cells.forEach(cell => {
+        cube.months[k] = cell.month;
+        CUBE_DIMENSIONS.forEach((f, d) => { cube.dims[f][k] = cell.codes[d]; });
+        cube.gross[k] = cell.gross; cube.alloc[k] = cell.alloc; cube.rows[k] = cell.rows;
+        k++;
+    });
+    return cube;
+}
+
+/**
+ * Sum cube cells with fromMonth <= month <= toMonth (yyyymm, 0 = open) whose
+ * dimension codes pass masks ({field: Uint8Array}, see datasetCodeMask).
+ * Returns { gross, alloc, rows, monthCount }.
+ */
+function cubeTotals(cube, fromMonth, toMonth, masks = {}) {
+    const active = Object.keys(masks).map(f => [masks[f], cube.dims[f]]);
+    const months = new Set();
+    let gross = 0, alloc = 0, rows = 0;
+    cells: for (let k = 0; k < cube.length; k++) {
+        const m = cube.months[k];
+        if (fromMonth && m < fromMonth) continue;
+        if (toMonth && m > toMonth) continue;
+        for (const [mask, codes] of active) if (!mask[codes[k]]) continue cells;
+        gross += cube.gross[k];
+        alloc += cube.alloc[k];
+        rows += cube.rows[k];
+        if (m) months.add(m);
+    }
+    return { gross, alloc, rows, monthCount: months.size };
+}
+
+/**
+ * cubeTotals() per group: per month (yyyymm) when field is null, else per
+ * code of that cube dimension. Returns Map(key -> { gross, alloc, rows }).
+ */
+function cubeGroupTotals(cube, fromMonth, toMonth, masks = {}, field = null) {
+    const active = Object.keys(masks).map(f => [masks[f], cube.dims[f]]);
+    const keys = field ? cube.dims[field] : cube.months;
+    const groups = new Map();
+    cells: for (let k = 0; k < cube.length; k++) {
+        const m = cube.months[k];
+        if (fromMonth && m < fromMonth) continue;
+        if (toMonth && m > toMonth) continue;
+        for (const [mask, codes] of active) if (!mask[codes[k]]) continue cells;
+        let group = groups.get(keys[k]);
+        if (!group) groups.set(keys[k], group = { gross: 0, alloc: 0, rows: 0 });
+        group.gross += cube.gross[k];
+        group.alloc += cube.alloc[k];
+        group.rows += cube.rows[k];
+    }
+    return groups;
+}
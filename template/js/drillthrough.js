@@ -3,7 +3,7 @@
 function openDrill(title, subtitle, filterFn) {
     document.getElementById('drillTitle').textContent = title;
     document.getElementById('drillSubtitle').textContent = subtitle;
-    drill.data = filteredData.filter(filterFn);
+    drill.data = datasetSelect(rawData, filteredData, filterFn);
     drill.page = 1; drill.search = '';
     document.getElementById('drillSearchInput').value = '';
     updateDrillSummary();
@@ -15,12 +15,15 @@ function closeDrill() { document.getElementById('drillModal').classList.remove('
 
 function updateDrillSummary() {
     let gross = 0, alloc = 0;
+    const amounts = rawData.numeric['Actual Amount'];
+    const isAllocCode = datasetAllocFlags(rawData), costTypes = datasetColumn(rawData, 'Cost Type').codes;
+    const division = datasetColumn(rawData, 'Division Name'), dept = datasetColumn(rawData, 'Department');
     const divs = new Set(), depts = new Set();
-    drill.data.forEach(r => {
-        const amt = r['Actual Amount'] || 0;
-        if (String(r['Cost Type']||'').startsWith('693')) alloc += amt; else gross += amt;
-        if (r['Division Name']) divs.add(r['Division Name']);
-        if (r['Department']) depts.add(r['Department']);
+    drill.data.forEach(i => {
+        const amt = amounts[i];
+        if (isAllocCode[costTypes[i]]) alloc += amt; else gross += amt;
+        if (division.codes[i]) divs.add(division.codes[i]);
+        if (dept.codes[i]) depts.add(dept.codes[i]);
     });
     document.getElementById('drillSummary').innerHTML = `
         <div class="drill-stat"><div class="drill-stat-label">Records</div><div class="drill-stat-value purple">${drill.data.length.toLocaleString()}</div></div>
@@ -32,19 +35,41 @@ function updateDrillSummary() {
     `;
 }
 
+const DRILL_SEARCH_FIELDS = ['Division Name', 'Department', 'Job', 'Description', 'Cost Type'];
+
+// Rank of each dictionary value in case-insensitive order, for sorting by code
+function dictSortRanks(field) {
+    const values = datasetColumn(rawData, field).values;
+    const keys = values.map(v => v.toLowerCase());
+    const order = keys.map((_, c) => c).sort((a, b) => (keys[a] < keys[b] ? -1 : keys[a] > keys[b] ? 1 : 0));
+    const ranks = new Uint32Array(values.length);
+    order.forEach((c, r) => { ranks[c] = r; });
+    return ranks;
+}
+
 function applyDrillFilters() {
-    let data = [...drill.data];
+    let data = drill.data;
     if (drill.search) {
+        // Match each column's dictionary once, then test rows by code
         const q = drill.search.toLowerCase();
-        data = data.filter(r => String(r['Division Name']||'').toLowerCase().includes(q) || String(r['Department']||'').toLowerCase().includes(q) || String(r['Job']||'').toLowerCase().includes(q) || String(r['Description']||'').toLowerCase().includes(q) || String(r['Cost Type']||'').toLowerCase().includes(q));
+        const cols = DRILL_SEARCH_FIELDS.map(f => {
+            const col = datasetColumn(rawData, f);
+            return { codes: col.codes, hit: Uint8Array.from(col.values, v => v.toLowerCase().includes(q) ? 1 : 0) };
+        });
+        data = data.filter(i => cols.some(c => c.hit[c.codes[i]]));
+    } else {
+        data = data.slice();
     }
-    data.sort((a, b) => {
-        let av = a[drill.sortCol], bv = b[drill.sortCol];
-        if (drill.sortCol === 'Actual Amount') { av = av || 0; bv = bv || 0; } else { av = String(av||'').toLowerCase(); bv = String(bv||'').toLowerCase(); }
-        if (av < bv) return drill.sortDir === 'asc' ? -1 : 1;
-        if (av > bv) return drill.sortDir === 'asc' ? 1 : -1;
-        return 0;
-    });
+
+    const dir = drill.sortDir === 'asc' ? 1 : -1;
+    if (drill.sortCol === 'Actual Amount' || drill.sortCol === DATE_FIELD) {
+        const key = drill.sortCol === DATE_FIELD ? rawData.dates : rawData.numeric['Actual Amount'];
+        data.sort((a, b) => (key[a] - key[b]) * dir);
+    } else {
+        const ranks = dictSortRanks(drill.sortCol), codes = datasetColumn(rawData, drill.sortCol).codes;
+        data.sort((a, b) => (ranks[codes[a]] - ranks[codes[b]]) * dir);
+    }
+
     drill.filtered = data;
     renderDrillTable();
     updateDrillPagination();
@@ -53,7 +78,7 @@ function applyDrillFilters() {
 function renderDrillTable() {
     const tbody = document.getElementById('drillTableBody');
     const start = (drill.page - 1) * drill.pageSize;
-    const pageData = drill.filtered.slice(start, start + drill.pageSize);
+    const pageData = datasetRows(rawData, drill.filtered.subarray(start, start + drill.pageSize));
     if (pageData.length === 0) { tbody.innerHTML = '<tr><td colspan="9"><div class="drill-empty">No transactions found</div></td></tr>'; return; }
 
     // Calculate max amount for data bars
@@ -85,7 +110,7 @@ function updateDrillPagination() {
 function exportCsv() {
     if (drill.filtered.length === 0) return;
     const headers = ['G/L Date', 'Division Name', 'Department', 'Job', 'Job Type', 'Description', 'Cost Type', 'Actual Amount', 'Document Type'];
-    const csv = [headers.join(','), ...drill.filtered.map(r => headers.map(h => { let v = r[h] ?? ''; if (typeof v === 'string' && (v.includes(',') || v.includes('"'))) v = '"' + v.replace(/"/g, '""') + '"'; return v; }).join(','))].join('\n');
+    const csv = [headers.join(','), ...datasetRows(rawData, drill.filtered).map(r => headers.map(h => { let v = r[h] ?? ''; if (typeof v === 'string' && (v.includes(',') || v.includes('"'))) v = '"' + v.replace(/"/g, '""') + '"'; return v; }).join(','))].join('\n');
     const link = document.createElement('a'); link.href = URL.createObjectURL(new Blob([csv], { type: 'text/csv' })); link.download = `drillthrough_${new Date().toISOString().slice(0, 10)}.csv`; link.click();
 }
 
@@ -93,6 +118,6 @@ function exportExcel() {
     if (drill.filtered.length === 0) return;
     if (typeof XLSX === 'undefined') { exportCsv(); return; }
     const headers = ['G/L Date', 'Division Name', 'Department', 'Job', 'Job Type', 'Description', 'Cost Type', 'Actual Amount', 'Document Type'];
-    const ws = XLSX.utils.aoa_to_sheet([headers, ...drill.filtered.map(r => headers.map(h => r[h] ?? ''))]);
+    const ws = XLSX.utils.aoa_to_sheet([headers, ...datasetRows(rawData, drill.filtered).map(r => headers.map(h => r[h] ?? ''))]);
     const wb = XLSX.utils.book_new(); XLSX.utils.book_append_sheet(wb, ws, 'Data'); XLSX.writeFile(wb, `drillthrough_${new Date().toISOString().slice(0, 10)}.xlsx`);
 }
@@ -68,88 +68,131 @@ function applyDatePreset(preset) {
     debouncedApplyFilters();
 }
 
-// Single-pass aggregation for all metrics
-function computeAllMetrics(data) {
-    const metrics = {
-        gross: 0, alloc: 0, gaTotal: 0, inTotal: 0,
-        months: new Set(), grossRecords: 0, allocRecords: 0,
-        monthlyAgg: {},
-        byDivision: {}, byDeptCategory: {}, byDepartment: {},
-        byDocType: {}, byCostType: {}
-    };
-
-    const len = data.length;
-    for (let i = 0; i < len; i++) {
-        const row = data[i];
-        const amt = row['Actual Amount'] || 0;
-        const ct = String(row['Cost Type'] || '');
-        const isAlloc = ct.startsWith('693');
-        const glDate = row['G/L Date'] || '';
-        const month = glDate.substring(0, 7);
-        const jobType = row['Job Type'];
-        const divName = row['Division Name'] || 'Unknown';
-        const deptCat = row['Dept_Category'] || 'Other';
-        const dept = row['Department'] || 'Unknown';
-        const docType = row['Document Type'] || 'Unknown';
-        const costDesc = row['Description'] || 'Unknown';
-
-        if (isAlloc) { metrics.alloc += amt; metrics.allocRecords++; }
-        else { metrics.gross += amt; metrics.grossRecords++; }
-
-        if (jobType === 'GA') metrics.gaTotal += amt;
-        else if (jobType === 'IN') metrics.inTotal += amt;
-
-        if (month) metrics.months.add(month);
-
-        if (month) {
-            if (!metrics.monthlyAgg[month]) {
-                metrics.monthlyAgg[month] = {
+// Single-pass aggregation for all metrics over a set of row indices.
+// Per-category totals accumulate into typed arrays indexed by dictionary
+// code and are converted to label-keyed objects once at the end.
+function computeAllMetrics(indices) {
+    const ds = rawData;
+    const amounts = ds.numeric['Actual Amount'];
+    const units = ds.numeric['Actual Units'];
+    const dates = ds.dates;
+    const costType = datasetColumn(ds, 'Cost Type');
+    const jobType = datasetColumn(ds, 'Job Type');
+    const division = datasetColumn(ds, 'Division Name');
+    const deptCat = datasetColumn(ds, 'Dept_Category');
+    const dept = datasetColumn(ds, 'Department');
+    const docType = datasetColumn(ds, 'Document Type');
+    const costDesc = datasetColumn(ds, 'Description');
+
+    const isAllocCode = datasetAllocFlags(ds);
+    const manhourCostCode = datasetLookup(ds, 'manhourCost', 'Cost Type', v => v.startsWith(MANHOUR_COST_PREFIX));
+    const manhourDocCode = datasetLookup(ds, 'manhourDoc', 'Document Type', v => MANHOUR_DOC_TYPES.includes(v));
+    const gaCode = jobType.values.indexOf('GA');
+    const inCode = jobType.values.indexOf('IN');
+
+    const tally = col => ({ sums: new Float64Array(col.values.length), counts: new Uint32Array(col.values.length) });
+    const byDiv = tally(division), byDept = tally(dept), byCost = tally(costDesc);
+    const byDeptCat = tally(deptCat), byDoc = tally(docType);
+
+    let gross = 0, alloc = 0, gaTotal = 0, inTotal = 0, grossRecords = 0, allocRecords = 0;
+    const monthly = new Map();
+
+    const len = indices.length;
+    for (let k = 0; k < len; k++) {
+        const i = indices[k];
+        const amt = amounts[i];
+        const ctCode = costType.codes[i];
+        const isAlloc = isAllocCode[ctCode];
+        const jt = jobType.codes[i];
+        const divCode = division.codes[i], deptCode = dept.codes[i], deptCatCode = deptCat.codes[i];
+
+        if (isAlloc) { alloc += amt; allocRecords++; }
+        else { gross += amt; grossRecords++; }
+
+        if (jt === gaCode) gaTotal += amt;
+        else if (jt === inCode) inTotal += amt;
+
+        const date = dates[i];
+        if (date) {
+            const m = (date / 100) | 0;
+            let ma = monthly.get(m);
+            if (!ma) {
+                ma = {
                     total: 0, gross: 0, alloc: 0, ga: 0, in: 0, manhours: 0,
-                    byDiv: {}, byDept: {}, byDeptCat: {}
+                    byDiv: new Float64Array(division.values.length),
+                    byDept: new Float64Array(dept.values.length),
+                    byDeptCat: new Float64Array(deptCat.values.length),
+                    seenDiv: new Uint8Array(division.values.length),
+                    seenDept: new Uint8Array(dept.values.length),
+                    seenDeptCat: new Uint8Array(deptCat.values.length)
                 };
+                monthly.set(m, ma);
             }
-            const ma = metrics.monthlyAgg[month];
             ma.total += amt;
             if (isAlloc) ma.alloc += amt; else ma.gross += amt;
-            if (jobType === 'GA') ma.ga += amt;
-            else if (jobType === 'IN') ma.in += amt;
+            if (jt === gaCode) ma.ga += amt;
+            else if (jt === inCode) ma.in += amt;
 
-            if (typeof MANHOUR_DOC_TYPES !== 'undefined' && MANHOUR_DOC_TYPES.includes(docType) &&
-                typeof MANHOUR_COST_PREFIX !== 'undefined' && ct.startsWith(MANHOUR_COST_PREFIX)) {
-                ma.manhours += Math.abs(row['Actual Units'] || 0);
+            if (manhourDocCode[docType.codes[i]] && manhourCostCode[ctCode]) {
+                ma.manhours += Math.abs(units ? units[i] : 0);
             }
 
             if (!isAlloc) {
-                ma.byDiv[divName] = (ma.byDiv[divName] || 0) + amt;
-                ma.byDept[dept] = (ma.byDept[dept] || 0) + amt;
-                ma.byDeptCat[deptCat] = (ma.byDeptCat[deptCat] || 0) + amt;
+                ma.byDiv[divCode] += amt; ma.seenDiv[divCode] = 1;
+                ma.byDept[deptCode] += amt; ma.seenDept[deptCode] = 1;
+                ma.byDeptCat[deptCatCode] += amt; ma.seenDeptCat[deptCatCode] = 1;
             }
         }
 
         if (!isAlloc) {
-            if (!metrics.byDivision[divName]) metrics.byDivision[divName] = { amount: 0, count: 0 };
-            metrics.byDivision[divName].amount += amt;
-            metrics.byDivision[divName].count++;
+            byDiv.sums[divCode] += amt; byDiv.counts[divCode]++;
+            byDept.sums[deptCode] += amt; byDept.counts[deptCode]++;
+            byCost.sums[costDesc.codes[i]] += amt; byCost.counts[costDesc.codes[i]]++;
+        }
 
-            if (!metrics.byDepartment[dept]) metrics.byDepartment[dept] = { amount: 0, count: 0 };
-            metrics.byDepartment[dept].amount += amt;
-            metrics.byDepartment[dept].count++;
+        byDeptCat.sums[deptCatCode] += amt; byDeptCat.counts[deptCatCode]++;
+        byDoc.sums[docType.codes[i]] += amt; byDoc.counts[docType.codes[i]]++;
+    }
 
-            if (!metrics.byCostType[costDesc]) metrics.byCostType[costDesc] = { amount: 0, count: 0 };
-            metrics.byCostType[costDesc].amount += amt;
-            metrics.byCostType[costDesc].count++;
+    // Convert code-indexed totals into { label: { amount, count } }
+    const toGroups = (col, t, fallback, label = v => v) => {
+        const { amounts: a, counts: c } = codeTotalsToObject(col.values.map(v => v && label(v)), t.sums, t.counts, fallback);
+        const out = {};
+        for (const key in a) out[key] = { amount: a[key], count: c[key] };
+        return out;
+    };
+    const toSums = (col, sums, seen, fallback) => {
+        const out = {};
+        for (let c = 0; c < sums.length; c++) {
+            if (!seen[c]) continue;
+            const key = col.values[c] || fallback;
+            out[key] = (out[key] || 0) + sums[c];
         }
+        return out;
+    };
 
-        if (!metrics.byDeptCategory[deptCat]) metrics.byDeptCategory[deptCat] = { amount: 0, count: 0 };
-        metrics.byDeptCategory[deptCat].amount += amt;
-        metrics.byDeptCategory[deptCat].count++;
+    const metrics = {
+        gross, alloc, gaTotal, inTotal,
+        months: new Set(), grossRecords, allocRecords,
+        monthlyAgg: {},
+        byDivision: toGroups(division, byDiv, 'Unknown'),
+        byDeptCategory: toGroups(deptCat, byDeptCat, 'Other'),
+        byDepartment: toGroups(dept, byDept, 'Unknown'),
+        byDocType: toGroups(docType, byDoc, 'Unknown',
+            v => DOC_TYPE_NAMES[v] ? `${v} - ${DOC_TYPE_NAMES[v]}` : v),
+        byCostType: toGroups(costDesc, byCost, 'Unknown')
+    };
 
-        const docTypeLabel = (typeof DOC_TYPE_NAMES !== 'undefined' && DOC_TYPE_NAMES[docType])
-            ? `${docType} - ${DOC_TYPE_NAMES[docType]}`
-            : docType;
-        if (!metrics.byDocType[docTypeLabel]) metrics.byDocType[docTypeLabel] = { amount: 0, count: 0 };
-        metrics.byDocType[docTypeLabel].amount += amt;
-        metrics.byDocType[docTypeLabel].count++;
+    for (const m of [...monthly.keys()].sort((a, b) => a - b)) {
+        const ma = monthly.get(m);
+        const month = monthKeyToString(m);
+        metrics.months.add(month);
+        metrics.monthlyAgg[month] = {
+            total: ma.total, gross: ma.gross, alloc: ma.alloc, ga: ma.ga, in: ma.in, manhours: ma.manhours,
+            byDiv: toSums(division, ma.byDiv, ma.seenDiv, 'Unknown'),
+            byDept: toSums(dept, ma.byDept, ma.seenDept, 'Unknown'),
+            byDeptCat: toSums(deptCat, ma.byDeptCat, ma.seenDeptCat, 'Other')
+        };
     }
 
     const net = metrics.gross + metrics.alloc;
@@ -168,54 +211,141 @@ function computeAllMetrics(data) {
     return metrics;
 }
 
+// ── Filter result cache ──
+// Results are keyed by a canonical filter state. A state seen before is
+// served from the LRU; a state that only narrows a cached one (later start,
+// earlier end, subset of a selection) scans that cached result instead of
+// every row. The cache is dropped whenever rawData is replaced.
+
+const FILTER_CACHE_SIZE = 16;
+const filterCache = { dataset: null, entries: new Map() };   // key -> { state, indices, metrics }
+
+// filters key -> column, for every selection-style filter
+const FILTER_SET_FIELDS = Object.assign(
+    { deptCategories: 'Dept_Category' },
+    ...MULTISELECT_FILTERS.map(f => ({ [f.key]: f.field }))
+);
+
+/** Canonical snapshot of the current filters (sorted, de-duplicated selections). */
+function snapshotFilterState() {
+    const sets = {};
+    for (const key in FILTER_SET_FIELDS) {
+        if (filters[key].length > 0) sets[key] = [...new Set(filters[key].map(String))].sort();
+    }
+    const state = {
+        startKey: filters.startDate ? dateKeyFromString(filters.startDate) : 0,
+        endKey: filters.endDate ? dateKeyFromString(filters.endDate) : 0,
+        jobType: filters.jobType,
+        sets
+    };
+    state.key = JSON.stringify([state.startKey, state.endKey, state.jobType, sets]);
+    return state;
+}
+
+/** True when every row passing `next` also passes `prev`. */
+function filterStateNarrows(next, prev) {
+    if (prev.startKey && next.startKey < prev.startKey) return false;
+    if (prev.endKey && (!next.endKey || next.endKey > prev.endKey)) return false;
+    if (prev.jobType !== 'all' && next.jobType !== prev.jobType) return false;
+    for (const key in prev.sets) {
+        const selected = next.sets[key];
+        if (!selected) return false;
+        const allowed = new Set(prev.sets[key]);
+        if (!selected.every(v => allowed.has(v))) return false;
+    }
+    return true;
+}
+
+function getCachedFilterResult(state) {
+    if (filterCache.dataset !== rawData) {
+        filterCache.dataset = rawData;
+        filterCache.entries.clear();
+    }
+    const entry = filterCache.entries.get(state.key);
+    if (entry) {
+        // Refresh LRU position
+        filterCache.entries.delete(state.key);
+        filterCache.entries.set(state.key, entry);
+    }
+    return entry || null;
+}
+
+/** Smallest cached result that `state` narrows, or null. */
+function findNarrowingBase(state) {
+    let base = null;
+    filterCache.entries.forEach(entry => {
+        if ((!base || entry.indices.length < base.indices.length) && filterStateNarrows(state, entry.state)) base = entry;
+    });
+    return base;
+}
+
+function rememberFilterResult(state, indices, metrics) {
+    const entry = { state, indices, metrics };
+    filterCache.entries.set(state.key, entry);
+    while (filterCache.entries.size > FILTER_CACHE_SIZE) {
+        filterCache.entries.delete(filterCache.entries.keys().next().value);
+    }
+    return entry;
+}
+
 /**
- * Apply all active filters — config-driven, highly optimized.
- * Only builds Sets for filters that actually have selections.
+ * Rows of ds (or of `within`, a cached superset) that pass state.
+ * Each active selection becomes a Uint8Array mask over its column's
+ * dictionary codes, so the row loop only does typed-array reads.
  */
-function applyFilters() {
-    const result = [];
-    const len = rawData.length;
-
-    // Scalar filters
-    const hasDateStart = !!filters.startDate;
-    const hasDateEnd = !!filters.endDate;
-    const hasJobType = filters.jobType !== 'all';
-    const hasDeptCats = filters.deptCategories.length > 0;
-    const deptCatSet = hasDeptCats ? new Set(filters.deptCategories) : null;
-
-    // Build active multiselect filter Sets (only for filters with selections)
-    const activeSets = [];
-    const activeFields = [];
-    for (let i = 0; i < MULTISELECT_FILTERS.length; i++) {
-        const f = MULTISELECT_FILTERS[i];
-        if (filters[f.key].length > 0) {
-            activeSets.push(new Set(filters[f.key]));
-            activeFields.push(f.field);
-        }
+function filterRows(ds, state, within) {
+    const dates = ds.dates;
+    const total = within ? within.length : ds.length;
+    const result = new Int32Array(total);
+    let count = 0;
+
+    const { startKey, endKey } = state;
+    const jobTypeCode = state.jobType !== 'all' ? datasetColumn(ds, 'Job Type').values.indexOf(state.jobType) : -2;
+    const jobTypeCodes = datasetColumn(ds, 'Job Type').codes;
+
+    const activeMasks = [];
+    const activeCodes = [];
+    for (const key in state.sets) {
+        activeMasks.push(datasetCodeMask(ds, FILTER_SET_FIELDS[key], state.sets[key]));
+        activeCodes.push(datasetColumn(ds, FILTER_SET_FIELDS[key]).codes);
     }
-    const numActive = activeSets.length;
-
-    for (let i = 0; i < len; i++) {
-        const row = rawData[i];
-        if (hasDateStart && row['G/L Date'] < filters.startDate) continue;
-        if (hasDateEnd && row['G/L Date'] > filters.endDate) continue;
-        if (hasJobType && row['Job Type'] !== filters.jobType) continue;
-        if (hasDeptCats && !deptCatSet.has(row['Dept_Category'])) continue;
-
-        // Check all active multiselect filters
-        if (numActive > 0) {
-            let skip = false;
-            for (let j = 0; j < numActive; j++) {
-                if (!activeSets[j].has(row[activeFields[j]])) { skip = true; break; }
-            }
-            if (skip) continue;
+    const numActive = activeMasks.length;
+
+    rows: for (let k = 0; k < total; k++) {
+        const i = within ? within[k] : k;
+        if (startKey && dates[i] < startKey) continue;
+        if (endKey && dates[i] > endKey) continue;
+        if (jobTypeCode !== -2 && jobTypeCodes[i] !== jobTypeCode) continue;
+        for (let j = 0; j < numActive; j++) {
+            if (!activeMasks[j][activeCodes[j][i]]) continue rows;
         }
+        result[count++] = i;
+    }
+    return result.slice(0, count);
+}
+
+/** Apply all active filters, reusing cached results where possible. */
+function applyFilters() {
+    const state = snapshotFilterState();
+
+    // Sharded data: fetch the shards this date range reaches first
+    const loading = ensureShardsLoaded(state.startKey, state.endKey);
+    if (loading) {
+        showFilterLoading(true);
+        loading.then(applyFilters, e => console.error('Loading data shards failed:', e))
+            .finally(() => showFilterLoading(false));
+        return;
+    }
 
-        result.push(row);
+    let entry = getCachedFilterResult(state);
+    if (!entry) {
+        const base = findNarrowingBase(state);
+        const indices = filterRows(rawData, state, base && base.indices);
+        entry = rememberFilterResult(state, indices, computeAllMetrics(indices));
     }
 
-    filteredData = result;
-    cachedMetrics = computeAllMetrics(filteredData);
+    filteredData = entry.indices;
+    cachedMetrics = entry.metrics;
     updateDashboard();
     updateFilterPills();
 }
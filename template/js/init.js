@@ -47,47 +47,27 @@ function updateDashboard() {
     // Check for empty state
     updateEmptyState();
 
-    // Progressive rendering - defer charts to next frame
+    // Charts update in place; the chart manager batches the repaint into
+    // the next animation frame
     if (filteredData.length > 0) {
-        requestAnimationFrame(() => {
-            renderMonthlyTrend();
-            renderExplorerChart();
-        });
+        renderMonthlyTrend();
+        renderExplorerChart();
     }
 }
 
 // === INITIALIZATION ===
 
 function setupFilters() {
-    // ── Single-pass extraction of ALL multiselect filter values ──
-    // Pre-extract field names for tight loop (avoids config object access per row)
-    const fields = MULTISELECT_FILTERS.map(f => f.field);
-    const numF = fields.length;
-    const sets = [];
-    for (let j = 0; j < numF; j++) sets.push(new Set());
-    const deptCatSet = new Set();
-
-    const len = rawData.length;
-    for (let i = 0; i < len; i++) {
-        const r = rawData[i];
-        for (let j = 0; j < numF; j++) {
-            const v = r[fields[j]];
-            if (v != null && v !== '') sets[j].add(String(v));
-        }
-        if (r['Dept_Category']) deptCatSet.add(r['Dept_Category']);
-    }
-
-    // Populate and setup each multiselect from config
-    for (let j = 0; j < numF; j++) {
-        const f = MULTISELECT_FILTERS[j];
-        const values = Array.from(sets[j]).sort();
+    // ── Filter values and row counts come from the column catalogs ──
+    for (const f of MULTISELECT_FILTERS) {
+        const { values, counts } = datasetCatalog(rawData, f.field);
         filterTotals[f.key] = values.length;
-        populateMultiselect(document.getElementById(f.id + 'Options'), values, f.key);
+        populateMultiselect(document.getElementById(f.id + 'Options'), values, f.key, counts);
     }
     setupAllMultiselects();
 
     // Dept Category chips
-    const deptCategories = Array.from(deptCatSet).sort();
+    const deptCategories = datasetDistinct(rawData, 'Dept_Category');
     filterTotals.deptCategories = deptCategories.length;
     setupDeptCategoryChips(deptCategories);
 
@@ -199,18 +179,21 @@ async function handlePassword() {
     const error = document.getElementById('passwordError');
     btn.disabled = true; btn.textContent = 'Decrypting...'; error.style.display = 'none';
     try {
-        const csvData = await decryptData(password, encryptedPayload);
-        rawData = Papa.parse(csvData, { header: true, dynamicTyping: true, skipEmptyLines: true }).data;
-        filteredData = [...rawData];
-        document.getElementById('passwordOverlay').style.display = 'none';
-        document.getElementById('dashboard').classList.add('visible');
-        setupFilters();
-        setupTrendControls();
-        setupExplorerControls();
-        setupDrill();
-        setupComparisonListeners();
-        setupModals();
-        updateDashboard();
+        if (isShardedPayload(encryptedPayload)) {
+            const { dataset, range } = await openShardedDataset(password, encryptedPayload);
+            unlockPassword = password;
+            startDashboard(dataset, range);
+            return;
+        }
+        const key = await derivePayloadKey(password, encryptedPayload);
+        let buffer = await loadCachedDataset(encryptedPayload.hash, key);
+        if (!buffer) {
+            buffer = await decryptWithKey(key, encryptedPayload);
+            if (encryptedPayload.compression === 'gzip') buffer = await gunzipBuffer(buffer);
+            saveCachedDataset(encryptedPayload.hash, key, buffer);
+        }
+        unlockPassword = password;
+        startDashboard(datasetFromBinary(buffer));
     } catch (e) {
         console.error('Decryption failed:', e);
         error.style.display = 'block';
@@ -218,6 +201,47 @@ async function handlePassword() {
     }
 }
 
+/**
+ * Skip the password screen when this build's dataset is cached and the tab
+ * still holds the session's cache key (dataset-cache.js). Sharded builds
+ * always prompt; their shards need the password-derived key.
+ */
+async function unlockFromCache() {
+    if (isShardedPayload(encryptedPayload)) return;
+    const buffer = await loadCachedDataset(encryptedPayload.hash);
+    if (buffer && !dashboardStarted) startDashboard(datasetFromBinary(buffer));
+}
+
+/** Show the dashboard for dataset, optionally starting on a date range ({startDate, endDate}). */
+function startDashboard(dataset, range = null) {
+    if (dashboardStarted) return;
+    dashboardStarted = true;
+    rawData = dataset;
+    filteredData = datasetAllRows(rawData);
+    if (range) {
+        filters.startDate = range.startDate;
+        filters.endDate = range.endDate;
+        document.getElementById('startDate').value = range.startDate;
+        document.getElementById('endDate').value = range.endDate;
+    }
+    document.getElementById('passwordOverlay').style.display = 'none';
+    document.getElementById('dashboard').classList.add('visible');
+    setupFilters();
+    setupTrendControls();
+    setupExplorerControls();
+    setupDrill();
+    setupComparisonListeners();
+    setupModals();
+    document.getElementById('headerLockBtn').addEventListener('click', lockDashboard);
+    if (range) applyFilters();
+    else updateDashboard();
+}
+
+async function lockDashboard() {
+    await clearDatasetCache();
+    location.reload();
+}
+
 function setupModals() {
     // Initialize the modal manager
     ModalManager.init();
@@ -240,6 +264,7 @@ function setupModals() {
 
 document.getElementById('passwordBtn').addEventListener('click', handlePassword);
 document.getElementById('passwordInput').addEventListener('keypress', e => { if (e.key === 'Enter') handlePassword(); });
+unlockFromCache();
 
 // === KEYBOARD SHORTCUTS ===
 document.addEventListener('keydown', e => {
@@ -61,19 +61,20 @@ function renderSparkline(canvasId, data, color) {
 
 function getMonthlyTrendData() {
     const monthlyData = {};
-    filteredData.forEach(r => {
-        const m = (r['G/L Date'] || '').substring(0, 7);
-        if (!m) return;
+    const amounts = rawData.numeric['Actual Amount'], dates = rawData.dates;
+    const isAllocCode = datasetAllocFlags(rawData), costTypes = datasetColumn(rawData, 'Cost Type').codes;
+    for (let k = 0; k < filteredData.length; k++) {
+        const i = filteredData[k];
+        if (!dates[i]) continue;
+        const m = monthKeyToString((dates[i] / 100) | 0);
         if (!monthlyData[m]) monthlyData[m] = { gross: 0, alloc: 0, net: 0 };
-        const amt = r['Actual Amount'] || 0;
-        const ct = String(r['Cost Type'] || '');
-        if (ct.startsWith('693')) {
-            monthlyData[m].alloc += amt;
+        if (isAllocCode[costTypes[i]]) {
+            monthlyData[m].alloc += amounts[i];
         } else {
-            monthlyData[m].gross += amt;
+            monthlyData[m].gross += amounts[i];
         }
         monthlyData[m].net = monthlyData[m].gross + monthlyData[m].alloc;
-    });
+    }
 
     const sortedMonths = Object.keys(monthlyData).sort().slice(-12);
     return {
@@ -114,44 +115,49 @@ function calculatePriorPeriodKPIsDeferred() {
 
 function calculatePriorPeriodKPIsSync() {
     // Determine the date range of current filtered data
-    const dates = filteredData.map(r => r['G/L Date']).filter(Boolean).sort();
-    if (dates.length === 0) return null;
+    const range = datasetDateRange(rawData, filteredData);
+    if (!range.min) return null;
 
-    const startDate = new Date(dates[0]);
-    const endDate = new Date(dates[dates.length - 1]);
+    const startDate = new Date(dateKeyToString(range.min));
+    const endDate = new Date(dateKeyToString(range.max));
     const duration = endDate - startDate;
 
     // Calculate prior period with same duration
     const priorEnd = new Date(startDate.getTime() - 24 * 60 * 60 * 1000);
     const priorStart = new Date(priorEnd.getTime() - duration);
 
-    const priorStartStr = priorStart.toISOString().split('T')[0];
-    const priorEndStr = priorEnd.toISOString().split('T')[0];
-
-    // Use Set for fast lookup
-    const divSet = filters.divisions.length > 0 ? new Set(filters.divisions) : null;
-    const deptSet = filters.departments.length > 0 ? new Set(filters.departments) : null;
-    const deptCatSet = filters.deptCategories.length > 0 ? new Set(filters.deptCategories) : null;
-    const docTypeSet = filters.docTypes.length > 0 ? new Set(filters.docTypes) : null;
+    const priorStartKey = dateKeyFromString(priorStart.toISOString().split('T')[0]);
+    const priorEndKey = dateKeyFromString(priorEnd.toISOString().split('T')[0]);
+
+    // Code masks for the dimension filters carried over to the prior period
+    const maskFor = (field, selected) => selected.length > 0
+        ? { mask: datasetCodeMask(rawData, field, selected), codes: datasetColumn(rawData, field).codes }
+        : null;
+    const masks = [
+        maskFor('Division Name', filters.divisions),
+        maskFor('Department', filters.departments),
+        maskFor('Dept_Category', filters.deptCategories),
+        maskFor('Document Type', filters.docTypes)
+    ].filter(Boolean);
+    const jobTypeCode = filters.jobType !== 'all' ? datasetColumn(rawData, 'Job Type').values.indexOf(filters.jobType) : -2;
+    const jobTypeCodes = datasetColumn(rawData, 'Job Type').codes;
+
+    const amounts = rawData.numeric['Actual Amount'], dates = rawData.dates;
+    const isAllocCode = datasetAllocFlags(rawData), costTypes = datasetColumn(rawData, 'Cost Type').codes;
 
     let gross = 0, alloc = 0;
     const months = new Set();
     const len = rawData.length;
 
-    for (let i = 0; i < len; i++) {
-        const row = rawData[i];
-        const glDate = row['G/L Date'];
-        if (!glDate || glDate < priorStartStr || glDate > priorEndStr) continue;
-        if (filters.jobType !== 'all' && row['Job Type'] !== filters.jobType) continue;
-        if (divSet && !divSet.has(row['Division Name'])) continue;
-        if (deptSet && !deptSet.has(row['Department'])) continue;
-        if (deptCatSet && !deptCatSet.has(row['Dept_Category'])) continue;
-        if (docTypeSet && !docTypeSet.has(row['Document Type'])) continue;
-
-        const amt = row['Actual Amount'] || 0;
-        const ct = String(row['Cost Type'] || '');
-        months.add(glDate.substring(0, 7));
-        if (ct.startsWith('693')) alloc += amt; else gross += amt;
+    rows: for (let i = 0; i < len; i++) {
+        const date = dates[i];
+        if (!date || date < priorStartKey || date > priorEndKey) continue;
+        if (jobTypeCode !== -2 && jobTypeCodes[i] !== jobTypeCode) continue;
+        for (const m of masks) if (!m.mask[m.codes[i]]) continue rows;
+
+        const amt = amounts[i];
+        months.add((date / 100) | 0);
+        if (isAllocCode[costTypes[i]]) alloc += amt; else gross += amt;
     }
 
     if (months.size === 0) return null;
@@ -189,30 +195,7 @@ function calculateKPIs() {
     }
 
     // Fallback: calculate from scratch (shouldn't happen often)
-    let gross = 0, alloc = 0, gaTotal = 0, inTotal = 0;
-    const months = new Set();
-    filteredData.forEach(r => {
-        const amt = r['Actual Amount'] || 0;
-        const ct = String(r['Cost Type'] || '');
-        if (r['G/L Date']) months.add(r['G/L Date'].substring(0, 7));
-        if (ct.startsWith('693')) alloc += amt; else gross += amt;
-        if (r['Job Type'] === 'GA') gaTotal += amt;
-        else if (r['Job Type'] === 'IN') inTotal += amt;
-    });
-    const net = gross + alloc;
-    const recoveryPct = gross !== 0 ? Math.abs(alloc / gross * 100) : 0;
-    const total = gaTotal + inTotal;
-    const gaPct = total !== 0 ? (gaTotal / total * 100) : 0;
-    const inPct = total !== 0 ? (inTotal / total * 100) : 0;
-    const monthCount = months.size || 1;
-
-    return {
-        gross, alloc, net, recoveryPct, gaPct, inPct,
-        monthlyAvg: net / monthCount, monthCount,
-        grossRecords: filteredData.filter(r => !String(r['Cost Type']||'').startsWith('693')).length,
-        allocRecords: filteredData.filter(r => String(r['Cost Type']||'').startsWith('693')).length,
-        priorKPIs: null
-    };
+    return { ...computeAllMetrics(filteredData).kpis, priorKPIs: null };
 }
 
 function formatTrendIndicator(current, prior) {
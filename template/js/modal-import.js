@@ -4,6 +4,8 @@
 //   LARGE FILES (≥30 MB): Custom streaming parser — uses DecompressionStream
 //     to incrementally decompress the ZIP and SAX-parse the XML without
 //     ever holding the full 670 MB sheet XML in memory.
+// DATA PACKS (.gapack): produced offline by `build_dashboard.py pack`.
+//     Already converted and derived; just decrypt, gunzip and swap in.
 
 const ImportModal = (function() {
     let selectedFile = null;
@@ -32,31 +34,34 @@ const ImportModal = (function() {
     // Columns whose numeric values are Excel date serials
     const DATE_COLUMNS = new Set(['G/L Date', 'Invoice Date', 'Batch Date']);
 
-    // Department mapping
-    const DEPARTMENT_MAP = {
-        '110': 'Exec', '130': 'Bus Dev', '140': 'Admin', '150': 'Acct', '165': 'Treasury',
-        '170': 'HR Payroll', '180': 'IT', '190': 'Risk Mgmt', '210': 'Intl Ops',
-        '230': 'Safety Mgmt', '250': 'Estimating', '260': 'Proposals', '520': 'Ops Proj Mgmt',
-        '530': 'Ops Proj Cont', '540': 'Ops Proc Subs', '550': 'Ops Eng', '560': 'NonBillable',
-        '590': 'Field Ops', '710': 'Eqp Gen', '711': 'Fuel', '720': 'Eqp Mech',
-        '730': 'Eqp Haul', '740': 'Aviation Fixed Wing', '750': 'Aviation Rotary Wing',
-        '760': 'Small Tools', '770': 'Warehouse', '810': 'Safety Gen', '820': 'Safety Train',
-        '850': 'Comm IT Cell', '860': 'Facilities'
-    };
-
-    const DEPARTMENT_CATEGORY_MAP = {
-        '110': 'G&A', '130': 'G&A', '140': 'G&A', '150': 'G&A', '165': 'G&A',
-        '170': 'G&A', '180': 'G&A', '190': 'G&A', '210': 'G&A', '230': 'G&A',
-        '250': 'G&A', '260': 'G&A', '520': 'Ops Support', '530': 'Ops Support',
-        '540': 'Ops Support', '550': 'Ops Support', '560': 'Ops Support',
-        '710': 'Equipment', '711': 'Equipment', '720': 'Equipment', '730': 'Equipment',
-        '740': 'Equipment', '750': 'Equipment', '810': 'Safety', '820': 'Safety',
-        '760': 'Tools', '590': 'Other', '770': 'Other', '850': 'Other', '860': 'Other'
-    };
+    const PACK_FORMAT = 'ga-data-pack';
+
+    // Columns of the imported dataset, in the same order as the embedded payload
+    const IMPORT_FIELDS = [
+        'G/L Date', 'Division Name', 'Job', 'Job Type', 'Cost Type',
+        'Actual Amount', 'Actual Units', 'Document Type', 'Description', 'Category',
+        'Is_Allocation', 'Department', 'Dept_Category',
+        'Job Status', 'Job Groupings', 'Div #', 'Batch Type',
+        'Document Company', 'Cost Code', 'Unit Number'
+    ];
 
     const AMOUNT_CLEAN_REGEX = /[$,]/g;
     const COST_CODE_SPLIT = ' - ';
 
+    // Category/department lookups shared with the builder (see config.js)
+    const RULES = DERIVATION_RULES;
+
+    /** Leading three digits of s as a 0-999 table index, or -1. */
+    function digitIndex(s) {
+        let n = 0;
+        for (let k = 0; k < 3; k++) {
+            const d = s.charCodeAt(k) - 48;
+            if (!(d >= 0 && d <= 9)) return -1;
+            n = n * 10 + d;
+        }
+        return n;
+    }
+
     // ──────────────────────────────────────────────────────
     //  UI helpers
     // ──────────────────────────────────────────────────────
@@ -115,8 +120,12 @@ const ImportModal = (function() {
 
     function handleFileSelect(file) {
         if (!file) return;
+        if (file.name.match(/\.gapack$/i)) {
+            loadDataPack(file);
+            return;
+        }
         if (!file.name.match(/\.xlsx?$/i)) {
-            alert('Please select an Excel file (.xlsx or .xls)');
+            alert('Please select an Excel file (.xlsx or .xls) or a data pack (.gapack)');
             return;
         }
         selectedFile = file;
@@ -137,6 +146,48 @@ const ImportModal = (function() {
         }
     }
 
+    // ──────────────────────────────────────────────────────
+    //  Data packs (.gapack)
+    //  Encrypted, gzip-compressed columnar binary with the derived
+    //  columns already present (same format as the embedded payload).
+    // ──────────────────────────────────────────────────────
+
+    async function loadDataPack(file) {
+        showSection('processing');
+        updateProgress('Reading data pack...', 5);
+        const startTime = performance.now();
+
+        try {
+            const pack = JSON.parse(await file.text());
+            if (pack.format !== PACK_FORMAT) throw new Error('Not a dashboard data pack');
+            if (pack.compression === 'gzip' && !SUPPORTS_STREAMING) throw new Error('This browser cannot decompress data packs');
+
+            updateProgress('Decrypting...', 20);
+            let decrypted;
+            try {
+                decrypted = await decryptBytes(unlockPassword, pack);
+            } catch (_) {
+                const password = prompt('This data pack uses a different password. Enter it to continue:');
+                if (password == null) { removeFile(); return; }
+                decrypted = await decryptBytes(password, pack);
+            }
+
+            updateProgress('Decompressing...', 40);
+            const buffer = pack.compression === 'gzip'
+                ? await gunzipBuffer(decrypted)
+                : decrypted;
+            decrypted = null;
+
+            updateProgress(`Loading ${Number(pack.records || 0).toLocaleString()} records...`, 60);
+            await new Promise(r => setTimeout(r, 0));
+            finishImport(datasetFromBinary(buffer), startTime);
+        } catch (err) {
+            console.error('Data pack error:', err);
+            showSection('dropzone');
+            alert('Error loading data pack: ' + (err.name === 'OperationError' ? 'wrong password' : err.message));
+        }
+    }
+
     // ──────────────────────────────────────────────────────
     //  PATH A: SheetJS parser (files < 30 MB)
     // ──────────────────────────────────────────────────────
@@ -710,7 +761,8 @@ const ImportModal = (function() {
         const costCodes = cols['Cost Code'] || [];
         const unitNumbers = cols['Unit Number'] || [];
 
-        const processed = new Array(totalRows);
+        const builder = createDatasetBuilder(IMPORT_FIELDS, totalRows);
+        const set = builder.set;
         let writeIdx = 0;
 
         function processBatch() {
@@ -735,57 +787,49 @@ const ImportModal = (function() {
                 const ce = ctStr.indexOf(COST_CODE_SPLIT);
                 const code = ce > 0 ? ctStr.substring(0, ce).trim() : ctStr.trim();
 
-                let category;
-                if (code.startsWith('61')) category = 'Labor Costs';
-                else if (code.startsWith('62')) category = 'Travel & Per Diem';
-                else if (code.startsWith('64')) category = 'Fleet & Materials';
-                else if (code.startsWith('65')) category = 'Facilities & Services';
-                else if (code.startsWith('67')) category = 'Equipment Costs';
-                else if (code.startsWith('693')) category = 'Allocation Credits';
-                else if (code.startsWith('69')) category = 'Other Allocations';
-                else if (code.startsWith('71') || code.startsWith('72')) category = 'Corporate Overhead';
-                else if (code.startsWith('73') || code.startsWith('74') || code.startsWith('75')) category = 'G&A & Other';
-                else category = 'Other';
+                const prefix = digitIndex(code);
+                const category = RULES.categories[prefix < 0 ? 0 : RULES.costPrefix[prefix]];
 
                 const job = jobs[i];
-                let deptCode = '';
+                let department = RULES.unknownDepartment, deptCategory = RULES.unknownDepartment;
                 if (job != null && job !== '') {
                     const jn = typeof job === 'number' ? Math.floor(job) : parseInt(job, 10);
-                    if (!isNaN(jn)) deptCode = String(jn).slice(-3);
+                    const deptCode = isNaN(jn) ? '' : String(jn).slice(-3);
+                    const d = deptCode.length === 3 ? digitIndex(deptCode) : -1;
+                    const id = d < 0 ? 0 : RULES.deptIndex[d];
+                    department = RULES.departments[id] || `${RULES.unknownDepartment} (${deptCode})`;
+                    deptCategory = RULES.deptCategories[id];
                 }
-                const dn = DEPARTMENT_MAP[deptCode];
-                const department = dn ? `${deptCode} - ${dn}` : (deptCode ? `Unknown (${deptCode})` : 'Unknown');
-                const deptCategory = DEPARTMENT_CATEGORY_MAP[deptCode] || 'Other';
 
                 let units = actualUnits[i];
                 if (typeof units !== 'number') units = typeof units === 'string' ? (parseFloat(units.replace(AMOUNT_CLEAN_REGEX, '')) || 0) : 0;
 
-                processed[writeIdx++] = {
-                    'G/L Date': dateStr || '', 'Division Name': String(divNames[i] || ''),
-                    'Job': job, 'Job Type': String(jobTypes[i] || ''), 'Cost Type': costType,
-                    'Actual Amount': amount, 'Actual Units': units, 'Document Type': String(dt || ''),
-                    'Description': String(descriptions[i] || ''), 'Category': category,
-                    'Is_Allocation': code.startsWith('693'), 'Department': department, 'Dept_Category': deptCategory,
-                    // Additional filter columns
-                    'Job Status': String(jobStatuses[i] || ''), 'Job Groupings': String(jobGroupings[i] || ''),
-                    'Div #': String(divNums[i] || ''), 'Batch Type': String(batchTypes[i] || ''),
-                    'Document Company': String(docCompanies[i] || ''), 'Cost Code': String(costCodes[i] || ''),
-                    'Unit Number': String(unitNumbers[i] || '')
-                };
+                const w = writeIdx++;
+                set('G/L Date', w, dateStr); set('Division Name', w, divNames[i] || '');
+                set('Job', w, job); set('Job Type', w, jobTypes[i] || ''); set('Cost Type', w, costType);
+                set('Actual Amount', w, amount); set('Actual Units', w, units); set('Document Type', w, dt || '');
+                set('Description', w, descriptions[i] || ''); set('Category', w, category);
+                set('Is_Allocation', w, code.startsWith(RULES.allocationPrefix) ? 'true' : 'false');
+                set('Department', w, department); set('Dept_Category', w, deptCategory);
+                // Additional filter columns
+                set('Job Status', w, jobStatuses[i] || ''); set('Job Groupings', w, jobGroupings[i] || '');
+                set('Div #', w, divNums[i] || ''); set('Batch Type', w, batchTypes[i] || '');
+                set('Document Company', w, docCompanies[i] || ''); set('Cost Code', w, costCodes[i] || '');
+                set('Unit Number', w, unitNumbers[i] || '');
             }
             currentRow = end;
             const pct = Math.round((currentRow / totalRows) * 100);
             updateProgress(`Processing rows... ${currentRow.toLocaleString()} / ${totalRows.toLocaleString()} (${pct}%)`, pct);
             if (currentRow < totalRows) setTimeout(processBatch, 0);
-            else { processed.length = writeIdx; parsedData = null; finishImport(processed, startTime); }
+            else { parsedData = null; finishImport(builder.finish(writeIdx), startTime); }
         }
         setTimeout(processBatch, 0);
     }
 
-    function finishImport(processed, startTime) {
+    function finishImport(dataset, startTime) {
         updateProgress('Updating dashboard...', 95);
-        rawData = processed;
-        filteredData = rawData;
+        rawData = dataset;
+        filteredData = datasetAllRows(rawData);
         filters = { startDate: null, endDate: null, jobType: 'all', deptCategories: [] };
         MULTISELECT_FILTERS.forEach(f => { filters[f.key] = []; });
         cachedMetrics = null;
@@ -802,39 +846,22 @@ const ImportModal = (function() {
         updateDashboard();
 
         const elapsed = ((performance.now() - startTime) / 1000).toFixed(2);
-        console.log(`Import completed in ${elapsed}s for ${processed.length.toLocaleString()} rows`);
+        console.log(`Import completed in ${elapsed}s for ${dataset.length.toLocaleString()} rows`);
         showSection('success');
-        document.getElementById('importSuccessSubtitle').textContent = `${processed.length.toLocaleString()} records loaded in ${elapsed}s`;
+        document.getElementById('importSuccessSubtitle').textContent = `${dataset.length.toLocaleString()} records loaded in ${elapsed}s`;
         updateFooterInfo('Data imported — dashboard updated');
         setTimeout(() => ModalManager.close('importModal'), 2000);
     }
 
     function repopulateFilterOptions() {
-        // Single-pass extraction using MULTISELECT_FILTERS config
-        const fields = MULTISELECT_FILTERS.map(f => f.field);
-        const numF = fields.length;
-        const sets = [];
-        for (let j = 0; j < numF; j++) sets.push(new Set());
-        const deptCatSet = new Set();
-
-        const len = rawData.length;
-        for (let i = 0; i < len; i++) {
-            const r = rawData[i];
-            for (let j = 0; j < numF; j++) {
-                const v = r[fields[j]];
-                if (v != null && v !== '') sets[j].add(String(v));
-            }
-            if (r['Dept_Category']) deptCatSet.add(r['Dept_Category']);
-        }
-
-        for (let j = 0; j < numF; j++) {
-            const f = MULTISELECT_FILTERS[j];
-            const values = Array.from(sets[j]).sort();
+        // Catalogs are already distinct and sorted, with counts from finish()
+        MULTISELECT_FILTERS.forEach(f => {
+            const { values, counts } = datasetCatalog(rawData, f.field);
             filterTotals[f.key] = values.length;
-            populateMultiselect(document.getElementById(f.id + 'Options'), values, f.key);
-        }
+            populateMultiselect(document.getElementById(f.id + 'Options'), values, f.key, counts);
+        });
 
-        const deptCategories = Array.from(deptCatSet).sort();
+        const deptCategories = datasetDistinct(rawData, 'Dept_Category');
         filterTotals.deptCategories = deptCategories.length;
         const cc = document.getElementById('deptCategoryChips');
         if (cc) cc.innerHTML = deptCategories.map(c => `<button class="chip-toggle" data-value="${escapeHtml(c)}">${escapeHtml(c)}</button>`).join('');
@@ -1,10 +1,8 @@
 // === KPI DETAIL MODAL ===
 
 const KPIDetailModal = (function() {
-    let trendChart = null;
-    let breakdownChart = null;
     let currentKPI = null;
-    let kpiData = [];
+    let kpiData = new Int32Array(0);   // Row indices into rawData
     let trendChartType = 'line';
     let breakdownType = 'category';
 
@@ -61,7 +59,7 @@ const KPIDetailModal = (function() {
         }
 
         // Filter data for this KPI
-        kpiData = filteredData.filter(config.filter);
+        kpiData = datasetSelect(rawData, filteredData, config.filter);
 
         // Update header
         document.getElementById('kpiModalTitle').textContent = config.title;
@@ -103,17 +101,13 @@ const KPIDetailModal = (function() {
      */
     function updateSummaryStats(config) {
         // Calculate totals
-        const total = kpiData.reduce((sum, r) => sum + (r['Actual Amount'] || 0), 0);
+        const amounts = rawData.numeric['Actual Amount'];
+        let total = 0;
+        kpiData.forEach(i => { total += amounts[i]; });
         const count = kpiData.length;
 
         // Calculate monthly average
-        const monthlyAgg = {};
-        kpiData.forEach(r => {
-            const month = (r['G/L Date'] || '').substring(0, 7);
-            if (month) {
-                monthlyAgg[month] = (monthlyAgg[month] || 0) + (r['Actual Amount'] || 0);
-            }
-        });
+        const monthlyAgg = datasetSumByMonth(rawData, kpiData);
         const months = Object.keys(monthlyAgg);
         const monthlyAvg = months.length > 0 ? total / months.length : 0;
 
@@ -146,29 +140,22 @@ const KPIDetailModal = (function() {
      * Render the trend chart
      */
     function renderTrendChart() {
-        const ctx = document.getElementById('kpiTrendChart').getContext('2d');
-
-        if (trendChart) {
-            trendChart.destroy();
-        }
-
-        // Aggregate by month
-        const monthlyAgg = {};
-        kpiData.forEach(r => {
-            const month = (r['G/L Date'] || '').substring(0, 7);
-            if (month) {
-                monthlyAgg[month] = (monthlyAgg[month] || 0) + (r['Actual Amount'] || 0);
-            }
-        });
+        // Aggregate by month, bucketing long ranges to CHART_LIMITS.maxPoints
+        const monthlyAgg = datasetSumByMonth(rawData, kpiData);
 
         const months = Object.keys(monthlyAgg).sort();
-        const labels = months.map(formatMonthLabel);
-        const values = months.map(m => monthlyAgg[m]);
+        const buckets = chartBuckets(months.length, CHART_LIMITS.maxPoints);
+        const labels = buckets.map(([s, e]) => s === e ? formatMonthLabel(months[s]) : `${formatMonthLabel(months[s])} - ${formatMonthLabel(months[e])}`);
+        const values = buckets.map(([s, e]) => {
+            let sum = 0;
+            for (let i = s; i <= e; i++) sum += monthlyAgg[months[i]];
+            return sum;
+        });
 
         const config = kpiConfigs[currentKPI];
         const color = COLORS[config.color] || COLORS.blue;
 
-        trendChart = new Chart(ctx, {
+        renderChart('kpiTrend', 'kpiTrendChart', {
             type: trendChartType,
             data: {
                 labels,
@@ -208,14 +195,7 @@ const KPIDetailModal = (function() {
      * Render the breakdown chart
      */
     function renderBreakdownChart() {
-        const ctx = document.getElementById('kpiBreakdownChart').getContext('2d');
-
-        if (breakdownChart) {
-            breakdownChart.destroy();
-        }
-
         // Aggregate by breakdown type
-        const agg = {};
         const fieldMap = {
             'category': 'Category',
             'department': 'Department',
@@ -223,10 +203,7 @@ const KPIDetailModal = (function() {
         };
         const field = fieldMap[breakdownType];
 
-        kpiData.forEach(r => {
-            const key = r[field] || 'Unknown';
-            agg[key] = (agg[key] || 0) + (r['Actual Amount'] || 0);
-        });
+        const agg = datasetSumBy(rawData, kpiData, field);
 
         // Sort and take top 8
         const sorted = Object.entries(agg)
@@ -240,7 +217,7 @@ const KPIDetailModal = (function() {
             ? sorted.map(d => CATEGORY_COLORS[d[0]] || COLORS.gray)
             : sorted.map((_, i) => PALETTE[i % PALETTE.length]);
 
-        breakdownChart = new Chart(ctx, {
+        renderChart('kpiBreakdown', 'kpiBreakdownChart', {
             type: 'doughnut',
             data: {
                 labels,
@@ -285,11 +262,13 @@ const KPIDetailModal = (function() {
         const tbody = document.getElementById('kpiContributorsBody');
 
         // Sort by absolute amount and take top 10
-        const sorted = [...kpiData]
-            .sort((a, b) => Math.abs(b['Actual Amount'] || 0) - Math.abs(a['Actual Amount'] || 0))
-            .slice(0, 10);
+        const amounts = rawData.numeric['Actual Amount'];
+        const sorted = datasetRows(rawData, kpiData.slice()
+            .sort((a, b) => Math.abs(amounts[b]) - Math.abs(amounts[a]))
+            .subarray(0, 10));
 
-        const total = kpiData.reduce((s, r) => s + Math.abs(r['Actual Amount'] || 0), 0);
+        let total = 0;
+        kpiData.forEach(i => { total += Math.abs(amounts[i]); });
 
         tbody.innerHTML = sorted.map((r, i) => {
             const amt = r['Actual Amount'] || 0;
@@ -313,14 +292,10 @@ const KPIDetailModal = (function() {
      * Get date range string for footer
      */
     function getDateRange() {
-        const dates = kpiData
-            .map(r => r['G/L Date'])
-            .filter(Boolean)
-            .sort();
+        const range = datasetDateRange(rawData, kpiData);
+        if (!range.min || kpiData.length < 2) return '';
 
-        if (dates.length < 2) return '';
-
-        return ` from ${dates[0]} to ${dates[dates.length - 1]}`;
+        return ` from ${dateKeyToString(range.min)} to ${dateKeyToString(range.max)}`;
     }
 
     /**
@@ -341,7 +316,7 @@ const KPIDetailModal = (function() {
         const headers = ['G/L Date', 'Division Name', 'Department', 'Job', 'Job Type', 'Description', 'Cost Type', 'Category', 'Actual Amount', 'Document Type'];
         const csvContent = [
             headers.join(','),
-            ...kpiData.map(r => headers.map(h => {
+            ...datasetRows(rawData, kpiData).map(r => headers.map(h => {
                 const val = r[h];
                 if (typeof val === 'string' && (val.includes(',') || val.includes('"'))) {
                     return `"${val.replace(/"/g, '""')}"`;
@@ -361,16 +336,10 @@ const KPIDetailModal = (function() {
      * Cleanup on modal close
      */
     function cleanup() {
-        if (trendChart) {
-            trendChart.destroy();
-            trendChart = null;
-        }
-        if (breakdownChart) {
-            breakdownChart.destroy();
-            breakdownChart = null;
-        }
+        destroyChart('kpiTrend');
+        destroyChart('kpiBreakdown');
         currentKPI = null;
-        kpiData = [];
+        kpiData = new Int32Array(0);
     }
 
     /**
@@ -32,9 +32,10 @@ function setupMultiselect(containerId, triggerId, dropdownId, optionsId, filterK
             searchTimer = setTimeout(() => {
                 const q = searchInput.value.toLowerCase();
                 if (!optionsContainer) return;
-                const labels = optionsContainer.querySelectorAll('label');
-                for (let i = 0; i < labels.length; i++) {
-                    labels[i].style.display = labels[i].textContent.toLowerCase().includes(q) ? '' : 'none';
+                // Match on the option value only, not its row count
+                const boxes = optionsContainer.querySelectorAll('input[type="checkbox"]');
+                for (let i = 0; i < boxes.length; i++) {
+                    boxes[i].parentNode.style.display = boxes[i].value.toLowerCase().includes(q) ? '' : 'none';
                 }
             }, 80); // debounce for large lists
         });
@@ -62,13 +63,15 @@ function setupMultiselect(containerId, triggerId, dropdownId, optionsId, filterK
 /**
  * Populate multiselect options using innerHTML (fastest for bulk insertion)
  * + event delegation (one click handler instead of one per checkbox).
+ * counts, when given, is aligned with values and shown next to each option.
  */
-function populateMultiselect(optionsContainer, values, filterKey) {
+function populateMultiselect(optionsContainer, values, filterKey, counts) {
     if (!optionsContainer) return;
 
     // Build HTML string (faster than createElement for large lists)
-    optionsContainer.innerHTML = values.map(v =>
-        `<label><input type="checkbox" value="${escapeHtml(String(v))}"><span>${escapeHtml(String(v))}</span></label>`
+    optionsContainer.innerHTML = values.map((v, i) =>
+        `<label><input type="checkbox" value="${escapeHtml(String(v))}"><span>${escapeHtml(String(v))}</span>` +
+        (counts ? `<span class="multiselect-count">${counts[i].toLocaleString()}</span>` : '') + `</label>`
     ).join('');
 
     // Event delegation: one click handler for all checkboxes
@@ -0,0 +1,151 @@
+// === PERFORMANCE INSTRUMENTATION ===
+// Bundled only by build_dashboard.py --instrument. Wraps the unlock and render
+// phases (base64 decode, PBKDF2, AES-GCM decrypt, columnar decode,
+// setupFilters, applyFilters and each chart render/update) in
+// performance.mark/measure, so they also show up in the DevTools performance
+// panel. The measures are kept in perfTrace together with the build ID, so
+// traces from two releases can be compared side by side. Open the page with
+// ?perf=1 for an overlay listing them; downloadPerfTrace() (or the overlay's
+// button) saves the trace as JSON.
+//
+// Loaded just before init.js: the functions below are reassigned before any
+// event listener captures them.
+
+const PERF_CONFIG = '<!-- PERF_CONFIG -->';
+
+const perfTrace = {
+    buildId: PERF_CONFIG.buildId,
+    dataHash: typeof encryptedPayload !== 'undefined' ? encryptedPayload.hash || null : null,
+    userAgent: navigator.userAgent,
+    startedAt: new Date().toISOString(),
+    measures: []
+};
+
+let perfUnlockStart = null;
+let perfOverlay = null;
+
+/** Record a measure from start (performance.now()) to now. */
+function perfMeasure(name, start) {
+    const end = performance.now();
+    try {
+        performance.measure(name, { start, end });
+    } catch (e) {
+        // Older browsers lack the options form; the trace still gets the entry
+    }
+    perfTrace.measures.push({ name, start: +start.toFixed(2), duration: +(end - start).toFixed(2) });
+    renderPerfOverlay();
+}
+
+/**
+ * Wrap fn so each call is measured. name is a string or a function of
+ * (thisArg, args) returning one; async results are measured until they settle.
+ */
+function perfWrap(name, fn) {
+    return function (...args) {
+        const label = typeof name === 'function' ? name(this, args) : name;
+        const start = performance.now();
+        let result;
+        try {
+            result = fn.apply(this, args);
+        } catch (e) {
+            perfMeasure(label, start);
+            throw e;
+        }
+        if (result && typeof result.then === 'function') {
+            return result.finally(() => perfMeasure(label, start));
+        }
+        perfMeasure(label, start);
+        return result;
+    };
+}
+
+base64ToArrayBuffer = perfWrap('base64 decode', base64ToArrayBuffer);
+decodeSegments = perfWrap('base64 decode (segments)', decodeSegments);
+derivePayloadKey = perfWrap('PBKDF2 + key unwrap', derivePayloadKey);
+decryptWithKey = perfWrap('AES-GCM decrypt', decryptWithKey);
+decryptBlob = perfWrap('AES-GCM decrypt (shard)', decryptBlob);
+gunzipBuffer = perfWrap('gunzip', gunzipBuffer);
+datasetFromBinary = perfWrap('columnar decode', datasetFromBinary);
+setupFilters = perfWrap('setupFilters', setupFilters);
+applyFilters = perfWrap('applyFilters', applyFilters);
+updateDashboard = perfWrap('updateDashboard', updateDashboard);
+renderChart = perfWrap((_, [key]) => `chart render: ${key}`, renderChart);
+
+// The unlock starts at the password submit, or at page load for a cached dataset
+const perfHandlePassword = handlePassword;
+handlePassword = function () {
+    perfUnlockStart = performance.now();
+    return perfHandlePassword.apply(this, arguments);
+};
+
+const perfUnlockFromCache = unlockFromCache;
+unlockFromCache = function () {
+    perfUnlockStart = performance.now();
+    return perfUnlockFromCache.apply(this, arguments);
+};
+
+// From the unlock to the frame after the dashboard's first render
+const perfStartDashboard = startDashboard;
+startDashboard = function () {
+    const first = !dashboardStarted;
+    const result = perfStartDashboard.apply(this, arguments);
+    const unlockStart = perfUnlockStart;
+    if (first && unlockStart !== null) {
+        requestAnimationFrame(() => setTimeout(() => perfMeasure('unlock → first paint', unlockStart)));
+    }
+    return result;
+};
+
+// Updates of existing charts run in a batched animation frame (scheduleChartUpdate)
+if (typeof Chart !== 'undefined' && Chart.prototype && Chart.prototype.update) {
+    Chart.prototype.update = perfWrap(chart => `chart update: ${chart.canvas ? chart.canvas.id : '?'}`,
+        Chart.prototype.update);
+}
+
+/** Save perfTrace (plus navigation timing and memory, where available) as JSON. */
+function downloadPerfTrace() {
+    const navigation = performance.getEntriesByType('navigation')[0];
+    const trace = Object.assign({}, perfTrace, {
+        savedAt: new Date().toISOString(),
+        navigation: navigation ? navigation.toJSON() : null,
+        memory: performance.memory ? {
+            usedJSHeapSize: performance.memory.usedJSHeapSize,
+            totalJSHeapSize: performance.memory.totalJSHeapSize
+        } : null
+    });
+    const blob = new Blob([JSON.stringify(trace, null, 2)], { type: 'application/json' });
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(blob);
+    link.download = `perf-trace-${perfTrace.buildId}.json`;
+    link.click();
+    setTimeout(() => URL.revokeObjectURL(link.href), 0);
+}
+
+function renderPerfOverlay() {
+    if (!perfOverlay) return;
+    const rows = perfTrace.measures.slice(-40).map(m =>
+        `<tr><td>${escapeHtml(m.name)}</td><td>${m.duration.toFixed(1)}</td></tr>`).join('');
+    perfOverlay.querySelector('tbody').innerHTML = rows;
+}
+
+function setupPerfOverlay() {
+    if (!new URLSearchParams(location.search).has('perf')) return;
+    perfOverlay = document.createElement('div');
+    perfOverlay.className = 'perf-overlay';
+    perfOverlay.innerHTML = `
+        <div class="perf-overlay-header">
+            <span>Build ${escapeHtml(perfTrace.buildId)}</span>
+            <button type="button" class="perf-download">Download trace</button>
+            <button type="button" class="perf-close" aria-label="Close">&times;</button>
+        </div>
+        <table><thead><tr><th>Phase</th><th>ms</th></tr></thead><tbody></tbody></table>`;
+    perfOverlay.querySelector('.perf-download').addEventListener('click', downloadPerfTrace);
+    perfOverlay.querySelector('.perf-close').addEventListener('click', () => {
+        perfOverlay.remove();
+        perfOverlay = null;
+    });
+    document.body.appendChild(perfOverlay);
+    renderPerfOverlay();
+}
+
+setupPerfOverlay();
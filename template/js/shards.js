@@ -0,0 +1,117 @@
+// === DATA SHARDS ===
+// With sharded output (build_dashboard.py --target split --shard year|quarter)
+// the embedded payload is an encrypted manifest instead of the data: the
+// dictionaries, counts and aggregate cube of all rows, plus one entry per
+// fiscal period shard ({id, fiscalYear, from, to, rows, gross, alloc, file}).
+// Shard files are fetched and decrypted only when a date range reaches them
+// (ensureShardsLoaded) and concatenated into rawData; their neighbours are
+// prefetched when the browser is idle. Every shard is encrypted under the
+// manifest's key, so PBKDF2 runs once per unlock. Shards are fetched, so the
+// site must be served over HTTP(S), not opened from file://.
+
+const SHARDS_FORMAT = 'ga-shards';
+
+// { manifest, key, loaded: Map(id -> dataset), pending: Map(id -> Promise),
+//   merged: Set of ids in dataset, dataset: the rawData built from them }
+let shardState = null;
+
+function isShardedPayload(payload) {
+    return payload.format === SHARDS_FORMAT;
+}
+
+/**
+ * Decrypt the manifest and load the shards of the latest fiscal year.
+ * Returns { dataset, range }, range being that year as date strings.
+ */
+async function openShardedDataset(password, payload) {
+    const key = await derivePayloadKey(password, payload);
+    let buffer = await decryptWithKey(key, payload);
+    if (payload.compression === 'gzip') buffer = await gunzipBuffer(buffer);
+    const header = readBinaryHeader(buffer);
+    if (header.format !== SHARDS_FORMAT) throw new Error('Unsupported data format');
+
+    const manifest = Object.assign(header, { cube: cubeFromBinary(buffer, header) });
+    shardState = { manifest, key, loaded: new Map(), pending: new Map(), merged: new Set(), dataset: null };
+
+    const dated = manifest.shards.filter(s => s.to);
+    const latestYear = dated.length ? dated[dated.length - 1].fiscalYear : null;
+    const initial = latestYear === null ? manifest.shards : dated.filter(s => s.fiscalYear === latestYear);
+    await Promise.all(initial.map(loadShard));
+    prefetchNeighbours(initial);
+
+    const range = latestYear === null ? null : {
+        startDate: dateKeyToString(initial[0].from),
+        endDate: dateKeyToString(initial[initial.length - 1].to)
+    };
+    return { dataset: mergeLoadedShards(), range };
+}
+
+/** Shards holding rows a startKey..endKey filter (yyyymmdd, 0 = open) can match. */
+function shardsForRange(startKey, endKey) {
+    return shardState.manifest.shards.filter(s => (!startKey || s.to >= startKey) && (!endKey || s.from <= endKey));
+}
+
+/**
+ * Make sure rawData holds every shard the date range needs. Returns null when
+ * it already does (or the data is not sharded, or was replaced by an import),
+ * otherwise a Promise that resolves once rawData has been rebuilt; callers
+ * re-run their filtering then, since row indices change.
+ */
+function ensureShardsLoaded(startKey, endKey) {
+    if (!shardState || shardState.dataset !== rawData) return null;
+    const needed = shardsForRange(startKey, endKey);
+    if (needed.every(s => shardState.merged.has(s.id))) return null;
+
+    const state = shardState;
+    return Promise.all(needed.map(loadShard)).then(() => {
+        if (shardState !== state || state.dataset !== rawData) return;
+        rawData = mergeLoadedShards();
+        filteredData = new Int32Array(0);
+        cachedMetrics = null;
+        prefetchNeighbours(needed);
+        if (comparisonMode) applyComparison();
+    });
+}
+
+function loadShard(shard) {
+    const state = shardState;
+    if (state.loaded.has(shard.id)) return Promise.resolve();
+    if (!state.pending.has(shard.id)) {
+        const pending = (async () => {
+            const response = await fetch(shard.file);
+            if (!response.ok) throw new Error(`Failed to fetch ${shard.file} (${response.status})`);
+            const buffer = await gunzipBuffer(await decryptBlob(state.key, await response.arrayBuffer()));
+            state.loaded.set(shard.id, datasetFromBinary(buffer));
+        })();
+        state.pending.set(shard.id, pending);
+        pending.finally(() => state.pending.delete(shard.id)).catch(() => {});
+    }
+    return state.pending.get(shard.id);
+}
+
+/** Concatenate every loaded shard (manifest order) into a dataset with the manifest's catalogs and cube. */
+function mergeLoadedShards() {
+    const { manifest, loaded } = shardState;
+    const parts = manifest.shards.filter(s => loaded.has(s.id));
+    const ds = datasetConcat(manifest.columns, parts.map(s => loaded.get(s.id)));
+    ds.cube = manifest.cube;
+    shardState.merged = new Set(parts.map(s => s.id));
+    shardState.dataset = ds;
+    return ds;
+}
+
+/** Fetch the dated shards next to the given ones when the browser is idle. */
+function prefetchNeighbours(shards) {
+    const all = shardState.manifest.shards;
+    const ids = new Set(shards.map(s => s.id));
+    const next = [];
+    all.forEach((s, i) => {
+        if (!ids.has(s.id)) return;
+        for (const n of [all[i - 1], all[i + 1]]) {
+            if (n && n.to && !ids.has(n.id) && !shardState.loaded.has(n.id)) next.push(n);
+        }
+    });
+    if (next.length === 0) return;
+    const idle = window.requestIdleCallback || (cb => setTimeout(cb, 200));
+    idle(() => next.forEach(s => loadShard(s).catch(e => console.warn('Shard prefetch failed:', e))));
+}
@@ -1,10 +1,15 @@
 // === GLOBAL STATE ===
 
-let rawData = [];
-let filteredData = [];
+let rawData = emptyDataset(0);       // Columnar dataset (see dataset.js)
+let filteredData = new Int32Array(0); // Row indices into rawData
 let charts = {};
 let trendView = 'summary';
 
+// Password the dashboard was unlocked with (reused to open imported data packs).
+// Stays null when the dataset came from the IndexedDB cache.
+let unlockPassword = null;
+let dashboardStarted = false;
+
 let filters = {
     startDate: null,
     endDate: null,
@@ -17,8 +22,8 @@ MULTISELECT_FILTERS.forEach(f => { filters[f.key] = []; });
 
 // Drill-through state
 const drill = {
-    data: [],
-    filtered: [],
+    data: new Int32Array(0),
+    filtered: new Int32Array(0),
     page: 1,
     pageSize: 100,
     sortCol: 'Actual Amount',
@@ -0,0 +1,46 @@
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import build_dashboard  # noqa: E402
+
+
+def report_frame(rows: int = 400, seed: int = 7) -> pl.DataFrame:
+    """A small Cost Code Detail Report, Grand Total row included."""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    df = pl.DataFrame({
+        'Document Type': [rng.choice(['TE', 'JE', 'T2', 'PV', 'JA']) for _ in range(rows)],
+        'Document Company': [rng.choice([100, 200, 300]) for _ in range(rows)],
+        'G/L Date': [start + timedelta(days=rng.randrange(540)) for _ in range(rows)],
+        'Division Name': [f'Division {rng.randrange(6)}' for _ in range(rows)],
+        'Job': [10000 + rng.randrange(40) * 7 for _ in range(rows)],
+        'Job Type': [rng.choice(['GA', 'IN']) for _ in range(rows)],
+        'Cost Code': [f'{rng.randrange(60):03d}' for _ in range(rows)],
+        'Cost Type': [rng.choice(['611000 - Labor', '621010 - Travel', '511000 - Hours', '693000 - Allocation'])
+                      for _ in range(rows)],
+        'Actual Amount': [round(rng.uniform(-2000, 20000), 2) for _ in range(rows)],
+        'Actual Units': [float(rng.randrange(40)) for _ in range(rows)],
+        'Vendor Name': [f'Vendor {rng.randrange(30)}' for _ in range(rows)],
+        'Internal Note': ['not used by the dashboard'] * rows,
+    })
+    total = pl.DataFrame({'Document Type': ['Grand Total'], 'Actual Amount': [0.0], 'Actual Units': [0.0]})
+    return pl.concat([df, total], how='diagonal_relaxed')
+
+
+@pytest.fixture(scope='session')
+def report():
+    return report_frame()
+
+
+@pytest.fixture(scope='session')
+def workbook(report, tmp_path_factory):
+    path = tmp_path_factory.mktemp('input') / 'report.xlsx'
+    report.write_excel(path, worksheet=build_dashboard.INPUT_SHEET)
+    return path
@@ -0,0 +1,136 @@
+import base64
+import gzip
+import json
+import struct
+from array import array
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+import build_dashboard
+
+
+def convert(path, **options):
+    csv_data, _ = build_dashboard.excel_to_csv(path, cache_dir=None, use_cache=False, **options)
+    return csv_data
+
+
+@pytest.fixture(scope='module')
+def workbook_csv(workbook):
+    return convert(workbook)
+
+
+def test_workbook_conversion_keeps_codes_and_drops_unused_columns(workbook_csv):
+    header, first = workbook_csv.splitlines()[:2]
+    columns = header.split(',')
+    assert 'Internal Note' not in columns
+    assert 'Dept_Category' in columns
+    assert len(first.split(',')[columns.index('Cost Code')]) == 3
+    assert 'Grand Total' not in workbook_csv
+
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet', '.arrow'])
+def test_exports_convert_like_the_workbook(report, workbook_csv, tmp_path, suffix):
+    path = tmp_path / f'report{suffix}'
+    {'.csv': report.write_csv, '.parquet': report.write_parquet, '.arrow': report.write_ipc}[suffix](path)
+    assert convert(path) == workbook_csv
+
+
+def columnar_sections(columnar):
+    """(header, bytes up to the cube, cube columns as lists) of an encode_columnar() buffer."""
+    size = struct.unpack_from('<I', columnar)[0]
+    header = json.loads(columnar[4:4 + size])
+    cube = header['cube']
+    typecodes = {'i32': 'i', 'u16': 'H', 'u32': 'I', 'f64': 'd'}
+    values = {}
+    for column in cube['columns']:
+        values[column['name']] = array(typecodes[column['type']])
+        width = values[column['name']].itemsize
+        values[column['name']].frombytes(columnar[column['offset']:column['offset'] + cube['length'] * width])
+    return header, columnar[:cube['columns'][0]['offset']], values
+
+
+def test_chunked_conversion_encodes_like_one_pass(report, workbook_csv, tmp_path):
+    path = tmp_path / 'report.parquet'
+    report.write_parquet(path)
+    parts = convert(path, chunk_rows=150, workers=2)
+    assert len(parts) == 3
+    assert build_dashboard._read_string_frame(parts).equals(build_dashboard._read_string_frame(workbook_csv))
+
+    header, rows, cube = columnar_sections(build_dashboard.encode_columnar(workbook_csv))
+    chunked_header, chunked_rows, chunked_cube = columnar_sections(build_dashboard.encode_columnar(parts))
+    assert chunked_header == header
+    assert chunked_rows == rows
+    # Cube cells are summed per part, so amounts may differ in the last bits
+    for name, values in cube.items():
+        assert list(chunked_cube[name]) == pytest.approx(list(values))
+
+
+def test_chunked_encoding_of_no_parts_is_an_empty_dataset():
+    columnar = build_dashboard.encode_columnar([])
+    header = json.loads(columnar[4:4 + struct.unpack_from('<I', columnar)[0]])
+    assert header['length'] == 0
+    assert [c['name'] for c in header['columns']] == list(build_dashboard.INPUT_COLUMNS)
+    assert build_dashboard._read_string_frame([]).is_empty()
+
+def test_chunking_a_workbook_converts_in_one_pass(workbook, workbook_csv):
+    assert convert(workbook, chunk_rows=150) == workbook_csv
+
+
+@pytest.fixture
+def fast_kdf(monkeypatch):
+    monkeypatch.setattr(build_dashboard, 'PBKDF2_ITERATIONS', 1000)
+
+
+def decrypt(payload, password):
+    key = build_dashboard.unwrap_data_key(payload, password)
+    return AESGCM(key).decrypt(base64.b64decode(payload['iv']), base64.b64decode(payload['ct']), None)
+
+
+def test_rekey_replaces_slots_and_keeps_the_ciphertext(fast_kdf):
+    data = b'columnar bytes' * 100
+    payload = build_dashboard.stamp_payload_hash(
+        build_dashboard.encrypt_with_key(data, *build_dashboard.key_envelope(['old', 'kept'])))
+    assert decrypt(payload, 'old') == data
+
+    rekeyed = build_dashboard.rekey_payload(payload, 'kept', ['kept', 'new'])
+    assert (rekeyed['ct'], rekeyed['iv'], rekeyed['hash']) == (payload['ct'], payload['iv'], payload['hash'])
+    assert rekeyed['salt'] != payload['salt']
+    assert decrypt(rekeyed, 'kept') == data
+    assert decrypt(rekeyed, 'new') == data
+    with pytest.raises(ValueError):
+        build_dashboard.unwrap_data_key(rekeyed, 'old')
+    with pytest.raises(ValueError):
+        build_dashboard.rekey_payload(rekeyed, 'old', ['other'])
+
+
+def test_rekeyed_pack_decrypts_to_the_encoded_workbook(fast_kdf, workbook, workbook_csv, tmp_path):
+    pack = tmp_path / f'report{build_dashboard.PACK_SUFFIX}'
+    build_dashboard.pack_workbook(workbook, pack, passwords=['old'])
+    build_dashboard.rekey_output(pack, 'old', ['new'])
+
+    payload = json.loads(pack.read_text(encoding='utf-8'))
+    with pytest.raises(ValueError):
+        decrypt(payload, 'old')
+    assert gzip.decompress(decrypt(payload, 'new')) == build_dashboard.encode_columnar(workbook_csv)
+
+
+@pytest.mark.parametrize('argv, chunk_rows', [
+    ('pack --chunk-rows big.parquet', build_dashboard.DEFAULT_CHUNK_ROWS),
+    ('pack big.parquet --chunk-rows 100 --workers 2', 100),
+    ('--chunk-rows 100 pack big.parquet', 100),
+])
+def test_pack_takes_the_chunking_options(argv, chunk_rows):
+    args = build_dashboard.parse_args(argv.split())
+    assert (args.command, args.workbook.name, args.chunk_rows) == ('pack', 'big.parquet', chunk_rows)
+
+
+def test_export_takes_the_chunking_options():
+    args = build_dashboard.parse_args(['export', '--chunk-rows', '5000', '--workers', '3'])
+    assert (args.chunk_rows, args.workers) == (5000, 3)
+
+
+@pytest.mark.parametrize('argv', ['rekey --passwords groups.txt --password old', '--passwords groups.txt rekey',
+                                  'pack --passwords groups.txt big.parquet'])
+def test_subcommands_take_passwords(argv):
+    assert build_dashboard.parse_args(argv.split()).passwords.name == 'groups.txt'